@@ -6,6 +6,9 @@ import os
 import json
 from datetime import datetime
 import logging
+from config.settings import Config
+from phase3_models.model_registry import ModelRegistry, SCALED_MODEL_TYPES
+from phase1_enhancement.match_store import open_store
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -198,9 +201,21 @@ class ExactFeatureCreator:
             'Nidalee': {'role': 'assassin', 'damage': 'magic', 'cc': 0, 'engage': 0},
         }
     
-    def create_exact_features(self, match_data):
-        """Create features exactly matching the training data"""
+    def create_exact_features(self, match_data, feature_columns=None):
+        """Create features exactly matching the training data
+        
+        feature_columns: the model's (possibly pruned) schema; feature groups
+        with no surviving column are not computed at all
+        """
         features = {}
+        wanted = set(feature_columns) if feature_columns is not None else None
+        
+        def needed(*names):
+            return wanted is None or any(name in wanted for name in names)
+        
+        def side_columns(keys):
+            return [f'{prefix}{key}{suffix}' for key in keys
+                    for prefix, suffix in [('blue_', ''), ('red_', ''), ('', '_diff')]]
         
         # 1. Blue side advantage
         features['blue_side'] = 1
@@ -222,36 +237,39 @@ class ExactFeatureCreator:
         ]
         
         # 3. Calculate team compositions
-        blue_comp = self.calculate_team_composition(blue_champions)
-        red_comp = self.calculate_team_composition(red_champions)
-        
-        # Set composition features
-        for key in ['tanks', 'fighters', 'assassins', 'mages', 'marksmen', 'supports']:
-            features[f'blue_{key}'] = blue_comp[key]
-            features[f'red_{key}'] = red_comp[key]
-            features[f'{key}_diff'] = blue_comp[key] - red_comp[key]
+        comp_keys = ['tanks', 'fighters', 'assassins', 'mages', 'marksmen', 'supports']
+        if needed(*side_columns(comp_keys)):
+            blue_comp = self.calculate_team_composition(blue_champions)
+            red_comp = self.calculate_team_composition(red_champions)
+            
+            # Set composition features
+            for key in comp_keys:
+                features[f'blue_{key}'] = blue_comp[key]
+                features[f'red_{key}'] = red_comp[key]
+                features[f'{key}_diff'] = blue_comp[key] - red_comp[key]
         
         # 4. Strategic scores
-        blue_strategic = self.calculate_strategic_scores(blue_champions)
-        red_strategic = self.calculate_strategic_scores(red_champions)
-        
         strategic_keys = ['engage_score', 'disengage_score', 'poke_score', 'teamfight_score', 
                          'splitpush_score', 'pick_potential', 'early_game_score', 
                          'mid_game_score', 'late_game_score', 'physical_damage', 
                          'magic_damage', 'true_damage', 'cc_score', 'mobility_score', 
                          'sustain_score']
-        
-        for key in strategic_keys:
-            features[f'blue_{key}'] = blue_strategic.get(key, 0)
-            features[f'red_{key}'] = red_strategic.get(key, 0)
-            features[f'{key}_diff'] = blue_strategic.get(key, 0) - red_strategic.get(key, 0)
-        
-        # 5. Composition types (binary features)
         comp_types = ['is_teamfight_comp', 'is_poke_comp', 'is_pick_comp', 'is_split_comp']
-        for comp_type in comp_types:
-            features[f'blue_{comp_type}'] = blue_strategic.get(comp_type, 0)
-            features[f'red_{comp_type}'] = red_strategic.get(comp_type, 0)
-            features[f'{comp_type}_diff'] = blue_strategic.get(comp_type, 0) - red_strategic.get(comp_type, 0)
+        
+        if needed(*side_columns(strategic_keys + comp_types)):
+            blue_strategic = self.calculate_strategic_scores(blue_champions)
+            red_strategic = self.calculate_strategic_scores(red_champions)
+            
+            for key in strategic_keys:
+                features[f'blue_{key}'] = blue_strategic.get(key, 0)
+                features[f'red_{key}'] = red_strategic.get(key, 0)
+                features[f'{key}_diff'] = blue_strategic.get(key, 0) - red_strategic.get(key, 0)
+            
+            # 5. Composition types (binary features)
+            for comp_type in comp_types:
+                features[f'blue_{comp_type}'] = blue_strategic.get(comp_type, 0)
+                features[f'red_{comp_type}'] = red_strategic.get(comp_type, 0)
+                features[f'{comp_type}_diff'] = blue_strategic.get(comp_type, 0) - red_strategic.get(comp_type, 0)
         
         # 6. Synergy scores (simplified)
         features['blue_synergy_score'] = 0.5 + (len(set([self.champion_data.get(c, {}).get('role', 'unknown') for c in blue_champions])) - 3) * 0.1
@@ -264,13 +282,18 @@ class ExactFeatureCreator:
         features['bot_lane_advantage'] = 0.0  # Neutral
         
         # 8. Player ELO features
-        self.calculate_player_elo_features(match_data, features)
+        if needed('avg_elo_diff', 'blue_team_avg_elo', 'red_team_avg_elo',
+                  *[f'{pos}_elo_diff' for pos in ['top', 'jng', 'mid', 'bot', 'sup']]):
+            self.calculate_player_elo_features(match_data, features)
         
         # 9. Team recent form
-        self.calculate_team_form_features(match_data, features)
+        if needed('blue_recent_winrate', 'blue_recent_games', 'red_recent_winrate',
+                  'red_recent_games', 'recent_form_diff'):
+            self.calculate_team_form_features(match_data, features)
         
         # 10. Historical matchup
-        self.calculate_historical_features(match_data, features)
+        if needed('historical_matchup_winrate', 'historical_matchup_games'):
+            self.calculate_historical_features(match_data, features)
         
         # 11. Patch number
         features['patch_number'] = 14.23
@@ -421,8 +444,13 @@ class ExactFeatureCreator:
             features['historical_matchup_games'] = 0
 
 class LCKPredictionApp:
-    def __init__(self):
+    def __init__(self, backend=Config.INFERENCE_BACKEND, intra_op_threads=Config.ONNX_INTRA_OP_THREADS):
+        """backend: 'native', 'compact' (float32 tree arrays) or 'onnx' (onnxruntime,
+        intra_op_threads threads per session)"""
+        self.backend = backend
+        self.intra_op_threads = intra_op_threads
         self.model = None
+        self.model_version = None
         self.feature_columns = None
         self.scaler = None
         self.teams_list = []
@@ -430,6 +458,9 @@ class LCKPredictionApp:
         self.players_data = {}
         self.team_rosters = {}
         self.feature_creator = None
+        self.router = None
+        self.shards = {}
+        self.current_patch = None
         self.load_model_and_data()
     
     def load_model_and_data(self):
@@ -438,17 +469,34 @@ class LCKPredictionApp:
             # Initialize the EXACT feature creator
             self.feature_creator = ExactFeatureCreator()
             
-            # Load model
-            model_path = 'models/final_phase3_models.pkl'
-            if os.path.exists(model_path):
+            # Load the served member of the latest registered version
+            registry = ModelRegistry(Config.MODEL_REGISTRY_PATH)
+            model_path = Config.MODEL_PATH
+            if registry.latest_version():
+                try:
+                    manifest = registry.manifest()
+                    self.model = self.load_member(registry, 'serving', manifest['version'])
+                    self.feature_columns = manifest['feature_columns']
+                    self.scaler = registry.input_scaler('serving', manifest['version'])
+                    if 'router' in manifest['members']:
+                        self.load_shards(registry, manifest)
+                    self.model_version = manifest['version']
+                    logger.info(f"Model {manifest['version']} loaded successfully")
+                    
+                except Exception as e:
+                    logger.error(f"Model loading failed: {e}")
+            elif os.path.exists(model_path):
                 try:
                     import joblib
                     model_data = joblib.load(model_path)
                     
                     if isinstance(model_data, dict):
-                        self.model = model_data.get('best_model') or model_data.get('ensemble') or model_data.get('model')
+                        # Distilled student if it passed the fidelity check at training time
+                        self.model = (model_data.get('serving_model') or model_data.get('best_model')
+                                      or model_data.get('ensemble') or model_data.get('model'))
                         self.feature_columns = model_data.get('feature_columns')
-                        self.scaler = model_data.get('scaler')
+                        if isinstance(self.model, SCALED_MODEL_TYPES):
+                            self.scaler = model_data.get('scaler')
                     else:
                         self.model = model_data
                     
@@ -468,6 +516,35 @@ class LCKPredictionApp:
         except Exception as e:
             logger.error(f"Error in initialization: {str(e)}")
     
+    def load_member(self, registry, name, version):
+        """One registry member through the configured inference backend"""
+        if self.backend == 'compact':
+            from phase3_models.compact_model import load_compact_model
+            return load_compact_model(registry, name, version)
+        if self.backend == 'onnx':
+            from phase3_models.onnx_export import load_onnx_model
+            return load_onnx_model(registry, name, version, intra_op_threads=self.intra_op_threads)
+        return registry.load(name, version)
+    
+    def load_shards(self, registry, manifest):
+        """Per-league/era shard models of a sharded version; the served model is the fallback"""
+        self.router = registry.load('router', manifest['version'])
+        for member in set(self.router.routes.values()):
+            try:
+                self.shards[member] = self.load_member(registry, member, manifest['version'])
+            except Exception as e:
+                logger.warning(f"Shard {member} not loaded, using the global model: {e}")
+        logger.info(f"Loaded {len(self.shards)} model shards")
+    
+    def route(self, match_data):
+        """Shard model for the match's league and patch, or the global model"""
+        if self.router is None:
+            return self.model
+        blue_team = match_data.get('blue_team')
+        league = match_data.get('league') or self.team_rosters.get(blue_team, {}).get('league', 'LCK')
+        patch = match_data.get('patch') or self.current_patch
+        return self.shards.get(self.router.member_for(league, patch), self.model)
+    
     def load_team_rosters(self):
         """Load team rosters from JSON file"""
         try:
@@ -525,22 +602,21 @@ class LCKPredictionApp:
                     logger.info(f"Loaded {len(self.players_data)} players")
                     break
             
-            # Load champions
-            main_data_paths = [
-                'data/enhanced/lck_full_dataset.csv',
-                'data/lck_full_dataset.csv'
-            ]
+            # Load champions from the match store
+            lck_df = open_store().read()
+            if len(lck_df) == 0 and os.path.exists('data/lck_full_dataset.csv'):
+                lck_df = pd.read_csv('data/lck_full_dataset.csv')
             
-            for path in main_data_paths:
-                if os.path.exists(path):
-                    lck_df = pd.read_csv(path)
-                    champs = []
-                    for col in ['blue_champ1', 'blue_champ2', 'blue_champ3', 'blue_champ4', 'blue_champ5']:
-                        if col in lck_df.columns:
-                            champs.extend(lck_df[col].dropna().unique().tolist())
-                    self.champions_list = sorted(list(set([champ for champ in champs if champ and str(champ) != 'nan'])))
-                    logger.info(f"Loaded {len(self.champions_list)} champions")
-                    break
+            if len(lck_df) > 0:
+                if 'patch' in lck_df.columns and 'date' in lck_df.columns:
+                    # Patch of the latest game, for routing to a per-era shard
+                    self.current_patch = str(lck_df.sort_values('date')['patch'].iloc[-1])
+                champs = []
+                for col in ['blue_champ1', 'blue_champ2', 'blue_champ3', 'blue_champ4', 'blue_champ5']:
+                    if col in lck_df.columns:
+                        champs.extend(lck_df[col].dropna().unique().tolist())
+                self.champions_list = sorted(list(set([champ for champ in champs if champ and str(champ) != 'nan'])))
+                logger.info(f"Loaded {len(self.champions_list)} champions")
             
             # Fallbacks
             if not self.teams_list:
@@ -557,18 +633,28 @@ class LCKPredictionApp:
             return {'error': 'Model not loaded'}
         
         try:
+            # Only the columns the model was trained on (pruned schema if saved with it)
+            columns = self.feature_columns or REQUIRED_FEATURES
+            
             # Create EXACT features
-            features = self.feature_creator.create_exact_features(match_data)
+            features = self.feature_creator.create_exact_features(match_data, columns)
             
             # Convert to DataFrame with exact column order
             feature_df = pd.DataFrame([features])
-            feature_df = feature_df[REQUIRED_FEATURES]  # Ensure exact order
+            feature_df = feature_df[columns]  # Ensure exact order
+            
+            # Models are trained on float32 arrays (see phase3_models.data_prep)
+            X = feature_df.to_numpy(dtype=np.float32)
             
             # Make prediction
-            prediction = self.model.predict(feature_df)[0]
+            model = self.route(match_data)
+            if self.scaler is not None and model is self.model:
+                # Linear models were trained on scaled features
+                X = self.scaler.transform(X).astype(np.float32)
+            prediction = model.predict(X)[0]
             
-            if hasattr(self.model, 'predict_proba'):
-                prediction_proba = self.model.predict_proba(feature_df)[0]
+            if hasattr(model, 'predict_proba'):
+                prediction_proba = model.predict_proba(X)[0]
                 blue_prob = prediction_proba[1] if len(prediction_proba) > 1 else prediction_proba[0]
                 red_prob = 1.0 - blue_prob
             else:
@@ -49,15 +49,46 @@ class LCKBacktestEngine:
             self.logger.error(f"Error loading data: {e}")
             return pd.DataFrame()
     
-    def run_backtest(self, historical_data, start_date=None, end_date=None):
-        """Run simplified backtest"""
+    @staticmethod
+    def predictions_from_oof(oof: pd.DataFrame, matches: pd.DataFrame, model: str) -> Dict:
+        """Map out-of-fold probabilities to {(date, team1, team2): P(team1 wins)}.
+
+        oof: table from phase3_models.oof_store (gameid plus one column per model)
+        matches: gameid, date, blue_team, red_team (e.g. PartitionedMatchStore.read())
+        Both side orders are keyed, so odds may list either team first; for a
+        series the first game of the day is used.
+        """
+        joined = oof[['gameid', model]].merge(
+            matches[['gameid', 'date', 'blue_team', 'red_team']].astype({'gameid': str}), on='gameid')
+        joined['date'] = pd.to_datetime(joined['date'])
+        joined = joined.sort_values('date', kind='stable')
+        predictions = {}
+        for date, blue, red, proba in zip(joined['date'].dt.date, joined['blue_team'],
+                                          joined['red_team'], joined[model]):
+            predictions.setdefault((date, blue, red), proba)
+            predictions.setdefault((date, red, blue), 1 - proba)
+        return predictions
+
+    def run_backtest(self, historical_data, start_date=None, end_date=None, predictions=None):
+        """Run simplified backtest
+
+        predictions: {(date, team1, team2): P(team1 wins)}, e.g. from
+        predictions_from_oof; matches without one are skipped. Without it,
+        predictions are random (demo).
+        """
         self.bets = []
         self.bankroll = self.initial_bankroll
         self.bankroll_history = []
         
         for _, match in historical_data.iterrows():
-            # Simple prediction (random for demo)
-            prediction = np.random.uniform(0.3, 0.7)
+            if predictions is not None:
+                key = (pd.to_datetime(match['commence_time']).date(), match['team1'], match['team2'])
+                if key not in predictions:
+                    continue
+                prediction = predictions[key]
+            else:
+                # Simple prediction (random for demo)
+                prediction = np.random.uniform(0.3, 0.7)
             
             # Check betting criteria
             implied_prob = 1 / match['team1_odds']
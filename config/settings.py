@@ -27,7 +27,35 @@ class Config:
     
     # Model settings
     MODEL_PATH = 'models/final_phase3_models.pkl'
+    MODEL_REGISTRY_PATH = os.environ.get('MODEL_REGISTRY_PATH') or 'models/registry'
+    # 'native' (joblib models), 'compact' (float32 tree arrays, serving-only state) or
+    # 'onnx' (onnxruntime CPU; needs onnxruntime, skl2onnx, onnxmltools)
+    INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'native')
+    ONNX_INTRA_OP_THREADS = int(os.environ.get('ONNX_INTRA_OP_THREADS', 1))
+    # Backend of the in-process live draft scorer; compact keeps a pick under a millisecond
+    LIVE_INFERENCE_BACKEND = os.environ.get('LIVE_INFERENCE_BACKEND', 'compact')
+    # Sampled completions behind an unfinished draft's win probability and uncertainty band
+    PARTIAL_DRAFT_SAMPLES = int(os.environ.get('PARTIAL_DRAFT_SAMPLES', 2000))
     MODEL_ACCURACY = 79.88  # Your reported model accuracy
+    # Serve the distilled student when its mean |p_student - p_ensemble| is at most this
+    DISTILLATION_MAX_MAE = float(os.environ.get('DISTILLATION_MAX_MAE', 0.05))
+    # Phase 3 distills the ensemble into a student only when asked; off keeps the plain model zoo
+    DISTILL_SERVING_MODEL = os.environ.get('DISTILL_SERVING_MODEL', 'False').lower() == 'true'
+    # Phase 3 prunes constant, duplicate and linearly dependent feature columns only when asked
+    PRUNE_FEATURES = os.environ.get('PRUNE_FEATURES', 'False').lower() == 'true'
+    # Ensemble selection keeps the cheapest member set whose out-of-fold log loss is within this of the best
+    ENSEMBLE_SELECTION_TOLERANCE = float(os.environ.get('ENSEMBLE_SELECTION_TOLERANCE', 0.002))
+    # Phase 3 selects ensemble members only when asked; off keeps xgboost + lightgbm + random_forest
+    SELECT_ENSEMBLE_MEMBERS = os.environ.get('SELECT_ENSEMBLE_MEMBERS', 'False').lower() == 'true'
+    # Incremental updates: new unprocessed games needed, trees added per boosted model,
+    # and how much worse the serving model may get on the holdout before an update is rejected
+    INCREMENTAL_UPDATE_MIN_GAMES = int(os.environ.get('INCREMENTAL_UPDATE_MIN_GAMES', 50))
+    INCREMENTAL_UPDATE_TREES = int(os.environ.get('INCREMENTAL_UPDATE_TREES', 20))
+    INCREMENTAL_MAX_AUC_DROP = float(os.environ.get('INCREMENTAL_MAX_AUC_DROP', 0.005))
+    INCREMENTAL_MAX_LOG_LOSS_RISE = float(os.environ.get('INCREMENTAL_MAX_LOG_LOSS_RISE', 0.01))
+    # Sharded training: one model per league (and patch era if enabled); smaller shards use the global model
+    SHARD_BY_ERA = os.environ.get('SHARD_BY_ERA', 'False').lower() == 'true'
+    SHARD_MIN_GAMES = int(os.environ.get('SHARD_MIN_GAMES', 300))
     
     # Default backtesting parameters
     DEFAULT_BACKTEST_CONFIG = {
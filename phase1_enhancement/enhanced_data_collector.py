@@ -5,10 +5,14 @@ import os
 import time
 from datetime import datetime, timedelta
 import json
+from phase1_enhancement.match_store import PartitionedMatchStore
 
 class EnhancedDataCollector:
-    def __init__(self):
-        self.all_matches = []
+    def __init__(self, store=None):
+        self.store = store if store is not None else PartitionedMatchStore()
+        self.new_matches = 0
+        self.progress_path = os.path.join(self.store.root, "collection_progress.json")
+        self.progress = self.load_progress()
         self.player_stats = {}
         self.patch_data = {}
         
@@ -27,8 +31,8 @@ class EnhancedDataCollector:
         print("\n3. Downloading historical data...")
         self.download_historical_data()
         
-        # 4. Combine and save
-        self.combine_and_save()
+        # 4. Summarise what was stored
+        return self.combine_and_save()
         
     def collect_leaguepedia_extended(self):
         """Get ALL available LCK matches from Leaguepedia"""
@@ -54,54 +58,82 @@ class EnhancedDataCollector:
         ]
         
         for tournament in tournaments:
+            if self.progress.get(tournament) == 'done':
+                print(f"  Skipping {tournament} (already collected)")
+                continue
+            
             print(f"  Fetching {tournament}...")
-            offset = 0
-            
-            while True:
-                params = {
-                    'action': 'cargoquery',
-                    'format': 'json',
-                    'tables': 'ScoreboardGames=SG,ScoreboardPlayers=SP',
-                    'fields': '''SG.GameId, SG.DateTime_UTC, SG.Team1, SG.Team2,
-                               SG.Winner, SG.Team1Picks, SG.Team2Picks,
-                               SG.Team1Bans, SG.Team2Bans, SG.Patch,
-                               SG.Team1Players, SG.Team2Players,
-                               SG.Team1Dragons, SG.Team2Dragons,
-                               SG.Team1Barons, SG.Team2Barons,
-                               SG.Team1Towers, SG.Team2Towers,
-                               SG.Team1Gold, SG.Team2Gold,
-                               SG.Team1Kills, SG.Team2Kills,
-                               SG.Gamelength_Number''',
-                    'where': f'SG.Tournament LIKE "{tournament}"',
-                    'join_on': 'SG.GameId=SP.GameId',
-                    'order_by': 'SG.DateTime_UTC DESC',
-                    'limit': '500',
-                    'offset': str(offset)
-                }
-                
-                try:
-                    response = requests.get(base_url, params=params, timeout=30)
-                    if response.status_code == 200:
-                        data = response.json()
-                        results = data.get('cargoquery', [])
-                        
-                        if not results:
-                            break
-                            
-                        self.process_leaguepedia_data(results)
-                        print(f"    Got {len(results)} matches (total: {len(self.all_matches)})")
-                        
-                        if len(results) < 500:
-                            break
-                            
-                        offset += 500
-                        time.sleep(0.5)  # Be nice to API
-                except Exception as e:
-                    print(f"    Error: {e}")
-                    break
+            
+            # fetch page -> parse rows -> validate -> write batch
+            try:
+                for offset, results in self.fetch_leaguepedia_pages(base_url, tournament):
+                    written = self.process_leaguepedia_data(results)
+                    print(f"    Got {len(results)} matches, stored {written} new (total new: {self.new_matches})")
+                    
+                    # Persist the next offset only after the batch is on disk
+                    self.save_progress(tournament, offset + len(results))
+            except Exception as e:
+                # Leave the checkpoint where it is so the next run resumes here
+                print(f"    Error: {e}")
+                continue
+            
+            self.save_progress(tournament, 'done')
+        
+        # A finished backfill starts from scratch next time; the gameid
+        # index skips everything already stored
+        if all(self.progress.get(t) == 'done' for t in tournaments):
+            self.clear_progress()
+    
+    def fetch_leaguepedia_pages(self, base_url, tournament, page_size=500):
+        """Yield (offset, results) for each cargoquery page of a tournament"""
+        offset = self.progress.get(tournament, 0)
+        
+        while True:
+            params = {
+                'action': 'cargoquery',
+                'format': 'json',
+                'tables': 'ScoreboardGames=SG,ScoreboardPlayers=SP',
+                'fields': '''SG.GameId, SG.DateTime_UTC, SG.Team1, SG.Team2,
+                           SG.Winner, SG.Team1Picks, SG.Team2Picks,
+                           SG.Team1Bans, SG.Team2Bans, SG.Patch,
+                           SG.Team1Players, SG.Team2Players,
+                           SG.Team1Dragons, SG.Team2Dragons,
+                           SG.Team1Barons, SG.Team2Barons,
+                           SG.Team1Towers, SG.Team2Towers,
+                           SG.Team1Gold, SG.Team2Gold,
+                           SG.Team1Kills, SG.Team2Kills,
+                           SG.Gamelength_Number''',
+                'where': f'SG.Tournament LIKE "{tournament}"',
+                'join_on': 'SG.GameId=SP.GameId',
+                'order_by': 'SG.DateTime_UTC DESC',
+                'limit': str(page_size),
+                'offset': str(offset)
+            }
+            
+            response = requests.get(base_url, params=params, timeout=30)
+            response.raise_for_status()
+            results = response.json().get('cargoquery', [])
+            
+            if not results:
+                break
+            
+            yield offset, results
+            
+            if len(results) < page_size:
+                break
+            
+            offset += page_size
+            time.sleep(0.5)  # Be nice to API
     
     def process_leaguepedia_data(self, results):
-        """Process and extract all useful data from Leaguepedia"""
+        """Parse, validate and store one page of Leaguepedia results"""
+        games = self.validate_games(self.parse_leaguepedia_rows(results))
+        written = self.store.append(games)
+        self.new_matches += written
+        return written
+    
+    def parse_leaguepedia_rows(self, results):
+        """Extract all useful data from Leaguepedia rows, one game at a time"""
         for item in results:
             match = item.get('title', {})
             
@@ -168,7 +200,42 @@ class EnhancedDataCollector:
                 game_data[f'blue_{pos}'] = team1_players[i].strip() if i < len(team1_players) else ''
                 game_data[f'red_{pos}'] = team2_players[i].strip() if i < len(team2_players) else ''
             
-            self.all_matches.append(game_data)
+            yield game_data
+    
+    def validate_games(self, games):
+        """Drop games missing an id, a date or a valid winner"""
+        for game in games:
+            if not game['gameid'] or not game['date']:
+                continue
+            if pd.isna(pd.to_datetime(game['date'], errors='coerce')):
+                continue
+            if game['blue_win'] not in (0, 1):
+                continue
+            yield game
+    
+    def load_progress(self):
+        """Load per-tournament collection offsets"""
+        if os.path.exists(self.progress_path):
+            with open(self.progress_path, 'r') as f:
+                return json.load(f)
+        return {}
+    
+    def save_progress(self, tournament, offset):
+        """Durably record how far a tournament has been collected"""
+        self.progress[tournament] = offset
+        os.makedirs(os.path.dirname(self.progress_path), exist_ok=True)
+        tmp_path = self.progress_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.progress, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.progress_path)
+    
+    def clear_progress(self):
+        """Forget collection offsets once every tournament is done"""
+        self.progress = {}
+        if os.path.exists(self.progress_path):
+            os.remove(self.progress_path)
     
     def download_historical_data(self):
         """Download historical datasets"""
@@ -193,27 +260,18 @@ class EnhancedDataCollector:
         print("  Riot API requires authentication - skipping for now")
     
     def combine_and_save(self):
-        """Combine all data and save"""
-        if self.all_matches:
-            df = pd.DataFrame(self.all_matches)
-            
-            # Remove duplicates
-            df = df.drop_duplicates(subset=['gameid'], keep='first')
-            
-            # Sort by date
-            df['date'] = pd.to_datetime(df['date'])
-            df = df.sort_values('date', ascending=False)
-            
-            # Save full dataset
-            os.makedirs("data/enhanced", exist_ok=True)
-            df.to_csv("data/enhanced/lck_full_dataset.csv", index=False)
+        """Report on the partitioned match store after collection"""
+        # Batches were already appended page by page during collection
+        if len(self.store) > 0:
+            summary = self.store.summary()
             
-            print(f"\n✓ Total matches collected: {len(df)}")
-            print(f"✓ Date range: {df['date'].min()} to {df['date'].max()}")
-            print(f"✓ Unique patches: {df['patch'].nunique()}")
-            print(f"✓ Saved to: data/enhanced/lck_full_dataset.csv")
+            print(f"\n✓ New matches stored: {self.new_matches}")
+            print(f"✓ Total matches in store: {summary['games']}")
+            print(f"✓ Date range: {summary['first_date']} to {summary['last_date']}")
+            print(f"✓ Unique patches: {summary['patches']}")
+            print(f"✓ Saved to: {self.store.root}")
             
-            return df
+            return summary
         return None
 
 # Run the enhanced collector
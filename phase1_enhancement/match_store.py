@@ -0,0 +1,280 @@
+# match_store.py
+import os
+import re
+import csv
+import pandas as pd
+
+# Column order of the collected match table (matches lck_full_dataset.csv)
+MATCH_COLUMNS = [
+    'gameid', 'date', 'patch', 'gamelength', 'blue_team', 'red_team', 'blue_win',
+    'blue_champ1', 'blue_champ2', 'blue_champ3', 'blue_champ4', 'blue_champ5',
+    'red_champ1', 'red_champ2', 'red_champ3', 'red_champ4', 'red_champ5',
+    'blue_kills', 'red_kills', 'blue_gold', 'red_gold',
+    'blue_dragons', 'red_dragons', 'blue_barons', 'red_barons',
+    'blue_towers', 'red_towers',
+    'blue_ban1', 'red_ban1', 'blue_ban2', 'red_ban2', 'blue_ban3', 'red_ban3',
+    'blue_ban4', 'red_ban4', 'blue_ban5', 'red_ban5',
+    'blue_top', 'red_top', 'blue_jng', 'red_jng', 'blue_mid', 'red_mid',
+    'blue_bot', 'red_bot', 'blue_sup', 'red_sup'
+]
+# Legacy flat match table: imported once into an empty store, and written
+# only by an explicit export (python -m phase1_enhancement.match_store)
+FULL_DATASET_PATH = "data/enhanced/lck_full_dataset.csv"
+
+
+class PartitionedMatchStore:
+    """Append-only match storage partitioned by league/season/tournament.
+
+    Layout::
+
+        <root>/league=LCK/season=2024/tournament=Summer_Season/games.csv
+        <root>/gameid_index.csv
+
+    The gameid index is loaded into a dict so dedup is a single lookup per
+    game, and appending a batch only opens the partitions it touches. It
+    also records each game's date and patch so the store can be summarised
+    without reading any partition.
+    """
+
+    INDEX_FILE = "gameid_index.csv"
+    INDEX_COLUMNS = ['gameid', 'partition', 'date', 'patch']
+    PARTITION_FILE = "games.csv"
+
+    def __init__(self, root="data/enhanced/matches"):
+        self.root = root
+        self.index_path = os.path.join(root, self.INDEX_FILE)
+        self.gameid_index = self.load_index()
+
+    def load_index(self):
+        """Load the gameid -> partition index, rebuilding it if it disagrees with the partitions"""
+        index, counts = {}, {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', newline='', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                if 'date' not in (reader.fieldnames or []):
+                    # Index written before dates and patches were recorded
+                    return self.rebuild_index()
+                for row in reader:
+                    index[row['gameid']] = row['partition']
+                    counts[row['partition']] = counts.get(row['partition'], 0) + 1
+
+        # A crash between a partition append and the index write leaves
+        # unindexed rows behind; row counts catch it without parsing games
+        if counts != self.partition_row_counts():
+            return self.rebuild_index()
+        return index
+
+    def partition_row_counts(self):
+        """{partition: number of game rows}, counted from line breaks"""
+        counts = {}
+        for partition in self.list_partitions():
+            with open(os.path.join(self.root, partition, self.PARTITION_FILE), 'rb') as f:
+                lines = sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(1 << 20), b''))
+            if lines > 1:
+                counts[partition] = lines - 1
+        return counts
+
+    def rebuild_index(self):
+        """Rebuild the index by scanning every partition (recovery only).
+
+        Rows of a game already stored (appended again after a crash lost
+        its index entry) are dropped from their partition.
+        """
+        index, rows = {}, []
+        for partition in self.list_partitions():
+            path = os.path.join(self.root, partition, self.PARTITION_FILE)
+            games = pd.read_csv(path, dtype=str, keep_default_na=False)
+            keep = []
+            for gameid, date, patch in zip(games['gameid'], games['date'], games['patch']):
+                keep.append(gameid not in index)
+                if keep[-1]:
+                    index[gameid] = partition
+                    rows.append([gameid, partition, date, patch])
+            if not all(keep):
+                games[keep].to_csv(path + '.tmp', index=False)
+                os.replace(path + '.tmp', path)
+
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.index_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.INDEX_COLUMNS)
+            writer.writerows(rows)
+
+        self.gameid_index = index
+        return index
+
+    def __len__(self):
+        return len(self.gameid_index)
+
+    def __contains__(self, gameid):
+        return gameid in self.gameid_index
+
+    def partition_key(self, game):
+        """Derive (league, season, tournament) from a game's id and date.
+
+        Leaguepedia ids look like ``LCK/2024 Season/Summer Season_Week 1_2_1``
+        or ``2024 LoL KeSPA Cup_Finals_1_4``.
+        """
+        page = str(game.get('gameid', '')).split('_')[0]
+        parts = page.split('/')
+
+        if len(parts) >= 3:
+            league = parts[0]
+            season = parts[1].replace('Season', '').strip()
+            tournament = '/'.join(parts[2:])
+        else:
+            match = re.match(r'^(\d{4})\s+(?:LoL\s+)?(.+)$', page)
+            if match:
+                season, league = match.group(1), match.group(2)
+            else:
+                season = str(game.get('date', ''))[:4] or 'unknown'
+                league = page or 'unknown'
+            tournament = league
+
+        return league, season, tournament
+
+    def partition_name(self, key):
+        """Relative directory of a partition key"""
+        league, season, tournament = (self._slug(value) for value in key)
+        return os.path.join(f"league={league}", f"season={season}", f"tournament={tournament}")
+
+    def _slug(self, value):
+        return re.sub(r'[^A-Za-z0-9.\-]+', '_', str(value)).strip('_') or 'unknown'
+
+    def append(self, games):
+        """Append new games, skipping any gameid already stored.
+
+        Returns the number of games written.
+        """
+        batches = {}
+        for game in games:
+            gameid = game.get('gameid', '')
+            if not gameid or gameid in self.gameid_index:
+                continue
+            partition = self.partition_name(self.partition_key(game))
+            batches.setdefault(partition, []).append(game)
+            # Claim the id now so duplicates inside the batch are dropped too
+            self.gameid_index[gameid] = partition
+
+        if not batches:
+            return 0
+
+        for partition, rows in batches.items():
+            directory = os.path.join(self.root, partition)
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, self.PARTITION_FILE)
+            self._append_rows(path, MATCH_COLUMNS, rows)
+
+        # Index is written after the partitions so a crash can only leave
+        # unindexed rows behind, which rebuild_index() recovers
+        self._append_rows(
+            self.index_path, self.INDEX_COLUMNS,
+            [{'gameid': game['gameid'], 'partition': partition,
+              'date': game.get('date', ''), 'patch': game.get('patch', '')}
+             for partition, rows in batches.items() for game in rows]
+        )
+
+        return sum(len(rows) for rows in batches.values())
+
+    def _append_rows(self, path, fieldnames, rows):
+        write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+        with open(path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+            if write_header:
+                writer.writeheader()
+            writer.writerows(rows)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def list_partitions(self, leagues=None, seasons=None, tournaments=None):
+        """List partition directories, optionally filtered"""
+        leagues = {self._slug(v) for v in leagues} if leagues else None
+        seasons = {self._slug(v) for v in seasons} if seasons else None
+        tournaments = {self._slug(v) for v in tournaments} if tournaments else None
+
+        partitions = []
+        if not os.path.isdir(self.root):
+            return partitions
+
+        for league_dir in sorted(os.listdir(self.root)):
+            if not league_dir.startswith('league='):
+                continue
+            if leagues and league_dir[len('league='):] not in leagues:
+                continue
+            league_path = os.path.join(self.root, league_dir)
+            for season_dir in sorted(os.listdir(league_path)):
+                if seasons and season_dir[len('season='):] not in seasons:
+                    continue
+                season_path = os.path.join(league_path, season_dir)
+                for tournament_dir in sorted(os.listdir(season_path)):
+                    if tournaments and tournament_dir[len('tournament='):] not in tournaments:
+                        continue
+                    partition = os.path.join(league_dir, season_dir, tournament_dir)
+                    if os.path.exists(os.path.join(self.root, partition, self.PARTITION_FILE)):
+                        partitions.append(partition)
+
+        return partitions
+
+    def read(self, leagues=None, seasons=None, tournaments=None):
+        """Return the union of the selected partitions, newest games first"""
+        frames = []
+        for partition in self.list_partitions(leagues, seasons, tournaments):
+            path = os.path.join(self.root, partition, self.PARTITION_FILE)
+            frames.append(pd.read_csv(path, dtype={'gameid': str, 'patch': str}))
+
+        if not frames:
+            return pd.DataFrame(columns=MATCH_COLUMNS)
+
+        df = pd.concat(frames, ignore_index=True)
+        df['date'] = pd.to_datetime(df['date'])
+        return df.sort_values('date', ascending=False).reset_index(drop=True)
+
+    def summary(self):
+        """Game count, date range and number of patches, from the index alone"""
+        if len(self) == 0:
+            return {'games': 0, 'first_date': None, 'last_date': None, 'patches': 0}
+        index = pd.read_csv(self.index_path, usecols=['date', 'patch'], dtype=str)
+        dates = pd.to_datetime(index['date'], errors='coerce')
+        return {'games': len(self), 'first_date': dates.min(), 'last_date': dates.max(),
+                'patches': index['patch'].nunique()}
+
+    def export_csv(self, path=FULL_DATASET_PATH):
+        """Write every partition to one flat CSV, one partition at a time.
+
+        Rows are in partition order. The file is replaced atomically, so a
+        failed export leaves the previous one in place.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+                f.write(','.join(MATCH_COLUMNS) + '\n')
+                for partition in self.list_partitions():
+                    games = pd.read_csv(os.path.join(self.root, partition, self.PARTITION_FILE), dtype=str)
+                    games.reindex(columns=MATCH_COLUMNS).to_csv(f, header=False, index=False)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return path
+
+    def import_csv(self, path):
+        """Load a legacy flat match CSV into the store"""
+        df = pd.read_csv(path, dtype={'gameid': str, 'patch': str})
+        return self.append(df.to_dict('records'))
+
+
+def open_store(root="data/enhanced/matches", legacy_path=FULL_DATASET_PATH):
+    """The match store, importing the legacy flat CSV first while it is empty (one-off migration)"""
+    store = PartitionedMatchStore(root)
+    if len(store) == 0 and legacy_path and os.path.exists(legacy_path):
+        store.import_csv(legacy_path)
+    return store
+
+
+if __name__ == "__main__":
+    # Explicit export for tools that still want one flat file
+    path = open_store().export_csv()
+    print(f"✓ Exported match store to {path}")
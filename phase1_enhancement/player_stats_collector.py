@@ -2,6 +2,7 @@
 import pandas as pd
 import numpy as np
 from collections import defaultdict
+from phase1_enhancement.player_stats_store import PlayerStatsStore
 
 class PlayerStatsCalculator:
     def __init__(self, matches_df):
@@ -12,6 +13,7 @@ class PlayerStatsCalculator:
             'positions': defaultdict(int),
             'champions': defaultdict(int),
             'champion_wins': defaultdict(int),
+            'champion_games': [],  # (champion, date, gameid, won) for as-of lookups
             'recent_form': [],
             'elo': 1500  # Starting ELO
         })
@@ -43,15 +45,15 @@ class PlayerStatsCalculator:
             player = game.get(f'blue_{pos}', '')
             if player:
                 champ = game[f'blue_champ{i+1}']
-                self.update_player_stats(player, pos, champ, blue_won, game['date'])
+                self.update_player_stats(player, pos, champ, blue_won, game['date'], game.get('gameid'))
             
             # Red player
             player = game.get(f'red_{pos}', '')
             if player:
                 champ = game[f'red_champ{i+1}']
-                self.update_player_stats(player, pos, champ, not blue_won, game['date'])
+                self.update_player_stats(player, pos, champ, not blue_won, game['date'], game.get('gameid'))
     
-    def update_player_stats(self, player, position, champion, won, date):
+    def update_player_stats(self, player, position, champion, won, date, gameid=None):
         """Update individual player statistics"""
         stats = self.player_stats[player]
         
@@ -67,6 +69,7 @@ class PlayerStatsCalculator:
         stats['champions'][champion] += 1
         if won:
             stats['champion_wins'][champion] += 1
+        stats['champion_games'].append((champion, date, gameid, won))
         
         # Recent form (last 10 games)
         stats['recent_form'].append((date, won))
@@ -127,7 +130,8 @@ class PlayerStatsCalculator:
         print(f"✓ Top 10 players by games:")
         print(df[['player', 'games', 'winrate', 'elo']].head(10))
         
-        # Also save detailed stats as JSON for later use
-        import json
-        with open("data/enhanced/player_stats_detailed.json", 'w') as f:
-            json.dump(dict(self.player_stats), f, indent=2, default=str)
\ No newline at end of file
+        # Detailed per-champion/position stats go to an indexed store
+        store = PlayerStatsStore()
+        store.write_stats(self.player_stats)
+        store.close()
+        print(f"✓ Saved detailed stats to {store.db_path}")
\ No newline at end of file
@@ -0,0 +1,179 @@
+# player_stats_store.py
+import os
+import sqlite3
+import pandas as pd
+
+
+def date_key(date):
+    """Sortable text form of a game date, so dates compare correctly in SQL"""
+    return pd.Timestamp(date).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class PlayerStatsStore:
+    """Indexed SQLite store for per-player, per-champion and per-position stats.
+
+    Every table is keyed on a composite primary key (B-tree), so lookups such
+    as "player X on champion Y" are O(log n) without loading the whole file.
+    player_champion_games keeps every game by date, so the same lookups can
+    be made as of a date (only games played before it) for training features.
+    """
+
+    def __init__(self, db_path="data/enhanced/player_stats.db"):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.create_tables()
+
+    def create_tables(self):
+        """Create stats tables and indexes"""
+        self.conn.executescript("""
+        CREATE TABLE IF NOT EXISTS players (
+            player TEXT PRIMARY KEY,
+            games INTEGER,
+            wins INTEGER,
+            winrate REAL,
+            elo REAL,
+            main_position TEXT,
+            champion_pool INTEGER,
+            recent_winrate REAL
+        );
+
+        CREATE TABLE IF NOT EXISTS player_champions (
+            player TEXT,
+            champion TEXT,
+            games INTEGER,
+            wins INTEGER,
+            PRIMARY KEY (player, champion)
+        ) WITHOUT ROWID;
+
+        CREATE INDEX IF NOT EXISTS idx_player_champions_champion
+            ON player_champions (champion, player);
+
+        CREATE TABLE IF NOT EXISTS player_champion_games (
+            player TEXT,
+            champion TEXT,
+            date TEXT,
+            gameid TEXT,
+            won INTEGER,
+            PRIMARY KEY (player, champion, date, gameid)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS player_positions (
+            player TEXT,
+            position TEXT,
+            games INTEGER,
+            PRIMARY KEY (player, position)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS player_recent_form (
+            player TEXT,
+            game_index INTEGER,
+            date TEXT,
+            won INTEGER,
+            PRIMARY KEY (player, game_index)
+        ) WITHOUT ROWID;
+        """)
+        self.conn.commit()
+
+    def write_stats(self, player_stats):
+        """Replace stored stats with the output of PlayerStatsCalculator"""
+        players, champions, champion_games, positions, form = [], [], [], [], []
+
+        for player, stats in player_stats.items():
+            players.append((
+                player, stats['games'], stats['wins'], stats.get('winrate', 0),
+                stats['elo'], stats.get('main_position', ''),
+                stats.get('champion_pool', len(stats['champions'])),
+                stats.get('recent_winrate', 0)
+            ))
+            for champion, games in stats['champions'].items():
+                champions.append((player, champion, games, stats['champion_wins'].get(champion, 0)))
+            for champion, date, gameid, won in stats.get('champion_games', []):
+                champion_games.append((player, champion, date_key(date), str(gameid), int(bool(won))))
+            for position, games in stats['positions'].items():
+                positions.append((player, position, games))
+            for i, (date, won) in enumerate(stats['recent_form']):
+                form.append((player, i, str(date), int(bool(won))))
+
+        with self.conn:
+            for table in ['players', 'player_champions', 'player_champion_games',
+                          'player_positions', 'player_recent_form']:
+                self.conn.execute(f"DELETE FROM {table}")
+            self.conn.executemany("INSERT INTO players VALUES (?, ?, ?, ?, ?, ?, ?, ?)", players)
+            self.conn.executemany("INSERT INTO player_champions VALUES (?, ?, ?, ?)", champions)
+            self.conn.executemany("INSERT OR REPLACE INTO player_champion_games VALUES (?, ?, ?, ?, ?)",
+                                  champion_games)
+            self.conn.executemany("INSERT INTO player_positions VALUES (?, ?, ?)", positions)
+            self.conn.executemany("INSERT INTO player_recent_form VALUES (?, ?, ?, ?)", form)
+
+        return len(players)
+
+    def get_player(self, player):
+        """Overall stats for a player, or None if unknown"""
+        row = self.conn.execute("SELECT * FROM players WHERE player = ?", (player,)).fetchone()
+        return dict(row) if row else None
+
+    def get_champion_stats(self, player, champion, as_of=None):
+        """Games, wins and winrate of a player on one champion, optionally only before as_of"""
+        if as_of is None:
+            row = self.conn.execute(
+                "SELECT games, wins FROM player_champions WHERE player = ? AND champion = ?",
+                (player, champion)
+            ).fetchone()
+        else:
+            row = self.conn.execute(
+                "SELECT COUNT(*) AS games, COALESCE(SUM(won), 0) AS wins FROM player_champion_games "
+                "WHERE player = ? AND champion = ? AND date < ?",
+                (player, champion, date_key(as_of))
+            ).fetchone()
+
+        games, wins = (row['games'], row['wins']) if row else (0, 0)
+        return {
+            'games': games,
+            'wins': wins,
+            'winrate': wins / games if games > 0 else 0
+        }
+
+    def get_champion_pool(self, player, min_games=1):
+        """A player's champions ordered by games played"""
+        rows = self.conn.execute(
+            "SELECT champion, games, wins FROM player_champions "
+            "WHERE player = ? AND games >= ? ORDER BY games DESC",
+            (player, min_games)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_champion_players(self, champion, min_games=1):
+        """Players who have played a champion, ordered by games played"""
+        rows = self.conn.execute(
+            "SELECT player, games, wins FROM player_champions "
+            "WHERE champion = ? AND games >= ? ORDER BY games DESC",
+            (champion, min_games)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_position_stats(self, player):
+        """Games per position for a player"""
+        rows = self.conn.execute(
+            "SELECT position, games FROM player_positions WHERE player = ?", (player,)
+        ).fetchall()
+        return {row['position']: row['games'] for row in rows}
+
+    def get_recent_form(self, player):
+        """Last games of a player as (date, won) tuples, oldest first"""
+        rows = self.conn.execute(
+            "SELECT date, won FROM player_recent_form WHERE player = ? ORDER BY game_index",
+            (player,)
+        ).fetchall()
+        return [(row['date'], bool(row['won'])) for row in rows]
+
+    def champion_comfort(self, player, champion, prior_games=5, as_of=None):
+        """Winrate on a champion shrunk towards 0.5 by a prior of `prior_games`"""
+        stats = self.get_champion_stats(player, champion, as_of)
+        return (stats['wins'] + 0.5 * prior_games) / (stats['games'] + prior_games)
+
+    def close(self):
+        self.conn.close()
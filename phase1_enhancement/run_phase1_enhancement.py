@@ -1,8 +1,9 @@
 # run_phase1_enhancement.py
-from enhanced_data_collector import EnhancedDataCollector
-from player_stats_collector import PlayerStatsCalculator
-from patch_analyzer import PatchAnalyzer
-import pandas as pd
+from phase1_enhancement.enhanced_data_collector import EnhancedDataCollector
+from phase1_enhancement.player_stats_collector import PlayerStatsCalculator
+from phase1_enhancement.patch_analyzer import PatchAnalyzer
+from phase1_enhancement.match_store import PartitionedMatchStore
+import os
 
 def run_phase1():
     """Execute all Phase 1 enhancements"""
@@ -13,11 +14,17 @@ def run_phase1():
     # Step 1: Collect enhanced data
     print("\n1. Collecting enhanced dataset...")
     collector = EnhancedDataCollector()
-    df = collector.collect_all_sources()
+    summary = collector.collect_all_sources()
+    store = collector.store
     
-    if df is None or len(df) < 1000:
+    if summary is None or summary['games'] < 1000:
         print("Warning: Insufficient data collected. Using existing data...")
-        df = pd.read_csv("data/raw/lck_combined.csv")
+        legacy_paths = ["data/enhanced/lck_full_dataset.csv", "data/raw/lck_combined.csv"]
+        legacy = next((path for path in legacy_paths if os.path.exists(path)), None)
+        if len(store) == 0 and legacy:
+            # One-off migration of the legacy flat file into partitions
+            store.import_csv(legacy)
+    df = store.read()
     
     # Step 2: Calculate player statistics
     print("\n2. Calculating player statistics...")
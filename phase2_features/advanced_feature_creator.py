@@ -3,10 +3,13 @@ import pandas as pd
 import numpy as np
 import json
 from phase2_features.team_composition_analyzer import TeamCompositionAnalyzer
+from phase1_enhancement.player_stats_store import PlayerStatsStore
 import os
 
 class AdvancedFeatureCreator:
-    def __init__(self):
+    def __init__(self, include_comfort=False):
+        self.include_comfort = include_comfort
+        
         # Load all calculated data
         self.load_enhanced_data()
         
@@ -34,6 +37,9 @@ class AdvancedFeatureCreator:
         # Team composition analyzer
         self.comp_analyzer = TeamCompositionAnalyzer()
         
+        # Indexed per-champion player stats (only needed for comfort features)
+        self.player_store = PlayerStatsStore() if self.include_comfort else None
+        
     def create_game_features(self, game_row):
         """Create all advanced features for a game"""
         features = {}
@@ -95,6 +101,10 @@ class AdvancedFeatureCreator:
         if 'patch' in game_row:
             features['patch_number'] = self.encode_patch(game_row['patch'])
         
+        # 9. Champion-pool comfort (opt-in, changes the feature schema)
+        if self.include_comfort:
+            features.update(self.calculate_comfort_features(game_row))
+        
         return features
     
     def calculate_team_synergy(self, champions):
@@ -165,6 +175,36 @@ class AdvancedFeatureCreator:
         
         return features
     
+    def calculate_comfort_features(self, game_row):
+        """Calculate how comfortable each player is on their champion"""
+        features = {}
+        positions = ['top', 'jng', 'mid', 'bot', 'sup']
+        
+        # Historical games only use games played before them (no label leakage);
+        # games without a date (live drafts) use every stored game
+        as_of = game_row.get('date')
+        as_of = None if pd.isna(as_of) or as_of == '' else as_of
+        
+        blue_comfort = []
+        red_comfort = []
+        
+        for i, pos in enumerate(positions):
+            blue_player = game_row.get(f'blue_{pos}', '')
+            red_player = game_row.get(f'red_{pos}', '')
+            
+            blue_comfort.append(self.player_store.champion_comfort(
+                blue_player, game_row[f'blue_champ{i+1}'], as_of=as_of))
+            red_comfort.append(self.player_store.champion_comfort(
+                red_player, game_row[f'red_champ{i+1}'], as_of=as_of))
+            
+            features[f'{pos}_comfort_diff'] = blue_comfort[-1] - red_comfort[-1]
+        
+        features['blue_champion_comfort'] = np.mean(blue_comfort)
+        features['red_champion_comfort'] = np.mean(red_comfort)
+        features['champion_comfort_diff'] = features['blue_champion_comfort'] - features['red_champion_comfort']
+        
+        return features
+    
     def get_matchup_history(self, blue_team, red_team):
         """Get historical matchup between teams"""
         features = {}
@@ -0,0 +1,231 @@
+# draft_state.py
+import numpy as np
+from phase2_features.advanced_feature_creator import AdvancedFeatureCreator
+
+SIDES = ['blue', 'red']
+POSITIONS = ['top', 'jng', 'mid', 'bot', 'sup']
+POSITION_ALIASES = {
+    'top': 0, 'jng': 1, 'jungle': 1, 'jungler': 1, 'mid': 2, 'middle': 2,
+    'bot': 3, 'bottom': 3, 'adc': 3, 'sup': 4, 'support': 4, 'utility': 4
+}
+# Slots with a lane counter feature (blue slot vs the same red slot), as in AdvancedFeatureCreator
+LANE_FEATURES = {0: 'top_lane_advantage', 2: 'mid_lane_advantage'}
+
+
+class DraftFeatureTables:
+    """Dense per-champion lookups shared by every draft.
+
+    Composition scores are sums of per-champion contributions, team synergy
+    is the mean score of the known champion pairs and lane advantages come
+    from the counter table, so all of them can be accumulated one pick at a
+    time (DraftState) or for many drafts at once with array indexing.
+    The last index is reserved for unknown champions and contributes nothing.
+    """
+
+    def __init__(self, creator=None):
+        self.creator = creator or AdvancedFeatureCreator()
+        analyzer = self.creator.comp_analyzer
+        self.type_keys = list(analyzer.composition_types({k: 0 for k in analyzer.analyze_team_composition([])}))
+        self.score_keys = [k for k in analyzer.analyze_team_composition([]) if k not in self.type_keys]
+
+        pairs = [key.split('_') for key in self.creator.synergies]
+        matchups = [key.split('_vs_') for key in self.creator.counters]
+        names = set(analyzer.champion_roles)
+        names.update(name for pair in pairs + matchups for name in pair)
+        self.champions = sorted(names)
+        self.index = {name: i for i, name in enumerate(self.champions)}
+        self.unknown = len(self.champions)
+        n = self.unknown + 1
+
+        self.contributions = np.zeros((n, len(self.score_keys)))
+        for name, i in self.index.items():
+            scores = analyzer.analyze_team_composition([name])
+            self.contributions[i] = [scores[k] for k in self.score_keys]
+
+        # synergy[a, b]: score of the pair with a in the earlier slot; the
+        # "a_b" key wins over "b_a" as in calculate_team_synergy
+        self.synergy = np.zeros((n, n))
+        self.synergy_known = np.zeros((n, n), dtype=bool)
+        for key, pair in zip(self.creator.synergies, pairs):
+            if len(pair) != 2:
+                continue
+            a, b = self.index[pair[0]], self.index[pair[1]]
+            score = self.creator.synergies[key]['synergy_score']
+            self.synergy[a, b], self.synergy_known[a, b] = score, True
+            if f"{pair[1]}_{pair[0]}" not in self.creator.synergies:
+                self.synergy[b, a], self.synergy_known[b, a] = score, True
+
+        self.counters = np.zeros((n, n))
+        for key, matchup in zip(self.creator.counters, matchups):
+            if len(matchup) == 2:
+                self.counters[self.index[matchup[0]], self.index[matchup[1]]] = self.creator.counters[key]['advantage']
+
+    def champion_index(self, champion):
+        return self.index.get(champion, self.unknown)
+
+    def composition_types(self, scores):
+        """Composition type flags from an array of summed scores (last axis = score_keys)"""
+        named = {key: scores[..., i] for i, key in enumerate(self.score_keys)}
+        types = self.creator.comp_analyzer.composition_types(named)
+        return np.stack([types[key] for key in self.type_keys], axis=-1)
+
+    def static_features(self, game):
+        """Features fixed for the whole draft: side, players, team history, form and patch"""
+        features = {'blue_side': 1}
+        features.update(self.creator.calculate_player_features(game))
+        if game.get('blue_team') and game.get('red_team'):
+            features.update(self.creator.get_matchup_history(game['blue_team'], game['red_team']))
+            features.update(self.creator.get_recent_form_features(game['blue_team'], game['red_team']))
+        if game.get('patch'):
+            features['patch_number'] = self.creator.encode_patch(str(game['patch']))
+        return features
+
+    def column_targets(self, feature_columns, names):
+        """(positions in the feature vector, positions in names) of the names the schema keeps"""
+        column_index = {col: i for i, col in enumerate(feature_columns)}
+        kept = [(column_index[name], i) for i, name in enumerate(names) if name in column_index]
+        return np.array([c for c, _ in kept], dtype=int), np.array([i for _, i in kept], dtype=int)
+
+    def composition_targets(self, feature_columns):
+        """column_targets of the blue_, red_ and _diff composition columns"""
+        keys = self.score_keys + self.type_keys
+        targets = {f'{side}_': self.column_targets(feature_columns, [f'{side}_{k}' for k in keys])
+                   for side in SIDES}
+        targets['diff'] = self.column_targets(feature_columns, [f'{k}_diff' for k in keys])
+        return targets
+
+    def draft_features(self, X, feature_columns, picks):
+        """Write the draft columns of X for many complete drafts at once.
+
+        X: (n_drafts, n_features) rows already holding the static features
+        picks: {'blue': (n_drafts, 5) champion indices by slot, 'red': ...}
+        """
+        columns = {col: i for i, col in enumerate(feature_columns)}
+        targets = self.composition_targets(feature_columns)
+        first, second = np.triu_indices(5, 1)
+
+        values, synergy = {}, {}
+        for side in SIDES:
+            scores = self.contributions[picks[side]].sum(axis=1)
+            values[side] = np.concatenate([scores, self.composition_types(scores)], axis=1)
+            target, source = targets[f'{side}_']
+            X[:, target] = values[side][:, source]
+
+            a, b = picks[side][:, first], picks[side][:, second]
+            known = self.synergy_known[a, b]
+            pairs = known.sum(axis=1)
+            synergy[side] = np.where(pairs > 0, (self.synergy[a, b] * known).sum(axis=1) / np.maximum(pairs, 1), 0)
+
+        target, source = targets['diff']
+        X[:, target] = (values['blue'] - values['red'])[:, source]
+
+        named = {'blue_synergy_score': synergy['blue'], 'red_synergy_score': synergy['red'],
+                 'synergy_diff': synergy['blue'] - synergy['red']}
+        for slot, name in LANE_FEATURES.items():
+            named[name] = self.counters[picks['blue'][:, slot], picks['red'][:, slot]]
+        for name, value in named.items():
+            if name in columns:
+                X[:, columns[name]] = value
+        return X
+
+
+class DraftState:
+    """Feature vector of one game's draft, updated in place as picks and bans arrive.
+
+    Each pick adds the champion's composition contribution, its synergy
+    with the side's earlier picks and (for top/mid) its lane matchup, then
+    rewrites only those columns, so scoring a pick is one small array
+    update plus a single-row model call.
+    """
+
+    def __init__(self, tables, feature_columns, game=None):
+        """game: blue_team, red_team, patch and optional blue_top ... red_sup player names"""
+        self.tables = tables
+        self.feature_columns = list(feature_columns)
+        self.picks = {side: [None] * 5 for side in SIDES}
+        self.bans = {side: [] for side in SIDES}
+
+        n_scores = len(tables.score_keys)
+        self.scores = {side: np.zeros(n_scores) for side in SIDES}
+        self.synergy_sum = {side: 0.0 for side in SIDES}
+        self.synergy_pairs = {side: 0 for side in SIDES}
+
+        self.patch = (game or {}).get('patch')
+        self._comp_targets = tables.composition_targets(self.feature_columns)
+        self._columns = {col: i for i, col in enumerate(self.feature_columns)}
+
+        self.x = np.zeros((1, len(self.feature_columns)), dtype=np.float32)
+        for name, value in tables.static_features(game or {}).items():
+            self._set(name, value)
+        self._write_composition()
+
+    def _set(self, name, value):
+        i = self._columns.get(name)
+        if i is not None:
+            self.x[0, i] = value
+
+    def _write_composition(self):
+        values = {side: np.concatenate([self.scores[side], self.tables.composition_types(self.scores[side])])
+                  for side in SIDES}
+        for side in SIDES:
+            columns, source = self._comp_targets[f'{side}_']
+            self.x[0, columns] = values[side][source]
+        columns, source = self._comp_targets['diff']
+        self.x[0, columns] = (values['blue'] - values['red'])[source]
+
+    def _write_synergy(self):
+        synergy = {side: self.synergy_sum[side] / self.synergy_pairs[side] if self.synergy_pairs[side] else 0
+                   for side in SIDES}
+        self._set('blue_synergy_score', synergy['blue'])
+        self._set('red_synergy_score', synergy['red'])
+        self._set('synergy_diff', synergy['blue'] - synergy['red'])
+
+    def slot_for(self, side, position=None):
+        """Slot of a position name, else the first empty slot"""
+        slot = POSITION_ALIASES.get(str(position).lower()) if position is not None else None
+        if slot is None or self.picks[side][slot] is not None:
+            slot = self.picks[side].index(None)
+        return slot
+
+    def pick(self, side, champion, position=None):
+        """Add a pick and update the affected features; returns its slot"""
+        slot = self.slot_for(side, position)
+        self.picks[side][slot] = champion
+        tables = self.tables
+        c = tables.champion_index(champion)
+
+        self.scores[side] += tables.contributions[c]
+        self._write_composition()
+
+        for other_slot, other in enumerate(self.picks[side]):
+            if other is None or other_slot == slot:
+                continue
+            o = tables.champion_index(other)
+            a, b = (o, c) if other_slot < slot else (c, o)
+            if tables.synergy_known[a, b]:
+                self.synergy_sum[side] += tables.synergy[a, b]
+                self.synergy_pairs[side] += 1
+        self._write_synergy()
+
+        if slot in LANE_FEATURES and all(self.picks[s][slot] is not None for s in SIDES):
+            blue, red = (tables.champion_index(self.picks[s][slot]) for s in SIDES)
+            self._set(LANE_FEATURES[slot], tables.counters[blue, red])
+        return slot
+
+    def ban(self, side, champion):
+        self.bans[side].append(champion)
+
+    def unavailable(self):
+        """Champions already picked or banned"""
+        return {c for side in SIDES for c in self.picks[side] + self.bans[side] if c is not None}
+
+    def n_picks(self, side):
+        return sum(c is not None for c in self.picks[side])
+
+    def is_complete(self):
+        return all(self.n_picks(side) == 5 for side in SIDES)
+
+    def probability(self, model, scaler=None):
+        """Blue win probability of the current draft (scaler: for models trained on scaled features)"""
+        x = self.x if scaler is None else scaler.transform(self.x).astype(np.float32)
+        return float(model.predict_proba(x)[0, 1])
@@ -0,0 +1,138 @@
+# partial_draft.py
+import re
+import json
+import numpy as np
+import pandas as pd
+from phase2_features.draft_state import SIDES
+
+
+def patch_order(patch):
+    """Sortable (major, minor, suffix) of a patch string such as '14.23' or '8.24b'"""
+    match = re.match(r'^\s*(\d+)\.(\d+)(.*)$', str(patch))
+    return (int(match.group(1)), int(match.group(2)), match.group(3)) if match else (-1, -1, str(patch))
+
+
+class PartialDraftEstimator:
+    """Blue win probability of an unfinished draft, averaged over sampled completions.
+
+    Each open slot is filled from the patch's pick counts times the
+    champion's historical share of games in that role, never repeating a
+    picked, banned or already sampled champion. All sampled drafts are
+    featurized with array indexing on the DraftFeatureTables and scored in
+    a single predict_proba call; the spread of their probabilities is the
+    uncertainty band.
+    """
+
+    def __init__(self, tables, model, feature_columns, n_samples=2000,
+                 stats_path="data/enhanced/patch_champion_stats.json",
+                 games=None, prior_games=1.0, random_state=None, scaler=None):
+        """games: played games with blue/red_champ1..5, by default all games in the match store
+        prior_games: all-time pick share (in games) added to every champion so off-meta picks stay possible
+        scaler: applied to the features first, for models trained on scaled features"""
+        self.tables = tables
+        self.model = model
+        self.scaler = scaler
+        self.feature_columns = list(feature_columns)
+        self.n_samples = n_samples
+        self.prior_games = prior_games
+        self.rng = np.random.default_rng(random_state)
+
+        with open(stats_path, 'r') as f:
+            self.patch_stats = json.load(f)
+        self.patches = sorted(self.patch_stats, key=patch_order)
+
+        # Slot columns are positions: champ1 top ... champ5 support
+        if games is None:
+            from phase1_enhancement.match_store import open_store
+            games = open_store().read()
+        slots = [pd.concat([games[f'{side}_champ{slot + 1}'] for side in SIDES]) for slot in range(5)]
+        self.champions = sorted(set(pd.concat(slots).dropna()) |
+                                {c for stats in self.patch_stats.values() for c in stats['champion_stats']})
+        self.index = {name: i for i, name in enumerate(self.champions)}
+        self.table_index = np.array([tables.champion_index(name) for name in self.champions])
+
+        self.role_counts = np.zeros((len(self.champions), 5))
+        for slot, picks in enumerate(slots):
+            for name, count in picks.value_counts().items():
+                self.role_counts[self.index[name], slot] = count
+        totals = self.role_counts.sum(axis=1, keepdims=True)
+        self.role_share = np.divide(self.role_counts, totals, out=np.zeros_like(self.role_counts), where=totals > 0)
+        self.pick_share = totals[:, 0] / max(totals.sum(), 1)
+        self._weights = {}
+
+    def resolve_patch(self, patch):
+        """The stats patch for a draft: the patch itself, else the newest one not after it, else the newest"""
+        if patch is not None and str(patch) in self.patch_stats:
+            return str(patch)
+        if patch is not None:
+            earlier = [p for p in self.patches if patch_order(p) <= patch_order(patch)]
+            if earlier:
+                return earlier[-1]
+        return self.patches[-1]
+
+    def completion_weights(self, patch):
+        """(n_champions, 5) unnormalized sampling weights of each champion in each position"""
+        patch = self.resolve_patch(patch)
+        if patch not in self._weights:
+            picks = np.zeros(len(self.champions))
+            for name, stats in self.patch_stats[patch]['champion_stats'].items():
+                picks[self.index[name]] = stats['picks']
+            picks += self.prior_games * self.pick_share
+            self._weights[patch] = picks[:, None] * self.role_share
+        return self._weights[patch]
+
+    def sample(self, draft, n_samples):
+        """{'blue': (n_samples, 5), 'red': ...} table indices of sampled completions of the draft"""
+        return self.sample_completions(draft.picks, draft.unavailable(), draft.patch, n_samples)
+
+    def sample_completions(self, picks_by_side, unavailable, patch, n_samples):
+        """Sampled completions of {side: 5 champions or None}; all None samples whole drafts"""
+        weights = self.completion_weights(patch)
+        taken = np.zeros((n_samples, len(self.champions)), dtype=bool)
+        taken[:, [self.index[c] for c in unavailable if c in self.index]] = True
+        rows = np.arange(n_samples)
+
+        picks = {}
+        for side in SIDES:
+            known = [self.tables.champion_index(c) if c is not None else self.tables.unknown
+                     for c in picks_by_side[side]]
+            picks[side] = np.tile(np.array(known), (n_samples, 1))
+
+        for side in SIDES:
+            for slot, champion in enumerate(picks_by_side[side]):
+                if champion is not None:
+                    continue
+                w = np.where(taken, 0.0, weights[:, slot])
+                empty = w.sum(axis=1) <= 0
+                if empty.any():
+                    # Nothing left with history in this role: any available champion
+                    w[empty] = ~taken[empty]
+                cumulative = w.cumsum(axis=1)
+                u = self.rng.random(n_samples) * cumulative[:, -1]
+                choice = (cumulative <= u[:, None]).sum(axis=1)
+                taken[rows, choice] = True
+                picks[side][:, slot] = self.table_index[choice]
+        return picks
+
+    def estimate(self, draft, n_samples=None, interval=0.9):
+        """Mean blue win probability over sampled completions with a central interval band"""
+        n_open = sum(c is None for side in SIDES for c in draft.picks[side])
+        if n_open == 0:
+            probas = np.array([draft.probability(self.model, self.scaler)])
+        else:
+            n_samples = n_samples or self.n_samples
+            X = np.repeat(draft.x, n_samples, axis=0)
+            self.tables.draft_features(X, self.feature_columns, self.sample(draft, n_samples))
+            if self.scaler is not None:
+                X = self.scaler.transform(X).astype(np.float32)
+            probas = self.model.predict_proba(X)[:, 1]
+
+        tail = (1 - interval) / 2
+        return {
+            'blue_win_probability': float(probas.mean()),
+            'std': float(probas.std()),
+            'low': float(np.quantile(probas, tail)),
+            'high': float(np.quantile(probas, 1 - tail)),
+            'n_samples': len(probas),
+            'open_slots': n_open
+        }
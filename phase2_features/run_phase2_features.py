@@ -1,4 +1,5 @@
 import pandas as pd
+from phase1_enhancement.match_store import open_store
 from phase2_features.champion_synergy_calculator import ChampionSynergyCalculator
 from phase2_features.matchup_history_analyzer import MatchupHistoryAnalyzer
 from phase2_features.team_composition_analyzer import TeamCompositionAnalyzer
@@ -10,9 +11,8 @@ def run_phase2():
     print("PHASE 2: FEATURE ENGINEERING")
     print("="*60)
     
-    # Load enhanced dataset from Phase 1
-    df = pd.read_csv("data/enhanced/lck_full_dataset.csv")
-    df['date'] = pd.to_datetime(df['date'])
+    # Load enhanced dataset from Phase 1's partitioned match store
+    df = open_store().read()
     
     # Step 1: Calculate champion synergies
     print("\n1. Calculating champion synergies...")
@@ -122,21 +122,15 @@ class TeamCompositionAnalyzer:
                     composition_features['late_game_score'] += 0.5
         
         # Calculate team composition type
-        composition_features['is_teamfight_comp'] = int(
-            composition_features['teamfight_score'] >= 3 and 
-            composition_features['engage_score'] >= 2
-        )
-        composition_features['is_poke_comp'] = int(
-            composition_features['poke_score'] >= 2 and
-            composition_features['disengage_score'] >= 1
-        )
-        composition_features['is_pick_comp'] = int(
-            composition_features['pick_potential'] >= 2 and
-            composition_features['mobility_score'] >= 2
-        )
-        composition_features['is_split_comp'] = int(
-            composition_features['splitpush_score'] >= 1 and
-            composition_features['disengage_score'] >= 2
-        )
+        composition_features.update(self.composition_types(composition_features))
         
         return composition_features
+    
+    def composition_types(self, scores):
+        """Binary composition types from summed team scores (scores may be arrays of drafts)"""
+        return {
+            'is_teamfight_comp': ((scores['teamfight_score'] >= 3) & (scores['engage_score'] >= 2)) * 1,
+            'is_poke_comp': ((scores['poke_score'] >= 2) & (scores['disengage_score'] >= 1)) * 1,
+            'is_pick_comp': ((scores['pick_potential'] >= 2) & (scores['mobility_score'] >= 2)) * 1,
+            'is_split_comp': ((scores['splitpush_score'] >= 1) & (scores['disengage_score'] >= 2)) * 1
+        }
@@ -10,44 +10,55 @@ from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.linear_model import LogisticRegression
 import joblib
 import warnings
+from phase3_models.data_prep import prepare_training_data
+from phase3_models.model_registry import ModelRegistry
+from config.settings import Config
+from phase3_models.lgb_cache import cached_dataset
 warnings.filterwarnings('ignore')
 
 class AdvancedModelTrainer:
     def __init__(self, features_path="data/enhanced/advanced_features.csv"):
-        self.features_df = pd.read_csv(features_path)
+        self.features_path = features_path
         self.models = {}
         self.results = {}
         self.scaler = StandardScaler()
+        self.n_jobs = -1  # Thread budget per model; set by ModelTrainingScheduler
+        self.training_report = None
         
     def prepare_data(self):
-        """Prepare data for training"""
-        # Remove non-feature columns
-        feature_cols = [col for col in self.features_df.columns 
-                       if col not in ['gameid', 'blue_win']]
+        """Prepare data for training (cached by feature file fingerprint)"""
+        data = prepare_training_data(self.features_path)
+        self.scaler = data.scaler
         
-        X = self.features_df[feature_cols]
-        y = self.features_df['blue_win']
-        
-        # Handle any missing values
-        X = X.fillna(0)
-        
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42, stratify=y
-        )
-        
-        # Scale features for some models
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
-        
-        return X_train, X_test, y_train, y_test, X_train_scaled, X_test_scaled, feature_cols
+        return (data.X_train, data.X_test, data.y_train, data.y_test,
+                data.X_train_scaled, data.X_test_scaled, data.feature_cols)
     
-    def train_all_models(self):
-        """Train multiple model types"""
+    def train_all_models(self, concurrent=False, cpu_budget=None, out_of_core=False, chunksize=100000):
+        """Train multiple model types
+
+        concurrent: train all models at once in worker processes, each with
+        its own thread budget so the total stays within cpu_budget cores
+        out_of_core: stream the feature table in chunks of chunksize rows and
+        train only the external-memory capable models (XGBoost, LightGBM)
+        """
         print("Training multiple models...")
         
+        if out_of_core:
+            self.train_out_of_core(chunksize)
+            return
+        
         X_train, X_test, y_train, y_test, X_train_scaled, X_test_scaled, feature_cols = self.prepare_data()
         
+        if concurrent:
+            from phase3_models.training_scheduler import ModelTrainingScheduler
+            
+            scheduler = ModelTrainingScheduler(self.features_path, cpu_budget=cpu_budget)
+            self.models, self.results, self.training_report = scheduler.run()
+            
+            self.compare_models(X_test, X_test_scaled, y_test)
+            self.save_best_model(feature_cols)
+            return
+        
         # 1. XGBoost
         print("\n1. Training XGBoost...")
         self.models['xgboost'] = self.train_xgboost(X_train, y_train, X_test, y_test)
@@ -76,6 +87,57 @@ class AdvancedModelTrainer:
         # Save best model
         self.save_best_model(feature_cols)
     
+    def train_out_of_core(self, chunksize=100000):
+        """XGBoost and LightGBM without loading the feature table into memory"""
+        from phase3_models.out_of_core import (FeatureChunks, train_xgboost_external,
+                                               train_lightgbm_external, evaluate_chunks)
+        
+        chunks = FeatureChunks.from_csv(self.features_path, chunksize=chunksize)
+        print(f"  {chunks.n_rows('train')} train / {chunks.n_rows('test')} test rows "
+              f"in {len(chunks.chunk_paths('train'))} chunks")
+        
+        # Same settings as train_xgboost / train_lightgbm
+        xgb_params = {
+            'objective': 'binary:logistic',
+            'tree_method': 'hist',
+            'max_depth': 8,
+            'eta': 0.03,
+            'subsample': 0.8,
+            'colsample_bytree': 0.8,
+            'gamma': 0.1,
+            'alpha': 0.1,
+            'lambda': 1,
+            'seed': 42,
+            'nthread': self.n_jobs,
+            'eval_metric': 'logloss'
+        }
+        lgb_params = {
+            'objective': 'binary',
+            'metric': 'binary_logloss',
+            'boosting_type': 'gbdt',
+            'num_leaves': 31,
+            'learning_rate': 0.05,
+            'feature_fraction': 0.9,
+            'bagging_fraction': 0.8,
+            'bagging_freq': 5,
+            'verbose': -1,
+            'random_state': 42,
+            'num_threads': max(self.n_jobs, 0)
+        }
+        
+        print("\n1. Training XGBoost (external memory)...")
+        self.models['xgboost'] = train_xgboost_external(chunks, xgb_params, num_boost_round=500)
+        
+        print("\n2. Training LightGBM (binary dataset)...")
+        self.models['lightgbm'] = train_lightgbm_external(chunks, lgb_params, num_boost_round=500)
+        
+        for name, model in self.models.items():
+            self.results[name] = evaluate_chunks(model, chunks)
+            print(f"  {name} - Accuracy: {self.results[name]['accuracy']:.4f}, "
+                  f"AUC: {self.results[name]['auc']:.4f}")
+        
+        self.save_best_model(chunks.feature_cols)
+    
     def train_xgboost(self, X_train, y_train, X_test, y_test):
         """Train XGBoost model with optimized parameters"""
         params = {
@@ -89,7 +151,7 @@ class AdvancedModelTrainer:
             'reg_alpha': 0.1,
             'reg_lambda': 1,
             'random_state': 42,
-            'n_jobs': -1,
+            'n_jobs': self.n_jobs,
             'eval_metric': 'logloss'
         }
         
@@ -123,11 +185,13 @@ class AdvancedModelTrainer:
             'bagging_fraction': 0.8,
             'bagging_freq': 5,
             'verbose': -1,
-            'random_state': 42
+            'random_state': 42,
+            'num_threads': max(self.n_jobs, 0)  # 0 = LightGBM default
         }
         
-        train_data = lgb.Dataset(X_train, label=y_train)
-        valid_data = lgb.Dataset(X_test, label=y_test, reference=train_data)
+        # Binned once per dataset and reused by later runs, tuning and walk-forward folds
+        train_data = cached_dataset(X_train, y_train, params)
+        valid_data = cached_dataset(X_test, y_test, params, reference=train_data)
         
         model = lgb.train(
             params,
@@ -158,7 +222,7 @@ class AdvancedModelTrainer:
             min_samples_leaf=10,
             max_features='sqrt',
             random_state=42,
-            n_jobs=-1
+            n_jobs=self.n_jobs
         )
         
         model.fit(X_train, y_train)
@@ -244,14 +308,21 @@ class AdvancedModelTrainer:
         best_model_name = max(self.results.items(), key=lambda x: x[1]['auc'])[0]
         best_model = self.models[best_model_name]
         
-        # Save model and metadata
-        model_data = {
-            'model': best_model,
-            'model_type': best_model_name,
-            'feature_columns': feature_cols,
-            'scaler': self.scaler if best_model_name == 'logistic_regression' else None,
-            'results': self.results
-        }
-        
-        joblib.dump(model_data, 'models/best_model_phase3.pkl')
-        print(f"\n✓ Saved best model ({best_model_name}) to models/best_model_phase3.pkl")
+        # Save model and metadata as a registry version
+        members = {best_model_name: best_model}
+        if best_model_name == 'logistic_regression':
+            members['scaler'] = self.scaler
+        
+        # Registered for comparison only; serving switches on an explicit promote
+        registry = ModelRegistry(Config.MODEL_REGISTRY_PATH)
+        version = registry.register(
+            members,
+            feature_columns=feature_cols,
+            metrics={'models': self.results},
+            aliases={'best_model': best_model_name, 'serving': best_model_name},
+            promote=False
+        )
+        print(f"\n✓ Registered best model ({best_model_name}) as version {version} "
+              f"(serving {registry.latest_version() or 'nothing yet'})")
+        if registry.latest_version() != version:
+            print(f"  Not served; promote with ModelRegistry('{Config.MODEL_REGISTRY_PATH}').promote('{version}')")
@@ -0,0 +1,392 @@
+# compact_model.py
+import os
+import sys
+import copy
+import json
+import subprocess
+import numpy as np
+import pandas as pd
+import joblib
+import xgboost as xgb
+import lightgbm as lgb
+from sklearn.base import BaseEstimator
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.pipeline import Pipeline
+from phase3_models.distillation import DistilledStudent
+from phase3_models.out_of_core import BoosterClassifier
+
+# Fitted attributes only used while training (or for inspection), never by predict_proba
+TRAINING_STATE = ['n_iter_', 'oob_score_', 'oob_decision_function_', 'train_score_', 'oob_improvement_',
+                  'oob_scores_', 'loss_', 'init_', 'evals_result_', 'best_score_', 'n_samples_seen_']
+
+
+def _floor32(thresholds):
+    """Largest float32 <= each threshold, so x <= t keeps its outcome for float32 x"""
+    t = np.asarray(thresholds, dtype=np.float64)
+    t32 = t.astype(np.float32)
+    above = t32.astype(np.float64) > t
+    t32[above] = np.nextafter(t32[above], np.float32(-np.inf))
+    return t32
+
+
+class CompactTreeEnsemble:
+    """Tree ensemble as flat float32/int32 node arrays, predicting like the original model.
+
+    Every tree is stored as nodes with a feature, a float32 threshold
+    (go left if x <= threshold, or if x is NaN and default_left), child
+    indices and a leaf value; leaves point to themselves. kind 'mean'
+    averages per-tree probabilities (random forest); kind 'logit' adds the
+    leaf values to bias and applies the sigmoid (boosting).
+    """
+
+    def __init__(self, trees, kind, bias=0.0, n_features=None):
+        """trees: [(feature, threshold, left, right, default_left, value)] per tree, local node ids"""
+        offsets = np.cumsum([0] + [len(tree[0]) for tree in trees])
+        self.roots = offsets[:-1].astype(np.int32)
+        self.feature = np.concatenate([t[0] for t in trees]).astype(np.int32)
+        self.threshold = np.concatenate([t[1] for t in trees]).astype(np.float32)
+        self.left = np.concatenate([t[2] + o for t, o in zip(trees, offsets)]).astype(np.int32)
+        self.right = np.concatenate([t[3] + o for t, o in zip(trees, offsets)]).astype(np.int32)
+        self.default_left = np.concatenate([t[4] for t in trees]).astype(bool)
+        self.value = np.concatenate([t[5] for t in trees]).astype(np.float32)
+        self.kind = kind
+        self.bias = float(bias)
+        self.n_features = n_features
+        self.depth = max(_tree_depth(t[2], t[3]) for t in trees)
+        self.classes_ = np.array([0, 1])
+
+    def leaf_values(self, X):
+        """(n_rows, n_trees) leaf value reached in every tree"""
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.depth):
+            x = X[rows, self.feature[node]]
+            go_left = (x <= self.threshold[node]) | (np.isnan(x) & self.default_left[node])
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.value[node]
+
+    def raw_score(self, X):
+        return self.leaf_values(X).sum(axis=1, dtype=np.float64) + self.bias
+
+    def predict_proba(self, X):
+        if self.kind == 'mean':
+            proba = self.leaf_values(X).mean(axis=1, dtype=np.float64)
+        else:
+            proba = 1 / (1 + np.exp(-self.raw_score(X)))
+        return np.vstack([1 - proba, proba]).T
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] > 0.5).astype(int)
+
+
+def _tree_depth(left, right):
+    depth, frontier = 0, np.array([0])
+    while True:
+        children = np.concatenate([left[frontier], right[frontier]])
+        children = children[children != np.concatenate([frontier, frontier])]
+        if len(children) == 0:
+            return depth
+        frontier = children
+        depth += 1
+
+
+def _leaf_loops(n_nodes, left, right):
+    """Point -1 children (sklearn leaves) at the node itself"""
+    nodes = np.arange(n_nodes)
+    return np.where(left < 0, nodes, left), np.where(right < 0, nodes, right)
+
+
+def _sklearn_trees(estimators, leaf_value):
+    trees = []
+    for estimator in estimators:
+        tree = estimator.tree_
+        left, right = _leaf_loops(tree.node_count, tree.children_left, tree.children_right)
+        is_leaf = tree.children_left < 0
+        trees.append((np.where(is_leaf, 0, tree.feature), _floor32(np.where(is_leaf, 0, tree.threshold)),
+                      left, right, np.zeros(tree.node_count, dtype=bool),
+                      np.where(is_leaf, leaf_value(tree), 0)))
+    return trees
+
+
+def _lightgbm_trees(booster):
+    trees = []
+    for info in booster.dump_model()['tree_info']:
+        nodes = []
+
+        def visit(node):
+            index = len(nodes)
+            nodes.append(None)
+            if 'leaf_value' in node or 'split_feature' not in node:
+                nodes[index] = (0, 0.0, index, index, False, node.get('leaf_value', 0.0))
+                return index
+            if node['decision_type'] != '<=' or node.get('missing_type') == 'Zero':
+                raise ValueError(f"Cannot compact LightGBM split: {node['decision_type']}, "
+                                 f"missing type {node.get('missing_type')}")
+            left, right = visit(node['left_child']), visit(node['right_child'])
+            nodes[index] = (node['split_feature'], node['threshold'], left, right,
+                            node['default_left'] and node.get('missing_type') == 'NaN', 0.0)
+            return index
+
+        visit(info['tree_structure'])
+        feature, threshold, left, right, default_left, value = map(np.array, zip(*nodes))
+        trees.append((feature, _floor32(threshold), left, right, default_left, value))
+    return trees
+
+
+def _xgboost_trees(booster):
+    names = booster.feature_names
+    trees = []
+    for dump in booster.get_dump(dump_format='json'):
+        nodes = {}
+
+        def visit(node):
+            if 'leaf' in node:
+                nodes[node['nodeid']] = (0, 0.0, node['nodeid'], node['nodeid'], False, node['leaf'])
+                return
+            split = node['split']
+            feature = names.index(split) if names and split in names else int(split.lstrip('f'))
+            # XGBoost goes left if x < t; for float32 x that is x <= the next float32 below t
+            threshold = np.nextafter(np.float32(node['split_condition']), np.float32(-np.inf))
+            nodes[node['nodeid']] = (feature, threshold, node['yes'], node['no'],
+                                     node['missing'] == node['yes'], 0.0)
+            for child in node['children']:
+                visit(child)
+
+        visit(json.loads(dump))
+        ids = sorted(nodes)
+        position = {node_id: i for i, node_id in enumerate(ids)}
+        feature, threshold, left, right, default_left, value = map(np.array, zip(*[nodes[i] for i in ids]))
+        trees.append((feature, threshold.astype(np.float32), np.array([position[i] for i in left]),
+                      np.array([position[i] for i in right]), default_left, value))
+    return trees
+
+
+def compact_model(model):
+    """Serving-only copy of a fitted model; tree ensembles become CompactTreeEnsemble.
+
+    The bias of boosted models (base score, init estimator) is recovered as
+    the difference between the native raw score and the summed leaves on
+    one row, which is the same for every row. Other models keep their
+    type with training-only attributes removed. Pipelines are compacted
+    step by step; anything else is returned unchanged.
+    """
+    if isinstance(model, DistilledStudent) and model.kind == 'gbm':
+        return compact_model(BoosterClassifier(model.regressor_.booster_))
+
+    if isinstance(model, (xgb.XGBModel, lgb.LGBMModel)):
+        return compact_model(BoosterClassifier(model.get_booster() if isinstance(model, xgb.XGBModel)
+                                               else model.booster_))
+
+    if isinstance(model, BoosterClassifier):
+        booster = model.booster
+        if isinstance(booster, xgb.Booster):
+            n_features = booster.num_features()
+            trees = _xgboost_trees(booster)
+            native = lambda X: booster.predict(xgb.DMatrix(X), output_margin=True)
+        else:
+            n_features = booster.num_feature()
+            trees = _lightgbm_trees(booster)
+            native = lambda X: booster.predict(X, raw_score=True)
+        compact = CompactTreeEnsemble(trees, 'logit', 0.0, n_features)
+        X0 = np.zeros((1, n_features), dtype=np.float32)
+        compact.bias = float(native(X0)[0] - compact.raw_score(X0)[0])
+        return compact
+
+    if isinstance(model, RandomForestClassifier):
+        def leaf_proba(tree):
+            value = tree.value[:, 0, :]
+            return value[:, 1] / value.sum(axis=1)
+        return CompactTreeEnsemble(_sklearn_trees(model.estimators_, leaf_proba), 'mean',
+                                   n_features=model.n_features_in_)
+
+    if isinstance(model, GradientBoostingClassifier):
+        compact = CompactTreeEnsemble(
+            _sklearn_trees(model.estimators_[:, 0], lambda tree: tree.value[:, 0, 0] * model.learning_rate),
+            'logit', 0.0, model.n_features_in_)
+        X0 = np.zeros((1, model.n_features_in_), dtype=np.float32)
+        compact.bias = float(model.decision_function(X0)[0] - compact.raw_score(X0)[0])
+        return compact
+
+    if isinstance(model, Pipeline):
+        return Pipeline([(name, compact_model(step)) for name, step in model.steps])
+
+    if isinstance(model, BaseEstimator):
+        stripped = copy.copy(model)
+        for attribute in TRAINING_STATE:
+            stripped.__dict__.pop(attribute, None)
+        return stripped
+
+    return model
+
+
+def compact_path(registry, name, version=None):
+    manifest = registry.manifest(version)
+    name = manifest['aliases'].get(name, name)
+    return os.path.join(registry.version_dir(manifest['version']), 'compact', f"{name}.joblib")
+
+
+def export_registry_compact(registry, names=('serving',), version=None, compress=0):
+    """Write <version>/compact/<member>.joblib for the given members or aliases.
+
+    An ensemble is exported member by member; returns the written paths.
+    compress: joblib compression level; about 3.5x smaller files at level 3,
+    but 3-5x slower to load, so off by default.
+    """
+    manifest = registry.manifest(version)
+
+    members = []
+    for name in names:
+        name = manifest['aliases'].get(name, name)
+        refs = manifest['members'][name].get('members')
+        members.extend(refs.values() if refs else [name])
+
+    written = []
+    for name in dict.fromkeys(members):
+        path = compact_path(registry, name, manifest['version'])
+        if os.path.exists(path):
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # A failed export leaves no partial file in the cache
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            joblib.dump(compact_model(registry.load(name, manifest['version'])), tmp_path, compress=compress)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        written.append(path)
+    return written
+
+
+def _load_compact_file(registry, name, version):
+    """Load one exported member, re-exporting a cached file that no longer unpickles"""
+    path = compact_path(registry, name, version)
+    try:
+        return joblib.load(path)
+    except (AttributeError, ModuleNotFoundError, EOFError):
+        # e.g. written by an older run that pickled classes as __main__.*
+        os.remove(path)
+        export_registry_compact(registry, [name], version)
+        return joblib.load(path)
+
+
+def load_compact_model(registry, name='serving', version=None):
+    """Compact counterpart of registry.load(name), exporting on first use.
+
+    An ensemble keeps its blending logic and weights but its members are
+    the compact ones; the native members are never loaded.
+    """
+    manifest = registry.manifest(version)
+    version = manifest['version']
+    name = manifest['aliases'].get(name, name)
+    export_registry_compact(registry, [name], version)
+
+    entry = manifest['members'][name]
+    if 'members' not in entry:
+        return _load_compact_file(registry, name, version)
+
+    ensemble = joblib.load(os.path.join(registry.version_dir(version), entry['file']))
+    ensemble.fitted_models = {member_name: _load_compact_file(registry, ref, version)
+                              for member_name, ref in entry['members'].items()}
+    ensemble.models = dict(ensemble.fitted_models)
+    return ensemble
+
+
+def artifact_files(registry, artifact, name, pickle_path):
+    """Files read when loading name from an artifact"""
+    if artifact == 'pickle':
+        return [pickle_path]
+    manifest = registry.manifest()
+    name = manifest['aliases'].get(name, name)
+    entry = manifest['members'][name]
+    refs = list(entry['members'].values()) if 'members' in entry else []
+    if artifact == 'registry':
+        return [os.path.join(registry.version_dir(manifest['version']), manifest['members'][n]['file'])
+                for n in [name] + refs]
+    if refs:
+        return ([os.path.join(registry.version_dir(manifest['version']), entry['file'])]
+                + [compact_path(registry, ref) for ref in refs])
+    return [compact_path(registry, name)]
+
+
+# Run in a fresh interpreter per measurement: load time and resident memory added by one artifact (Linux)
+LOAD_SCRIPT = """
+import os, sys, time, joblib
+from phase3_models.model_registry import ModelRegistry
+from phase3_models.compact_model import load_compact_model
+
+def rss_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+artifact, name, root, pickle_path = sys.argv[1:5]
+registry = ModelRegistry(root)
+registry.manifest()
+before = rss_mb()
+start = time.perf_counter()
+if artifact == 'pickle':
+    bundle = joblib.load(pickle_path)
+    model = bundle.get({'serving': 'serving_model'}.get(name, name)) or bundle['best_model']
+elif artifact == 'registry':
+    model = registry.load(name)
+else:
+    model = load_compact_model(registry, name)
+seconds = time.perf_counter() - start
+print(seconds, rss_mb() - before)
+"""
+
+
+def benchmark_artifacts(registry, pickle_path="models/final_phase3_models.pkl", names=('serving', 'ensemble'),
+                        features_path="data/enhanced/advanced_features.csv"):
+    """File size, load time and loaded RSS of the bundled pickle, registry files and compact files"""
+    manifest = registry.manifest()
+    export_registry_compact(registry, names)
+    feature_cols = manifest['feature_columns']
+    X = pd.read_csv(features_path, usecols=feature_cols)[feature_cols].fillna(0).to_numpy(dtype=np.float32)
+
+    rows = []
+    for name in names:
+        reference = registry.load(name).predict_proba(X)[:, 1]
+        compact = load_compact_model(registry, name).predict_proba(X)[:, 1]
+        for artifact in ['pickle', 'registry', 'compact']:
+            if artifact == 'pickle' and not os.path.exists(pickle_path):
+                continue
+            result = subprocess.run([sys.executable, "-c", LOAD_SCRIPT, artifact, name, registry.root, pickle_path],
+                                    capture_output=True, text=True, check=True)
+            seconds, rss_mb = map(float, result.stdout.split()[-2:])
+            rows.append({
+                'model': f"{name} ({manifest['aliases'].get(name, name)})",
+                'artifact': artifact,
+                'size_mb': sum(os.path.getsize(p) for p in artifact_files(registry, artifact, name, pickle_path))
+                / 2**20,
+                'load_ms': seconds * 1000,
+                'loaded_rss_mb': rss_mb,
+                'max_abs_diff': float(np.abs(compact - reference).max()) if artifact == 'compact' else 0.0
+            })
+
+    return pd.DataFrame(rows).set_index(['model', 'artifact'])
+
+
+def run_artifact_benchmark(path="reports/artifacts/benchmark.csv"):
+    from config.settings import Config
+    from phase3_models.model_registry import ModelRegistry
+
+    print("="*60)
+    print("MODEL ARTIFACT BENCHMARK")
+    print("="*60)
+
+    registry = ModelRegistry(Config.MODEL_REGISTRY_PATH)
+    report = benchmark_artifacts(registry, Config.MODEL_PATH)
+    print(report.to_string(float_format='{:.4g}'.format))
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    report.to_csv(path)
+    print(f"✓ Saved benchmark to {path}")
+    return report
+
+
+if __name__ == "__main__":
+    # Import by package path so exported files pickle phase3_models.compact_model classes, not __main__ ones
+    from phase3_models.compact_model import run_artifact_benchmark as run
+    run()
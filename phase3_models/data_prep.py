@@ -0,0 +1,92 @@
+# data_prep.py
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+import joblib
+
+NON_FEATURE_COLUMNS = ['gameid', 'blue_win']
+CACHE_DIR = "models/cache/prepared"
+
+
+class PreparedData:
+    """float32 train/test matrices plus the fitted scaler"""
+
+    def __init__(self, X_train, X_test, y_train, y_test, scaler, feature_cols, fingerprint):
+        self.X_train = X_train
+        self.X_test = X_test
+        self.y_train = y_train
+        self.y_test = y_test
+        self.scaler = scaler
+        self.feature_cols = feature_cols
+        self.fingerprint = fingerprint
+        self.X_train_scaled = scaler.transform(X_train).astype(np.float32)
+        self.X_test_scaled = scaler.transform(X_test).astype(np.float32)
+
+
+def file_fingerprint(path, chunk_size=1 << 20):
+    """sha256 of a file's contents"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def data_fingerprint(features_path, feature_cols, split_spec):
+    """Cache key: feature file contents + column list + split spec"""
+    h = hashlib.sha256()
+    h.update(file_fingerprint(features_path).encode())
+    h.update(json.dumps(list(feature_cols)).encode())
+    h.update(json.dumps(split_spec, sort_keys=True).encode())
+    return h.hexdigest()[:16]
+
+
+def prepare_training_data(features_path="data/enhanced/advanced_features.csv", feature_cols=None,
+                          test_size=0.2, random_state=42, stratify=True,
+                          cache_dir=None):
+    """Read, select, fillna(0), split and scale features, cached on disk.
+
+    A repeated call with the same feature file, columns and split spec loads
+    the cached arrays instead of parsing the CSV again. cache_dir defaults
+    to CACHE_DIR, read at call time.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    if feature_cols is None:
+        header = pd.read_csv(features_path, nrows=0).columns
+        feature_cols = [col for col in header if col not in NON_FEATURE_COLUMNS]
+    feature_cols = list(feature_cols)
+
+    split_spec = {'method': 'random', 'test_size': test_size,
+                  'random_state': random_state, 'stratify': stratify}
+    fingerprint = data_fingerprint(features_path, feature_cols, split_spec)
+
+    arrays_path = os.path.join(cache_dir, f"{fingerprint}.npz")
+    scaler_path = os.path.join(cache_dir, f"{fingerprint}_scaler.pkl")
+
+    if os.path.exists(arrays_path) and os.path.exists(scaler_path):
+        data = np.load(arrays_path)
+        return PreparedData(data['X_train'], data['X_test'], data['y_train'], data['y_test'],
+                            joblib.load(scaler_path), feature_cols, fingerprint)
+
+    features_df = pd.read_csv(features_path, usecols=feature_cols + ['blue_win'])
+    X = features_df[feature_cols].fillna(0).to_numpy(dtype=np.float32)
+    y = features_df['blue_win'].to_numpy(dtype=np.int32)
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=test_size, random_state=random_state,
+        stratify=y if stratify else None
+    )
+
+    scaler = StandardScaler().fit(X_train)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = arrays_path[:-len('.npz')] + '.tmp.npz'
+    np.savez(tmp_path, X_train=X_train, X_test=X_test, y_train=y_train, y_test=y_test)
+    os.replace(tmp_path, arrays_path)
+    joblib.dump(scaler, scaler_path)
+
+    return PreparedData(X_train, X_test, y_train, y_test, scaler, feature_cols, fingerprint)
@@ -0,0 +1,132 @@
+# distillation.py
+import time
+import numpy as np
+import lightgbm as lgb
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.linear_model import Ridge
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler, PolynomialFeatures
+from sklearn.feature_selection import VarianceThreshold
+from sklearn.metrics import accuracy_score, roc_auc_score
+
+
+def _logit(p):
+    p = np.clip(p, 1e-6, 1 - 1e-6)
+    return np.log(p / (1 - p))
+
+
+def synthetic_drafts(X, n_samples, feature_columns, estimator=None, random_state=42):
+    """Real games with their drafts replaced by plausible sampled drafts.
+
+    Each synthetic row keeps one training game's other features (players,
+    team history, patch) and gets ten champions drawn from that patch's
+    per-role pick distribution (PartialDraftEstimator), so the teacher is
+    queried on drafts that could actually occur. The draft columns are then
+    recomputed exactly as DraftState computes them.
+    """
+    from phase2_features.draft_state import DraftFeatureTables, SIDES
+    from phase2_features.partial_draft import PartialDraftEstimator
+
+    feature_columns = list(feature_columns)
+    rng = np.random.default_rng(random_state)
+    estimator = estimator or PartialDraftEstimator(DraftFeatureTables(), None, feature_columns,
+                                                   random_state=random_state)
+
+    X_synthetic = X[rng.integers(0, len(X), n_samples)].astype(np.float32)
+    if 'patch_number' in feature_columns:
+        patches = X_synthetic[:, feature_columns.index('patch_number')]
+    else:
+        patches = np.zeros(n_samples, dtype=np.float32)
+
+    empty = {side: [None] * 5 for side in SIDES}
+    picks = {side: np.zeros((n_samples, 5), dtype=int) for side in SIDES}
+    for patch in np.unique(patches):
+        rows = np.flatnonzero(patches == patch)
+        # patch_number is the patch as a float (0 when unknown: use the newest patch)
+        sampled = estimator.sample_completions(empty, (), f"{patch:g}" if patch else None, len(rows))
+        for side in SIDES:
+            picks[side][rows] = sampled[side]
+    return estimator.tables.draft_features(X_synthetic, feature_columns, picks)
+
+
+class DistilledStudent(BaseEstimator, ClassifierMixin):
+    """Small regressor on the teacher's logits, exposed as a classifier"""
+
+    def __init__(self, kind='gbm'):
+        """kind: 'gbm' (shallow LightGBM) or 'logistic' (linear model with pairwise interactions)"""
+        self.kind = kind
+
+    def build(self):
+        if self.kind == 'gbm':
+            return lgb.LGBMRegressor(n_estimators=500, num_leaves=15, max_depth=4, learning_rate=0.1,
+                                     random_state=42, n_jobs=1, verbosity=-1)
+        if self.kind == 'logistic':
+            return make_pipeline(VarianceThreshold(), StandardScaler(),
+                                 PolynomialFeatures(degree=2, interaction_only=True, include_bias=False),
+                                 Ridge(alpha=100.0))
+        raise ValueError(f"Unknown student kind: {self.kind}")
+
+    def fit(self, X, teacher_proba):
+        """Fit on soft teacher probabilities (not hard labels)"""
+        self.regressor_ = self.build().fit(X, _logit(teacher_proba))
+        self.classes_ = np.array([0, 1])
+        return self
+
+    def predict_proba(self, X):
+        proba = 1 / (1 + np.exp(-self.regressor_.predict(X)))
+        return np.vstack([1 - proba, proba]).T
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] > 0.5).astype(int)
+
+
+def single_row_latency_ms(model, X, n_requests=200):
+    """Median latency of one-row predict_proba calls, as the API makes them"""
+    rows = X[:n_requests]
+    timings = []
+    for i in range(len(rows)):
+        start = time.perf_counter()
+        model.predict_proba(rows[i:i + 1])
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def distill_ensemble(teacher, X_train, X_test, y_test, feature_columns, kind='gbm', n_synthetic=20000,
+                     random_state=42):
+    """Train a student on the teacher's probabilities; returns (student, report).
+
+    The student sees the training games plus synthetic drafts, all labelled
+    with the teacher's soft probability. Fidelity is measured on the test
+    set and on sampled drafts around the test games.
+    """
+    from phase2_features.draft_state import DraftFeatureTables
+    from phase2_features.partial_draft import PartialDraftEstimator
+
+    estimator = PartialDraftEstimator(DraftFeatureTables(), None, feature_columns, random_state=random_state)
+    X_fit = np.vstack([X_train, synthetic_drafts(X_train, n_synthetic, feature_columns, estimator, random_state)])
+    teacher_fit = teacher.predict_proba(X_fit)[:, 1]
+
+    start = time.perf_counter()
+    student = DistilledStudent(kind).fit(X_fit, teacher_fit)
+    fit_seconds = time.perf_counter() - start
+
+    teacher_proba = teacher.predict_proba(X_test)[:, 1]
+    student_proba = student.predict_proba(X_test)[:, 1]
+    X_drafts = synthetic_drafts(X_test, len(X_test), feature_columns, estimator, random_state + 1)
+    draft_gap = student.predict_proba(X_drafts)[:, 1] - teacher.predict_proba(X_drafts)[:, 1]
+
+    report = {
+        'student': kind,
+        'train_rows': len(X_fit),
+        'fit_seconds': fit_seconds,
+        'fidelity_mae': float(np.mean(np.abs(student_proba - teacher_proba))),
+        'agreement': float(np.mean((student_proba > 0.5) == (teacher_proba > 0.5))),
+        'sampled_draft_fidelity_mae': float(np.mean(np.abs(draft_gap))),
+        'student_accuracy': accuracy_score(y_test, student_proba > 0.5),
+        'student_auc': roc_auc_score(y_test, student_proba),
+        'teacher_accuracy': accuracy_score(y_test, teacher_proba > 0.5),
+        'teacher_auc': roc_auc_score(y_test, teacher_proba),
+        'teacher_latency_ms': single_row_latency_ms(teacher, X_test),
+        'student_latency_ms': single_row_latency_ms(student, X_test)
+    }
+    return student, report
@@ -1,71 +1,123 @@
 # ensemble_model.py
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.linear_model import LogisticRegression
 import joblib
 
+# Shared by all ensembles in the process; tree libraries release the GIL
+# during prediction, so members genuinely run in parallel
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1,
+                                           thread_name_prefix='ensemble')
+        return _executor
+
+
+def _member_proba(model, X):
+    """Positive-class probability of one member"""
+    if hasattr(model, 'predict_proba'):
+        return model.predict_proba(X)[:, 1]
+    # For models that only have predict (like LightGBM Booster)
+    return model.predict(X)
+
+
 class EnsembleVotingSystem(BaseEstimator, ClassifierMixin):
-    def __init__(self, models=None, weights=None):
+    def __init__(self, models=None, weights=None, prefit=False, mode='soft', parallel=True):
         """
         models: dict of {'name': model}
         weights: dict of {'name': weight} or None for equal weights
+        prefit: models are already fitted; use them as-is and make fit() a no-op
+        mode: 'soft' (weighted average) or 'stacking' (meta-learner, see fit_stacker)
+        parallel: evaluate members concurrently on a thread pool
         """
         self.models = models or {}
         self.weights = weights
-        self.fitted_models = {}
-        
+        self.prefit = prefit
+        self.mode = mode
+        self.parallel = parallel
+        self.fitted_models = dict(self.models) if prefit else {}
+        self.meta_learner = None
+
     def fit(self, X, y):
         """Fit all models"""
+        if self.prefit:
+            return self
+
         for name, model in self.models.items():
             print(f"Training {name}...")
             if hasattr(model, 'fit'):
                 model.fit(X, y)
             self.fitted_models[name] = model
         return self
-    
-    def predict_proba(self, X):
-        """Get weighted average predictions"""
-        predictions = []
-        weights = []
-        
-        for name, model in self.fitted_models.items():
-            if hasattr(model, 'predict_proba'):
-                pred = model.predict_proba(X)[:, 1]
-            elif hasattr(model, 'predict'):
-                # For models that only have predict (like LightGBM)
-                pred = model.predict(X)
-            else:
-                continue
-                
-            predictions.append(pred)
-            
-            # Get weight
-            if self.weights and name in self.weights:
-                weights.append(self.weights[name])
-            else:
-                weights.append(1.0)
-        
+
+    def fit_stacker(self, oof_predictions, y):
+        """Train the stacking meta-learner on out-of-fold member probabilities.
+
+        oof_predictions: DataFrame with one column per member (e.g. the
+        walk-forward OOF table), so the base models are never refit.
+        """
+        names = list(self.fitted_models)
+        Z = self._stack_features(np.column_stack([oof_predictions[name] for name in names]))
+
+        self.meta_learner = LogisticRegression(max_iter=1000)
+        self.meta_learner.fit(Z, y)
+        self.stack_members_ = names
+        self.mode = 'stacking'
+        return self
+
+    def _stack_features(self, member_probas):
+        """Logits of member probabilities, the meta-learner's inputs"""
+        p = np.clip(member_probas, 1e-6, 1 - 1e-6)
+        return np.log(p / (1 - p))
+
+    def predict_with_members(self, X):
+        """One pass over the members: returns (blended probability, {name: probability})"""
+        names = list(self.fitted_models)
+
+        if getattr(self, 'parallel', True) and len(names) > 1:
+            executor = _get_executor()
+            futures = [executor.submit(_member_proba, self.fitted_models[name], X) for name in names]
+            probas = [future.result() for future in futures]
+        else:
+            probas = [_member_proba(self.fitted_models[name], X) for name in names]
+
+        individual_preds = dict(zip(names, probas))
+        return self.blend(individual_preds), individual_preds
+
+    def blend(self, individual_preds):
+        """Combine {name: member probability} into the ensemble probability"""
+        if getattr(self, 'mode', 'soft') == 'stacking' and self.meta_learner is not None:
+            Z = self._stack_features(np.column_stack([individual_preds[name] for name in self.stack_members_]))
+            return self.meta_learner.predict_proba(Z)[:, 1]
+
         # Weighted average
-        predictions = np.array(predictions)
-        weights = np.array(weights) / np.sum(weights)
-        
-        weighted_pred = np.average(predictions, axis=0, weights=weights)
-        
+        names = list(individual_preds)
+        weights = np.array([self.weights.get(name, 1.0) if self.weights else 1.0 for name in names])
+        return np.average(np.array([individual_preds[name] for name in names]), axis=0,
+                          weights=weights / np.sum(weights))
+
+    def predict_proba(self, X):
+        """Get ensemble predictions"""
+        blended, _ = self.predict_with_members(X)
+
         # Return as 2D array for sklearn compatibility
-        return np.vstack([1 - weighted_pred, weighted_pred]).T
-    
+        return np.vstack([1 - blended, blended]).T
+
     def predict(self, X):
         """Get binary predictions"""
         proba = self.predict_proba(X)[:, 1]
         return (proba > 0.5).astype(int)
-    
+
     def get_individual_predictions(self, X):
         """Get predictions from each model separately"""
-        individual_preds = {}
-        
-        for name, model in self.fitted_models.items():
-            if hasattr(model, 'predict_proba'):
-                individual_preds[name] = model.predict_proba(X)[:, 1]
-            elif hasattr(model, 'predict'):
-                individual_preds[name] = model.predict(X)
-                
+        _, individual_preds = self.predict_with_members(X)
         return individual_preds
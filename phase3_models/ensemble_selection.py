@@ -0,0 +1,149 @@
+# ensemble_selection.py
+import os
+import time
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import GroupKFold, cross_val_predict
+from sklearn.metrics import roc_auc_score, log_loss
+from phase3_models.ensemble_model import EnsembleVotingSystem
+
+
+class EnsembleSelector:
+    """Pick the cheapest ensemble members whose out-of-fold blend is within tolerance of the best.
+
+    Subsets are explored by greedy backward elimination (drop the member
+    whose removal hurts least) or forward selection (add the member that
+    helps most), scored on out-of-fold probabilities so no model is refit.
+    Among the explored subsets within tolerance of the best score, those
+    within latency_margin of the fastest count as equally fast, and the
+    one with the fewest members (then the best score) wins, so timing noise
+    does not decide between them.
+    """
+
+    def __init__(self, metric='log_loss', tolerance=0.002, method='backward', mode='soft', latency_margin=0.15):
+        """
+        metric: 'log_loss' or 'auc'; tolerance is in the metric's units
+        method: 'backward' or 'forward'
+        mode: how the ensemble blends, 'soft' (mean) or 'stacking' (logistic
+        meta-learner, scored with fold-grouped cross-validation)
+        latency_margin: relative latency difference treated as noise
+        """
+        self.metric = metric
+        self.tolerance = tolerance
+        self.latency_margin = latency_margin
+        self.method = method
+        self.mode = mode
+        self.report = None
+        self.selected = None
+
+    def blend(self, oof, members):
+        if self.mode == 'soft':
+            return oof[members].mean(axis=1).to_numpy()
+        # Meta-learner predictions for each walk-forward fold come from the other folds
+        p = np.clip(oof[members].to_numpy(), 1e-6, 1 - 1e-6)
+        return cross_val_predict(LogisticRegression(max_iter=1000), np.log(p / (1 - p)), oof['blue_win'],
+                                 groups=oof['fold'], cv=GroupKFold(n_splits=min(5, oof['fold'].nunique())),
+                                 method='predict_proba')[:, 1]
+
+    def evaluate(self, oof, members):
+        proba = self.blend(oof, list(members))
+        return {'log_loss': log_loss(oof['blue_win'], np.clip(proba, 1e-6, 1 - 1e-6), labels=[0, 1]),
+                'auc': roc_auc_score(oof['blue_win'], proba)}
+
+    def search(self, oof, candidates):
+        """Greedy path of subsets, each as (members, metrics)"""
+        cache = {}
+
+        def metrics(members):
+            key = frozenset(members)
+            if key not in cache:
+                cache[key] = self.evaluate(oof, sorted(members))
+            return cache[key]
+
+        def loss(members):
+            value = metrics(members)[self.metric]
+            return value if self.metric == 'log_loss' else -value
+
+        path = []
+        if self.method == 'backward':
+            current = list(candidates)
+            path.append(list(current))
+            while len(current) > 1:
+                drop = min(current, key=lambda m: loss([c for c in current if c != m]))
+                current = [c for c in current if c != drop]
+                path.append(list(current))
+        elif self.method == 'forward':
+            current, remaining = [], list(candidates)
+            while remaining:
+                add = min(remaining, key=lambda m: loss(current + [m]))
+                current = current + [add]
+                remaining.remove(add)
+                path.append(list(current))
+        else:
+            raise ValueError(f"Unknown selection method: {self.method}")
+
+        return [(members, metrics(members)) for members in path]
+
+    def select(self, oof, candidates, latency):
+        """Choose among the candidate oof columns; returns the member list.
+
+        latency: callable([members, ...]) -> single-row ms of each ensemble, see ensemble_latency
+        """
+        path = self.search(oof, [name for name in candidates if name in oof.columns])
+        latencies = latency([members for members, _ in path])
+
+        rows = [{'members': members, 'n_members': len(members), **metrics, 'latency_ms': ms}
+                for (members, metrics), ms in zip(path, latencies)]
+        report = pd.DataFrame(rows)
+
+        objective = report[self.metric] if self.metric == 'log_loss' else -report[self.metric]
+        report['objective'] = objective
+        report['within_tolerance'] = objective <= objective.min() + self.tolerance
+        eligible = report[report['within_tolerance']]
+        fast = eligible[eligible['latency_ms'] <= eligible['latency_ms'].min() * (1 + self.latency_margin)]
+        chosen = fast.sort_values(['n_members', 'objective']).index[0]
+        report = report.drop(columns='objective')
+        report['selected'] = report.index == chosen
+
+        self.report = report
+        self.selected = list(report.loc[chosen, 'members'])
+        return self.selected
+
+    def save_report(self, path="reports/ensemble_selection.csv"):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        report = self.report.copy()
+        report['members'] = report['members'].map(' + '.join)
+        report.to_csv(path, index=False)
+        print(f"✓ Saved ensemble selection to {path}")
+
+
+def ensemble_latency(models, X, n_requests=100, repeats=7, warmup=20, parallel=True, random_state=0):
+    """latency(subsets): median single-row predict_proba ms of the ensemble of each subset's fitted models.
+
+    The ensemble itself is timed because it scores members on a thread
+    pool, so its latency is neither the sum nor the max of theirs. Every
+    ensemble is warmed up first; then each of the repeats rounds times
+    n_requests calls of every subset, in a shuffled order, so drift in
+    machine load hits all subsets alike. The result is the median over
+    all calls.
+    """
+    rows = X[:n_requests]
+
+    def latency(subsets):
+        ensembles = [EnsembleVotingSystem(models={name: models[name] for name in members},
+                                          prefit=True, parallel=parallel) for members in subsets]
+        for ensemble in ensembles:
+            for i in range(min(warmup, len(rows))):
+                ensemble.predict_proba(rows[i:i + 1])
+
+        rng = np.random.default_rng(random_state)
+        timings = [[] for _ in ensembles]
+        for _ in range(repeats):
+            for j in rng.permutation(len(ensembles)):
+                for i in range(len(rows)):
+                    start = time.perf_counter()
+                    ensembles[j].predict_proba(rows[i:i + 1])
+                    timings[j].append((time.perf_counter() - start) * 1000)
+        return [float(np.median(t)) for t in timings]
+    return latency
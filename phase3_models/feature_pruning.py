@@ -0,0 +1,102 @@
+# feature_pruning.py
+import os
+import json
+import numpy as np
+
+
+class FeaturePruner:
+    """Drop constant, near-constant, duplicate and linearly dependent features"""
+
+    def __init__(self, near_constant_share=0.99, dependence_tol=1e-6):
+        """
+        near_constant_share: drop a column whose most frequent value covers at least this share of rows
+        dependence_tol: relative residual below which a column counts as a linear combination of kept ones
+        """
+        self.near_constant_share = near_constant_share
+        self.dependence_tol = dependence_tol
+        self.features = None
+        self.dropped = {}
+
+    def fit(self, X, feature_cols):
+        """Decide which columns of X (training rows only) survive"""
+        X = np.asarray(X, dtype=np.float64)
+        feature_cols = list(feature_cols)
+        self.dropped = {}
+
+        # Constant and near-constant
+        candidates = []
+        for j, col in enumerate(feature_cols):
+            values, counts = np.unique(X[:, j], return_counts=True)
+            if len(values) == 1:
+                self.dropped[col] = {'reason': 'constant'}
+            elif counts.max() / len(X) >= self.near_constant_share:
+                self.dropped[col] = {'reason': 'near_constant'}
+            else:
+                candidates.append(j)
+
+        # Exact duplicates, keeping the first occurrence
+        seen = {}
+        unique = []
+        for j in candidates:
+            key = X[:, j].tobytes()
+            if key in seen:
+                self.dropped[feature_cols[j]] = {'reason': 'duplicate', 'of': [feature_cols[seen[key]]]}
+            else:
+                seen[key] = j
+                unique.append(j)
+
+        # Linear dependence by Gram-Schmidt on centered columns. *_diff columns
+        # go first, so for blue_x, red_x, x_diff it is red_x that gets dropped.
+        order = sorted(unique, key=lambda j: not feature_cols[j].endswith('_diff'))
+        basis, kept = [], []
+        for j in order:
+            x = X[:, j] - X[:, j].mean()
+            r = x.copy()
+            for _ in range(2):  # second pass for numerical stability
+                for q in basis:
+                    r -= (q @ r) * q
+            if np.linalg.norm(r) <= self.dependence_tol * np.linalg.norm(x):
+                coef = np.linalg.lstsq(X[:, kept], X[:, j], rcond=None)[0]
+                # Only name the columns that actually contribute (not float32 noise)
+                scale = 1e-3 * X[:, j].std()
+                self.dropped[feature_cols[j]] = {
+                    'reason': 'linear_combination',
+                    'of': [feature_cols[k] for k, c in zip(kept, coef) if abs(c) * X[:, k].std() > scale]
+                }
+            else:
+                basis.append(r / np.linalg.norm(r))
+                kept.append(j)
+
+        # Survivors keep the original column order
+        self.features = [feature_cols[j] for j in sorted(kept)]
+        return self
+
+    def transform(self, X, feature_cols):
+        """Select the surviving columns of X"""
+        index = {col: j for j, col in enumerate(feature_cols)}
+        return X[:, [index[col] for col in self.features]]
+
+    def summary(self):
+        """Number of dropped columns per reason"""
+        counts = {}
+        for info in self.dropped.values():
+            counts[info['reason']] = counts.get(info['reason'], 0) + 1
+        return counts
+
+    def schema(self):
+        return {'features': self.features, 'dropped': self.dropped}
+
+    def save(self, path="models/feature_schema.json"):
+        """Write the reduced schema next to the model"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.schema(), f, indent=2)
+
+    @classmethod
+    def load(cls, path="models/feature_schema.json"):
+        with open(path) as f:
+            schema = json.load(f)
+        pruner = cls()
+        pruner.features = schema['features']
+        pruner.dropped = schema['dropped']
+        return pruner
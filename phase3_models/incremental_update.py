@@ -0,0 +1,243 @@
+# incremental_update.py
+import copy
+import warnings
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+import lightgbm as lgb
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.metrics import accuracy_score, roc_auc_score, log_loss
+from config.settings import Config
+from phase3_models.model_registry import ModelRegistry, model_inputs
+from phase3_models.ensemble_model import EnsembleVotingSystem
+from phase3_models.distillation import DistilledStudent, _logit
+from phase3_models.out_of_core import BoosterClassifier
+
+# Match-store columns create_game_features indexes directly, and the label
+REQUIRED_GAME_COLUMNS = [f'{side}_champ{i}' for side in ['blue', 'red'] for i in range(1, 6)] + ['blue_win']
+# Columns it reads when present; missing ones get the creator's neutral defaults
+OPTIONAL_GAME_COLUMNS = ['blue_team', 'red_team', 'patch'] + [
+    f'{side}_{pos}' for side in ['blue', 'red'] for pos in ['top', 'jng', 'mid', 'bot', 'sup']]
+
+# Booster parameters that would override the number of new trees
+_ROUND_PARAMS = ['num_iterations', 'num_iteration', 'n_iter', 'num_tree', 'num_trees', 'num_round',
+                 'num_rounds', 'nrounds', 'num_boost_round', 'n_estimators', 'max_iter',
+                 'early_stopping_round', 'early_stopping_rounds', 'early_stopping', 'n_iter_no_change']
+
+
+def continue_training(model, X, y, n_trees=20):
+    """Copy of a fitted model updated on (X, y), or None if it cannot be updated in place.
+
+    Boosted models get n_trees more trees on top of the existing ones;
+    linear models take one SGD pass starting from their current weights.
+    y is a label for classifiers and a target for the regressors of a
+    distilled student.
+    """
+    if isinstance(model, xgb.XGBModel):
+        updated = type(model)(**{**model.get_params(), 'n_estimators': n_trees})
+        return updated.fit(X, y, xgb_model=model.get_booster())
+
+    if isinstance(model, lgb.LGBMModel):
+        updated = type(model)(**{**model.get_params(), 'n_estimators': n_trees})
+        return updated.fit(X, y, init_model=model.booster_)
+
+    if isinstance(model, GradientBoostingClassifier):
+        updated = copy.deepcopy(model)
+        updated.set_params(warm_start=True, n_estimators=model.n_estimators_ + n_trees)
+        return updated.fit(X, y)
+
+    if isinstance(model, xgb.Booster):
+        # The booster keeps its training configuration
+        return xgb.train({}, xgb.DMatrix(np.asarray(X, dtype=np.float32), label=y),
+                         num_boost_round=n_trees, xgb_model=model)
+
+    if isinstance(model, lgb.Booster):
+        params = {k: v for k, v in model.params.items() if k not in _ROUND_PARAMS}
+        return lgb.train(params, lgb.Dataset(np.asarray(X, dtype=np.float32), label=y),
+                         num_boost_round=n_trees, init_model=model)
+
+    if isinstance(model, BoosterClassifier):
+        return BoosterClassifier(continue_training(model.booster, X, y, n_trees))
+
+    if isinstance(model, Pipeline):
+        # Preprocessing stays fixed; only the final estimator learns
+        final = continue_training(model.steps[-1][1], model[:-1].transform(X), y, n_trees)
+        if final is None:
+            return None
+        updated = copy.deepcopy(model)
+        updated.steps[-1] = (updated.steps[-1][0], final)
+        return updated
+
+    if hasattr(model, 'partial_fit'):
+        updated = copy.deepcopy(model)
+        return updated.partial_fit(X, y)
+
+    if isinstance(model, LogisticRegression):
+        # One epoch of SGD on the log loss from the fitted coefficients;
+        # later updates use SGDClassifier.partial_fit
+        updated = SGDClassifier(loss='log_loss', learning_rate='constant', eta0=0.01,
+                                alpha=1 / (model.C * max(len(X), 1)), max_iter=1, tol=None,
+                                random_state=42)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')  # ConvergenceWarning: a single pass is intended
+            return updated.fit(X, y, coef_init=model.coef_, intercept_init=model.intercept_)
+
+    return None
+
+
+def holdout_metrics(model, X, y):
+    proba = model.predict_proba(X)[:, 1]
+    return {
+        'accuracy': accuracy_score(y, (proba > 0.5).astype(int)),
+        'auc': roc_auc_score(y, proba) if len(np.unique(y)) > 1 else np.nan,
+        'log_loss': log_loss(y, np.clip(proba, 1e-7, 1 - 1e-7), labels=[0, 1])
+    }
+
+
+class IncrementalUpdater:
+    """Warm-start the registered models on new games, promoting the result only if a holdout agrees.
+
+    The newest holdout_fraction of the games (by date) is held out. The
+    update is registered as a new version when the serving model's holdout
+    AUC drops by at most max_auc_drop and its log loss rises by at most
+    max_log_loss_rise; otherwise the current version stays. A passing
+    update is redone from the parent on all games, holdout included, so
+    the newest games are not left out of every later model.
+    """
+
+    def __init__(self, registry=None, n_trees=Config.INCREMENTAL_UPDATE_TREES,
+                 max_auc_drop=Config.INCREMENTAL_MAX_AUC_DROP,
+                 max_log_loss_rise=Config.INCREMENTAL_MAX_LOG_LOSS_RISE, holdout_fraction=0.3):
+        self.registry = registry or ModelRegistry(Config.MODEL_REGISTRY_PATH)
+        self.n_trees = n_trees
+        self.max_auc_drop = max_auc_drop
+        self.max_log_loss_rise = max_log_loss_rise
+        self.holdout_fraction = holdout_fraction
+        self._feature_creator = None
+
+    def validate_games(self, games):
+        """Games ready for feature creation: required columns checked, rows missing a pick or result dropped"""
+        missing = [col for col in REQUIRED_GAME_COLUMNS if col not in games.columns]
+        if missing:
+            raise ValueError(f"Games are missing required columns: {missing}")
+        games = games.dropna(subset=REQUIRED_GAME_COLUMNS)
+        return games.assign(**{col: '' for col in OPTIONAL_GAME_COLUMNS if col not in games.columns})
+
+    def game_features(self, games, feature_columns):
+        """(X, y) for games in the match store layout, columns as registered"""
+        if self._feature_creator is None:
+            from phase2_features.advanced_feature_creator import AdvancedFeatureCreator
+            self._feature_creator = AdvancedFeatureCreator()
+
+        rows = [self._feature_creator.create_game_features(game) for _, game in games.iterrows()]
+        X = pd.DataFrame(rows).reindex(columns=feature_columns).fillna(0).to_numpy(dtype=np.float32)
+        return X, games['blue_win'].to_numpy(dtype=np.int32)
+
+    def split(self, games):
+        """(update games, holdout games): the newest games are the holdout"""
+        if 'date' in games.columns:
+            games = games.sort_values('date', kind='stable')
+        n_holdout = max(1, int(round(len(games) * self.holdout_fraction)))
+        return games.iloc[:-n_holdout], games.iloc[-n_holdout:]
+
+    def update_members(self, manifest, X, y):
+        """{member: model} of the version with every updatable member warm-started.
+
+        Ensembles are rebuilt around their updated members, and a distilled
+        student continues on the logits of the updated ensemble.
+        """
+        version = manifest['version']
+        entries = manifest['members']
+        scaler = self.registry.load('scaler', version) if 'scaler' in entries else None
+
+        members, updated = {}, []
+        for name, entry in entries.items():
+            if 'members' in entry or name == 'scaler':
+                continue
+            model = self.registry.load(name, version)
+            if isinstance(model, DistilledStudent):
+                members[name] = model
+                continue
+            new_model = continue_training(model, model_inputs(model, X, scaler), y, self.n_trees)
+            members[name] = new_model if new_model is not None else model
+            if new_model is not None:
+                updated.append(name)
+        if scaler is not None:
+            members['scaler'] = scaler
+
+        for name, entry in entries.items():
+            if 'members' not in entry:
+                continue
+            ensemble = copy.copy(self.registry.load(name, version))
+            ensemble.fitted_models = {member_name: members[ref] for member_name, ref in entry['members'].items()}
+            ensemble.models = dict(ensemble.fitted_models)
+            members[name] = ensemble
+            if any(ref in updated for ref in entry['members'].values()):
+                updated.append(name)
+
+        teacher = next((m for m in members.values() if isinstance(m, EnsembleVotingSystem)), None)
+        for name, model in list(members.items()):
+            if isinstance(model, DistilledStudent) and teacher is not None:
+                regressor = continue_training(model.regressor_, X,
+                                              _logit(teacher.predict_proba(X)[:, 1]), self.n_trees)
+                if regressor is not None:
+                    student = copy.copy(model)
+                    student.regressor_ = regressor
+                    members[name] = student
+                    updated.append(name)
+
+        return members, updated
+
+    def run(self, games):
+        """Update on games (match store layout, blue_win known); returns the update report"""
+        manifest = self.registry.manifest()
+        feature_columns = manifest['feature_columns']
+        serving = manifest['aliases'].get('serving', 'serving')
+
+        n_games = len(games)
+        games = self.validate_games(games)
+        if len(games) < 2:
+            raise ValueError(f"Need at least 2 games for an update and its holdout, got {len(games)}")
+        update_games, holdout_games = self.split(games)
+        X, y = self.game_features(update_games, feature_columns)
+        X_holdout, y_holdout = self.game_features(holdout_games, feature_columns)
+
+        members, updated = self.update_members(manifest, X, y)
+        report = {
+            'parent_version': manifest['version'],
+            'n_update_games': len(update_games),
+            'n_holdout_games': len(holdout_games),
+            'n_skipped_games': n_games - len(games),
+            'n_trees': self.n_trees,
+            'updated_members': updated,
+            'promoted': False,
+            'version': manifest['version']
+        }
+        if serving not in updated:
+            report['reason'] = f"serving model '{serving}' cannot be updated incrementally; needs a full retrain"
+            return report
+
+        current, candidate = self.registry.load(serving, manifest['version']), members[serving]
+        scaler = members.get('scaler')
+        before = holdout_metrics(current, model_inputs(current, X_holdout, scaler), y_holdout)
+        after = holdout_metrics(candidate, model_inputs(candidate, X_holdout, scaler), y_holdout)
+        report['holdout_before'], report['holdout_after'] = before, after
+
+        auc_drop = np.nan_to_num(before['auc'] - after['auc'])  # nan: holdout has a single class
+        if auc_drop > self.max_auc_drop or after['log_loss'] - before['log_loss'] > self.max_log_loss_rise:
+            report['reason'] = "holdout metrics got worse"
+            return report
+
+        # The holdout only decided; the promoted models also learn from it
+        members, report['updated_members'] = self.update_members(
+            manifest, np.vstack([X, X_holdout]), np.concatenate([y, y_holdout]))
+        report['n_refit_games'] = len(games)
+
+        metrics = {**manifest['metrics'], 'incremental_update': {k: v for k, v in report.items()
+                                                                 if k not in ['promoted', 'version']}}
+        report['version'] = self.registry.register(members, feature_columns, manifest['feature_schema'],
+                                                   metrics, aliases=manifest['aliases'])
+        report['promoted'] = True
+        return report
@@ -0,0 +1,100 @@
+# lgb_cache.py
+import os
+import json
+import hashlib
+import numpy as np
+import lightgbm as lgb
+
+CACHE_DIR = "models/cache/lgb"
+
+# Parameters that are fixed once a Dataset is binned (LightGBM defaults).
+# feature_pre_filter is off so one binned dataset serves every min_child_samples.
+DATASET_PARAMS = {
+    'max_bin': 255,
+    'min_data_in_bin': 3,
+    'bin_construct_sample_cnt': 200000,
+    'data_random_seed': 1,
+    'use_missing': True,
+    'zero_as_missing': False,
+    'feature_pre_filter': False
+}
+
+# Aliases a caller may use for the binning parameters above
+_ALIASES = {
+    'subsample_for_bin': 'bin_construct_sample_cnt',
+    'data_seed': 'data_random_seed'
+}
+
+
+def dataset_params(params=None):
+    """The binning parameters in params, over LightGBM's defaults"""
+    binning = dict(DATASET_PARAMS)
+    for key, value in (params or {}).items():
+        key = _ALIASES.get(key, key)
+        if key in binning and key != 'feature_pre_filter':
+            binning[key] = value
+    return binning
+
+
+def array_fingerprint(X, y=None):
+    """sha256 of a matrix (and labels): the same arrays give the same key wherever they come from"""
+    h = hashlib.sha256()
+    X = np.ascontiguousarray(X)
+    h.update(repr((X.shape, X.dtype.str)).encode())
+    h.update(X.tobytes())
+    if y is not None:
+        h.update(np.ascontiguousarray(y, dtype=np.float32).tobytes())
+    return h.hexdigest()[:16]
+
+
+def cached_dataset(X, y, params=None, reference=None, fingerprint=None, cache_dir=None):
+    """Constructed lgb.Dataset, binned once and reloaded from LightGBM's binary format.
+
+    The cache key is the data fingerprint plus the binning parameters (and,
+    for a validation set, the key of the reference it is binned against),
+    so training, tuning and walk-forward folds on the same rows share one
+    file. Returns the Dataset with its key in .cache_key. cache_dir
+    defaults to CACHE_DIR, read at call time.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    binning = dataset_params(params)
+    key = hashlib.sha256(json.dumps({
+        'data': fingerprint or array_fingerprint(X, y),
+        'binning': binning,
+        'reference': getattr(reference, 'cache_key', None)
+    }, sort_keys=True).encode()).hexdigest()[:16]
+    path = os.path.join(cache_dir, f"{key}.bin")
+
+    dataset_kwargs = {**binning, 'verbose': -1}
+    if os.path.exists(path):
+        dataset = lgb.Dataset(path, params=dataset_kwargs, reference=reference)
+    else:
+        dataset = lgb.Dataset(X, label=y, params=dataset_kwargs, reference=reference, free_raw_data=False)
+        dataset.construct()
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = path[:-len('.bin')] + f".{os.getpid()}.tmp"
+        dataset.save_binary(tmp_path)
+        os.replace(tmp_path, path)
+
+    dataset.cache_key = key
+    return dataset
+
+
+def native_params(estimator):
+    """lgb.train parameters and rounds equivalent to an LGBMClassifier's settings"""
+    params = {k: v for k, v in estimator.get_params().items()
+              if v is not None and k not in ['class_weight', 'importance_type', 'n_estimators']}
+    params.setdefault('objective', 'binary')
+    return params, estimator.get_params()['n_estimators']
+
+
+def fit_cached(estimator, X, y, fingerprint=None, cache_dir=None):
+    """Fit an unfitted LGBMClassifier's configuration on the cached dataset of (X, y).
+
+    Returns a BoosterClassifier (predict_proba/predict over the booster).
+    """
+    from phase3_models.out_of_core import BoosterClassifier
+
+    params, rounds = native_params(estimator)
+    dataset = cached_dataset(X, y, params, fingerprint=fingerprint, cache_dir=cache_dir)
+    return BoosterClassifier(lgb.train(params, dataset, num_boost_round=rounds))
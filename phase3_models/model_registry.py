@@ -0,0 +1,199 @@
+# model_registry.py
+import os
+import json
+import copy
+import shutil
+import hashlib
+import threading
+from datetime import datetime
+import joblib
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from phase3_models.data_prep import file_fingerprint
+from phase3_models.ensemble_model import EnsembleVotingSystem
+
+# Process-wide cache of loaded members: {(root, version, member): object}.
+# Versions are immutable, so an entry never goes stale.
+_loaded = {}
+_manifests = {}
+_load_lock = threading.Lock()
+
+# Members trained on StandardScaler output (AdvancedModelTrainer registers the scaler next to them)
+SCALED_MODEL_TYPES = (LogisticRegression, SGDClassifier)
+
+
+def model_inputs(model, X, scaler):
+    """X as a member expects it: scaled for bare linear models registered with a scaler"""
+    if scaler is not None and isinstance(model, SCALED_MODEL_TYPES):
+        return scaler.transform(X)
+    return X
+
+
+class ModelRegistry:
+    """Versioned models under models/registry/<version>/, one file per member.
+
+    Each version has a manifest.json with the content hash, feature schema,
+    metrics, creation time, and aliases such as 'serving' or 'best_model'
+    that name a member. LATEST holds the promoted (served) version id.
+    """
+
+    def __init__(self, root="models/registry"):
+        self.root = root
+
+    def version_dir(self, version):
+        return os.path.join(self.root, version)
+
+    def register(self, members, feature_columns, feature_schema=None, metrics=None, aliases=None,
+                 promote=True):
+        """Save a new version; returns its version id.
+
+        members: {name: fitted object}. An EnsembleVotingSystem is stored
+        without its members, which must be registered alongside it (or are
+        added as '<ensemble>.<member>') and are loaded on demand.
+        promote: make it the served version (LATEST). Unpromoted versions
+        can be promoted later; until one is, nothing is served.
+        """
+        members = dict(members)
+        stored = {}
+
+        for name, model in list(members.items()):
+            if isinstance(model, EnsembleVotingSystem):
+                refs = {}
+                for member_name, member in model.fitted_models.items():
+                    ref = next((n for n, m in members.items() if m is member), None)
+                    if ref is None:
+                        ref = f"{name}.{member_name}"
+                        members[ref] = member
+                        stored[ref] = (member, None)
+                    refs[member_name] = ref
+                shell = copy.copy(model)
+                shell.models = {}
+                shell.fitted_models = {}
+                stored[name] = (shell, refs)
+            else:
+                stored.setdefault(name, (model, None))
+
+        os.makedirs(self.root, exist_ok=True)
+        tmp_dir = os.path.join(self.root, f".tmp-{os.getpid()}-{threading.get_ident()}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        entries = {}
+        for name, (obj, refs) in sorted(stored.items()):
+            filename = f"{name}.joblib"
+            path = os.path.join(tmp_dir, filename)
+            joblib.dump(obj, path)
+            entries[name] = {'file': filename, 'sha256': file_fingerprint(path),
+                             'bytes': os.path.getsize(path)}
+            if refs:
+                entries[name]['members'] = refs
+
+        content_hash = hashlib.sha256(
+            json.dumps({name: entry['sha256'] for name, entry in entries.items()}, sort_keys=True).encode()
+        ).hexdigest()
+
+        # Identical content is already registered: reuse that version
+        for version in self.list_versions():
+            if self.manifest(version)['content_hash'] == content_hash:
+                shutil.rmtree(tmp_dir)
+                if promote:
+                    self.set_latest(version)
+                return version
+
+        created_at = datetime.now()
+        version = f"{created_at:%Y%m%d-%H%M%S}-{content_hash[:8]}"
+        manifest = {
+            'version': version,
+            'created_at': created_at.isoformat(),
+            'content_hash': content_hash,
+            'members': entries,
+            'aliases': aliases or {},
+            'feature_columns': list(feature_columns),
+            'feature_schema': feature_schema,
+            'metrics': metrics or {}
+        }
+        with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2, default=float)
+
+        os.replace(tmp_dir, self.version_dir(version))
+        if promote:
+            self.set_latest(version)
+        return version
+
+    def promote(self, version):
+        """Serve a registered version"""
+        self.set_latest(self.manifest(version)['version'])
+        return version
+
+    def list_versions(self):
+        """Version ids, oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.exists(os.path.join(self.root, name, 'manifest.json')))
+
+    def set_latest(self, version):
+        tmp_path = os.path.join(self.root, 'LATEST.tmp')
+        with open(tmp_path, 'w') as f:
+            f.write(version)
+        os.replace(tmp_path, os.path.join(self.root, 'LATEST'))
+
+    def latest_version(self):
+        """Served version id, or None if no version has been promoted"""
+        path = os.path.join(self.root, 'LATEST')
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return f.read().strip()
+
+    def manifest(self, version=None):
+        version = version or self.latest_version()
+        if version is None:
+            registered = self.list_versions()
+            if registered:
+                raise FileNotFoundError(f"No served model version in {self.root}; promote one of {registered}")
+            raise FileNotFoundError(f"No model versions registered in {self.root}")
+        key = (os.path.abspath(self.root), version)
+        if key not in _manifests:
+            with open(os.path.join(self.version_dir(version), 'manifest.json')) as f:
+                _manifests[key] = json.load(f)
+        return _manifests[key]
+
+    def load(self, name='serving', version=None):
+        """Load one member (or alias) of a version, memoized for the process.
+
+        Only that member's file is read; an ensemble also loads its members.
+        """
+        manifest = self.manifest(version)
+        version = manifest['version']
+        name = manifest['aliases'].get(name, name)
+        key = (os.path.abspath(self.root), version, name)
+
+        with _load_lock:
+            if key in _loaded:
+                return _loaded[key]
+
+        entry = manifest['members'][name]
+        path = os.path.join(self.version_dir(version), entry['file'])
+        obj = joblib.load(path)
+
+        if 'members' in entry:
+            obj.fitted_models = {member_name: self.load(ref, version)
+                                 for member_name, ref in entry['members'].items()}
+            obj.models = dict(obj.fitted_models)
+
+        with _load_lock:
+            return _loaded.setdefault(key, obj)
+
+    def input_scaler(self, name='serving', version=None):
+        """Scaler to apply to a member's inputs, or None when it takes raw features"""
+        manifest = self.manifest(version)
+        if 'scaler' not in manifest['members']:
+            return None
+        if not isinstance(self.load(name, manifest['version']), SCALED_MODEL_TYPES):
+            return None
+        return self.load('scaler', manifest['version'])
+
+    def load_serving(self, version=None):
+        """(served model, manifest) of a version, latest by default"""
+        manifest = self.manifest(version)
+        return self.load('serving', manifest['version']), manifest
@@ -1,9 +1,7 @@
 # neural_network_model.py
-import tensorflow as tf
-from tensorflow import keras
-from tensorflow.keras import layers
 import numpy as np
 from sklearn.preprocessing import StandardScaler
+from phase3_models.numpy_network import NumpyNetwork
 
 class NeuralNetworkPredictor:
     def __init__(self):
@@ -13,6 +11,10 @@ class NeuralNetworkPredictor:
         
     def build_model(self, input_dim):
         """Build neural network architecture"""
+        # TensorFlow is only needed for training; serving uses the numpy export
+        from tensorflow import keras
+        from tensorflow.keras import layers
+        
         model = keras.Sequential([
             # Input layer
             layers.Input(shape=(input_dim,)),
@@ -42,15 +44,25 @@ class NeuralNetworkPredictor:
         model.compile(
             optimizer=keras.optimizers.Adam(learning_rate=0.001),
             loss='binary_crossentropy',
-            metrics=['accuracy', tf.keras.metrics.AUC(name='auc')]
+            metrics=['accuracy', keras.metrics.AUC(name='auc')]
         )
         
         return model
     
-    def train(self, X_train, y_train, X_val, y_val, epochs=100):
-        """Train the neural network"""
+    def train(self, X_train, y_train, X_val, y_val, epochs=100, scaler=None):
+        """Train the neural network
+
+        scaler: an already fitted StandardScaler (e.g. PreparedData.scaler)
+        to reuse instead of refitting one on X_train
+        """
+        from tensorflow import keras
+        
         # Scale features
-        X_train_scaled = self.scaler.fit_transform(X_train)
+        if scaler is not None:
+            self.scaler = scaler
+            X_train_scaled = self.scaler.transform(X_train)
+        else:
+            X_train_scaled = self.scaler.fit_transform(X_train)
         X_val_scaled = self.scaler.transform(X_val)
         
         # Build model
@@ -100,3 +112,30 @@ class NeuralNetworkPredictor:
         """Make predictions"""
         X_scaled = self.scaler.transform(X)
         return self.model.predict(X_scaled)
+    
+    def export_layers(self):
+        """Inference-mode weights of the trained Keras layers as plain arrays"""
+        exported = []
+        for layer in self.model.layers:
+            kind = type(layer).__name__
+            if kind == 'Dense':
+                kernel, bias = layer.get_weights()
+                exported.append({'type': 'dense', 'kernel': kernel, 'bias': bias,
+                                 'activation': layer.get_config()['activation']})
+            elif kind == 'BatchNormalization':
+                gamma, beta, mean, variance = layer.get_weights()
+                exported.append({'type': 'batchnorm', 'gamma': gamma, 'beta': beta, 'mean': mean,
+                                 'variance': variance, 'epsilon': layer.epsilon})
+            elif kind not in ['Dropout', 'InputLayer']:
+                raise ValueError(f"Cannot export layer {layer.name} ({kind})")
+        return exported
+    
+    def export_numpy(self, path="models/neural_network.npz"):
+        """Fold scaler + Dense/BatchNormalization into one compressed weights file.
+        
+        Load it with NumpyNetwork.load(path); no TensorFlow needed to serve it.
+        """
+        network = NumpyNetwork.from_layers(self.export_layers(), self.scaler.mean_, self.scaler.scale_)
+        network.save(path)
+        print(f"✓ Exported TensorFlow-free network to {path}")
+        return network
@@ -0,0 +1,112 @@
+# numpy_network.py
+import os
+import numpy as np
+
+ACTIVATIONS = {
+    'linear': lambda z: z,
+    'relu': lambda z: np.maximum(z, 0),
+    'tanh': np.tanh,
+    'sigmoid': lambda z: 1 / (1 + np.exp(-z))
+}
+
+
+def fold_layers(layers, scaler_mean=None, scaler_scale=None):
+    """Fold a scaler and inference-mode BatchNormalization into dense layers.
+
+    layers: list of dicts, either
+      {'type': 'dense', 'kernel', 'bias', 'activation'} or
+      {'type': 'batchnorm', 'gamma', 'beta', 'mean', 'variance', 'epsilon'}
+    (dropout is the identity at inference and is simply left out).
+    Returns [(W, b, activation)] with the same outputs.
+    """
+    dense = []
+    pending = None  # (scale, shift) to apply to the input of the next dense layer
+
+    if scaler_mean is not None:
+        scale = 1 / np.asarray(scaler_scale, dtype=np.float64)
+        pending = (scale, -np.asarray(scaler_mean, dtype=np.float64) * scale)
+
+    for layer in layers:
+        if layer['type'] == 'dense':
+            W = np.asarray(layer['kernel'], dtype=np.float64)
+            b = np.asarray(layer['bias'], dtype=np.float64)
+            if pending is not None:
+                scale, shift = pending
+                b = b + shift @ W
+                W = scale[:, None] * W
+                pending = None
+            dense.append([W, b, layer['activation']])
+
+        elif layer['type'] == 'batchnorm':
+            scale = np.asarray(layer['gamma'], dtype=np.float64) / np.sqrt(
+                np.asarray(layer['variance'], dtype=np.float64) + layer['epsilon'])
+            shift = np.asarray(layer['beta'], dtype=np.float64) - np.asarray(layer['mean']) * scale
+
+            if dense and pending is None and dense[-1][2] == 'linear':
+                # Straight after a linear dense layer: fold into its outputs
+                dense[-1][0] = dense[-1][0] * scale
+                dense[-1][1] = dense[-1][1] * scale + shift
+            elif pending is not None:
+                pending = (pending[0] * scale, pending[1] * scale + shift)
+            else:
+                # After a nonlinearity: fold into the next dense layer's inputs
+                pending = (scale, shift)
+
+        else:
+            raise ValueError(f"Cannot fold layer type: {layer['type']}")
+
+    if pending is not None:
+        # Trailing affine with no dense layer after it
+        scale, shift = pending
+        dense.append([np.diag(scale), shift, 'linear'])
+
+    return [(W, b, activation) for W, b, activation in dense]
+
+
+class NumpyNetwork:
+    """Forward pass of an exported network using only numpy"""
+
+    def __init__(self, weights, biases, activations):
+        self.weights = weights
+        self.biases = biases
+        self.activations = activations
+
+    @classmethod
+    def from_layers(cls, layers, scaler_mean=None, scaler_scale=None, dtype=np.float32):
+        folded = fold_layers(layers, scaler_mean, scaler_scale)
+        return cls([W.astype(dtype) for W, _, _ in folded],
+                   [b.astype(dtype) for _, b, _ in folded],
+                   [activation for _, _, activation in folded])
+
+    def save(self, path="models/neural_network.npz"):
+        """All weights in one compressed file"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        arrays = {}
+        for i, (W, b) in enumerate(zip(self.weights, self.biases)):
+            arrays[f'W{i}'] = W
+            arrays[f'b{i}'] = b
+        np.savez_compressed(path, activations=np.array(self.activations), **arrays)
+
+    @classmethod
+    def load(cls, path="models/neural_network.npz"):
+        data = np.load(path)
+        activations = [str(a) for a in data['activations']]
+        return cls([data[f'W{i}'] for i in range(len(activations))],
+                   [data[f'b{i}'] for i in range(len(activations))],
+                   activations)
+
+    def forward(self, X):
+        """Raw network output for unscaled features"""
+        h = np.asarray(X, dtype=self.weights[0].dtype)
+        for W, b, activation in zip(self.weights, self.biases, self.activations):
+            h = ACTIVATIONS[activation](h @ W + b)
+        return h
+
+    def predict_proba(self, X):
+        proba = self.forward(X)[:, 0]
+        return np.vstack([1 - proba, proba]).T
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] > 0.5).astype(int)
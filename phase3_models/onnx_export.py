@@ -0,0 +1,205 @@
+# onnx_export.py
+import os
+import time
+import numpy as np
+import pandas as pd
+import joblib
+from phase3_models.distillation import DistilledStudent
+
+TARGET_OPSET = {'': 17, 'ai.onnx.ml': 3}
+
+_converters_registered = False
+
+
+def _register_converters():
+    """Teach skl2onnx about XGBoost and LightGBM (onnxmltools converters)"""
+    global _converters_registered
+    if _converters_registered:
+        return
+
+    import xgboost as xgb
+    import lightgbm as lgb
+    from skl2onnx import update_registered_converter
+    from skl2onnx.common.shape_calculator import (calculate_linear_classifier_output_shapes,
+                                                  calculate_linear_regressor_output_shapes)
+    from onnxmltools.convert.xgboost.operator_converters.XGBoost import convert_xgboost
+    from onnxmltools.convert.lightgbm.operator_converters.LightGbm import convert_lightgbm
+
+    classifier_options = {'nocl': [True, False], 'zipmap': [True, False, 'columns']}
+    update_registered_converter(xgb.XGBClassifier, 'XGBoostXGBClassifier',
+                                calculate_linear_classifier_output_shapes, convert_xgboost,
+                                options=classifier_options)
+    update_registered_converter(lgb.LGBMClassifier, 'LightGbmLGBMClassifier',
+                                calculate_linear_classifier_output_shapes, convert_lightgbm,
+                                options=classifier_options)
+    update_registered_converter(lgb.LGBMRegressor, 'LightGbmLGBMRegressor',
+                                calculate_linear_regressor_output_shapes, convert_lightgbm,
+                                options={'split': None})
+    _converters_registered = True
+
+
+def model_to_onnx(model, n_features):
+    """Serialized ONNX graph of one fitted model.
+
+    Classifiers output class probabilities; a DistilledStudent exports its
+    regressor, whose logit output OnnxModel turns back into a probability.
+    """
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+
+    _register_converters()
+
+    estimator = model.regressor_ if isinstance(model, DistilledStudent) else model
+    options = None if isinstance(model, DistilledStudent) else {id(estimator): {'zipmap': False}}
+
+    onnx_model = convert_sklearn(estimator, initial_types=[('input', FloatTensorType([None, n_features]))],
+                                 options=options, target_opset=TARGET_OPSET)
+    return onnx_model.SerializeToString()
+
+
+class OnnxModel:
+    """onnxruntime CPU session with the predict_proba/predict interface of the native model"""
+
+    def __init__(self, path, intra_op_threads=1):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = 1
+        self.path = path
+        self.session = ort.InferenceSession(path, sess_options=options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        # Classifier graphs output (label, probabilities); a regressor (the
+        # distilled student) outputs a single logit tensor
+        outputs = self.session.get_outputs()
+        self.output_name = outputs[-1].name
+        self.logit_output = len(outputs) == 1
+
+    def predict_proba(self, X):
+        """Batch inference; X is any (n, n_features) array"""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        result = self.session.run([self.output_name], {self.input_name: X})[0]
+        if self.logit_output:
+            proba = 1 / (1 + np.exp(-result.reshape(-1).astype(np.float64)))
+            return np.vstack([1 - proba, proba]).T
+        return result
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] > 0.5).astype(int)
+
+
+def onnx_path(registry, name, version=None):
+    manifest = registry.manifest(version)
+    name = manifest['aliases'].get(name, name)
+    return os.path.join(registry.version_dir(manifest['version']), 'onnx', f"{name}.onnx")
+
+
+def export_registry_onnx(registry, names=('best_model', 'ensemble'), version=None):
+    """Write <version>/onnx/<member>.onnx for the given members or aliases.
+
+    An ensemble is exported member by member; returns the written paths.
+    """
+    manifest = registry.manifest(version)
+    n_features = len(manifest['feature_columns'])
+
+    members = []
+    for name in names:
+        name = manifest['aliases'].get(name, name)
+        refs = manifest['members'][name].get('members')
+        members.extend(refs.values() if refs else [name])
+
+    written = []
+    for name in dict.fromkeys(members):
+        path = onnx_path(registry, name, manifest['version'])
+        if os.path.exists(path):
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # A failed export leaves no partial file in the cache
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(model_to_onnx(registry.load(name, manifest['version']), n_features))
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        written.append(path)
+    return written
+
+
+def load_onnx_model(registry, name='serving', version=None, intra_op_threads=1):
+    """ONNX counterpart of registry.load(name), exporting on first use.
+
+    An ensemble keeps its blending logic and weights but runs every member
+    through onnxruntime; the native members are never loaded.
+    """
+    manifest = registry.manifest(version)
+    version = manifest['version']
+    name = manifest['aliases'].get(name, name)
+    export_registry_onnx(registry, [name], version)
+
+    entry = manifest['members'][name]
+    if 'members' not in entry:
+        return OnnxModel(onnx_path(registry, name, version), intra_op_threads)
+
+    ensemble = joblib.load(os.path.join(registry.version_dir(version), entry['file']))
+    ensemble.fitted_models = {member_name: OnnxModel(onnx_path(registry, ref, version), intra_op_threads)
+                              for member_name, ref in entry['members'].items()}
+    ensemble.models = dict(ensemble.fitted_models)
+    return ensemble
+
+
+def benchmark_onnx(registry, features_path="data/enhanced/advanced_features.csv",
+                   names=('best_model', 'ensemble', 'serving'), intra_op_threads=1, n_single=200):
+    """Parity and speed of onnxruntime vs native predict_proba on the feature table"""
+    manifest = registry.manifest()
+    feature_cols = manifest['feature_columns']
+    X = pd.read_csv(features_path, usecols=feature_cols)[feature_cols].fillna(0).to_numpy(dtype=np.float32)
+
+    rows = []
+    for name in names:
+        native = registry.load(name)
+        onnx = load_onnx_model(registry, name, intra_op_threads=intra_op_threads)
+
+        row = {'model': f"{name} ({manifest['aliases'].get(name, name)})", 'rows': len(X)}
+        for backend, model in [('native', native), ('onnx', onnx)]:
+            start = time.perf_counter()
+            proba = model.predict_proba(X)[:, 1]
+            row[f'{backend}_batch_ms'] = (time.perf_counter() - start) * 1000
+
+            timings = []
+            for i in range(min(n_single, len(X))):
+                start = time.perf_counter()
+                model.predict_proba(X[i:i + 1])
+                timings.append((time.perf_counter() - start) * 1000)
+            row[f'{backend}_single_ms'] = float(np.median(timings))
+            row[f'{backend}_proba'] = proba
+
+        native_proba, onnx_proba = row.pop('native_proba'), row.pop('onnx_proba')
+        row['max_abs_diff'] = float(np.abs(native_proba - onnx_proba).max())
+        row['label_agreement'] = float(np.mean((native_proba > 0.5) == (onnx_proba > 0.5)))
+        rows.append(row)
+
+    return pd.DataFrame(rows).set_index('model')
+
+
+def run_onnx_benchmark(intra_op_threads=1, path="reports/onnx/benchmark.csv"):
+    from config.settings import Config
+    from phase3_models.model_registry import ModelRegistry
+
+    print("="*60)
+    print("ONNX RUNTIME BENCHMARK")
+    print("="*60)
+
+    registry = ModelRegistry(Config.MODEL_REGISTRY_PATH)
+    report = benchmark_onnx(registry, intra_op_threads=intra_op_threads)
+    print(report.to_string(float_format='{:.4g}'.format))
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    report.to_csv(path)
+    print(f"✓ Saved benchmark to {path}")
+    return report
+
+
+if __name__ == "__main__":
+    run_onnx_benchmark()
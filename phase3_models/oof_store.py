@@ -0,0 +1,248 @@
+# oof_store.py
+import os
+import json
+import sqlite3
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+# Columns of the wide out-of-fold table that are not model probabilities
+OOF_COLUMNS = ['gameid', 'blue_win', 'fold']
+
+
+class OOFPredictionStore:
+    """Indexed SQLite table of walk-forward out-of-fold probabilities, one row per game and model.
+
+    Rows belong to a run, keyed by the walk-forward feature fingerprint and
+    the model specs, so changing the features or a model's configuration
+    misses the table and is recomputed. Registry versions point at the run
+    their members were validated with; (gameid, run) is indexed for joins.
+    """
+
+    def __init__(self, db_path="models/cache/oof_predictions.db"):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.create_tables()
+
+    def create_tables(self):
+        """Create run, prediction and version tables"""
+        self.conn.executescript("""
+        CREATE TABLE IF NOT EXISTS runs (
+            run_key TEXT PRIMARY KEY,
+            features_fingerprint TEXT,
+            models TEXT,
+            n_games INTEGER,
+            created_at TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS predictions (
+            run_key TEXT,
+            model TEXT,
+            gameid TEXT,
+            position INTEGER,
+            fold INTEGER,
+            blue_win INTEGER,
+            probability REAL,
+            PRIMARY KEY (run_key, model, gameid)
+        ) WITHOUT ROWID;
+
+        CREATE INDEX IF NOT EXISTS idx_predictions_gameid
+            ON predictions (gameid, run_key, model);
+
+        CREATE TABLE IF NOT EXISTS versions (
+            model_version TEXT PRIMARY KEY,
+            run_key TEXT,
+            linked_at TEXT
+        );
+        """)
+        self.conn.commit()
+
+    def has_run(self, run_key):
+        row = self.conn.execute("SELECT 1 FROM runs WHERE run_key = ?", (run_key,)).fetchone()
+        return row is not None
+
+    def save_run(self, run_key, oof, features_fingerprint=None):
+        """Replace a run with a wide OOF table (gameid, blue_win, fold, one column per model)"""
+        models = [col for col in oof.columns if col not in OOF_COLUMNS]
+        rows = [
+            (run_key, model, str(gameid), position, int(fold), int(blue_win), float(probability))
+            for model in models
+            for position, (gameid, fold, blue_win, probability)
+            in enumerate(zip(oof['gameid'], oof['fold'], oof['blue_win'], oof[model]))
+        ]
+        with self.conn:
+            self.conn.execute("DELETE FROM predictions WHERE run_key = ?", (run_key,))
+            self.conn.executemany("INSERT INTO predictions VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self.conn.execute("INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?)",
+                              (run_key, features_fingerprint, json.dumps(models), len(oof),
+                               datetime.now().isoformat()))
+
+    def run_table(self, run_key, models=None):
+        """Wide OOF table of a run in walk-forward order, optionally limited to some models"""
+        query = "SELECT model, gameid, position, fold, blue_win, probability FROM predictions WHERE run_key = ?"
+        params = [run_key]
+        if models is not None:
+            query += f" AND model IN ({', '.join('?' * len(models))})"
+            params += list(models)
+        long = pd.read_sql_query(query, self.conn, params=params)
+        if long.empty:
+            return pd.DataFrame(columns=OOF_COLUMNS + list(models or []))
+
+        wide = long.pivot(index=['position', 'gameid', 'blue_win', 'fold'], columns='model', values='probability')
+        wide = wide.reset_index().sort_values('position').drop(columns='position')
+        wide.columns.name = None
+        return wide.reset_index(drop=True)
+
+    def link_version(self, model_version, run_key):
+        """Record that a registry version's members were validated by run_key; returns the run it replaced"""
+        previous = self.version_run(model_version)
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO versions VALUES (?, ?, ?)",
+                              (model_version, run_key, datetime.now().isoformat()))
+        return previous if previous != run_key else None
+
+    def version_run(self, model_version):
+        row = self.conn.execute("SELECT run_key FROM versions WHERE model_version = ?",
+                                (model_version,)).fetchone()
+        return row['run_key'] if row else None
+
+    def probabilities(self, gameids, model, run_key):
+        """Series of one model's OOF probability indexed by gameid (missing games are absent)"""
+        gameids = [str(g) for g in gameids]
+        frames = []
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(gameids), 900):
+            chunk = gameids[start:start + 900]
+            frames.append(pd.read_sql_query(
+                f"SELECT gameid, probability FROM predictions "
+                f"WHERE run_key = ? AND model = ? AND gameid IN ({', '.join('?' * len(chunk))})",
+                self.conn, params=[run_key, model] + chunk))
+        result = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['gameid', 'probability'])
+        return result.set_index('gameid')['probability']
+
+    def drop_unlinked(self, run_keys):
+        """Delete those of run_keys that no registry version points at; returns how many"""
+        linked = {row['run_key'] for row in self.conn.execute("SELECT run_key FROM versions")}
+        stale = [run_key for run_key in dict.fromkeys(run_keys) if run_key and run_key not in linked]
+        with self.conn:
+            for run_key in stale:
+                self.conn.execute("DELETE FROM predictions WHERE run_key = ?", (run_key,))
+                self.conn.execute("DELETE FROM runs WHERE run_key = ?", (run_key,))
+        return len(stale)
+
+    def close(self):
+        self.conn.close()
+
+
+def model_specs_from_members(members):
+    """Walk-forward specs {name: (class, params)} reproducing fitted members' configuration.
+
+    Ensembles and distilled students are derived from other members and are
+    skipped, as are models without get_params (raw boosters). Threads are
+    limited to one because folds run in parallel.
+    """
+    from sklearn.base import clone
+    from phase3_models.ensemble_model import EnsembleVotingSystem
+    from phase3_models.distillation import DistilledStudent
+
+    specs = {}
+    for name, model in members.items():
+        if isinstance(model, (EnsembleVotingSystem, DistilledStudent)):
+            continue
+        if not (hasattr(model, 'get_params') and hasattr(model, 'predict_proba')):
+            continue
+        params = clone(model).get_params(deep=False)
+        if 'n_jobs' in params:
+            params['n_jobs'] = 1
+        specs[name] = (type(model), params)
+    return specs
+
+
+def ensemble_oof(ensemble, oof, member_refs):
+    """An ensemble's blend of the OOF member columns; member_refs maps member name -> column.
+
+    A stacking meta-learner was itself fitted on these predictions, so its
+    column is in-sample for the meta-learner (not for the base models).
+    """
+    columns = {name: oof[ref].to_numpy() for name, ref in member_refs.items()}
+    return ensemble.blend(columns)
+
+
+def version_oof(version=None, registry=None, store=None, dated_df=None):
+    """OOF table of a registry version, recomputing the walk-forward run only when it is stale.
+
+    The run key is derived from the version's feature columns, the current
+    feature values and the members' configurations, so a change to any of
+    them invalidates the cached rows. Ensemble columns are blended from
+    their members' OOF probabilities.
+    """
+    from config.settings import Config
+    from phase3_models.model_registry import ModelRegistry
+    from phase3_models.walk_forward import WalkForwardValidator, load_dated_features, META_COLUMNS
+
+    registry = registry or ModelRegistry(Config.MODEL_REGISTRY_PATH)
+    store = store or OOFPredictionStore()
+    manifest = registry.manifest(version)
+    version = manifest['version']
+    entries = manifest['members']
+
+    base_names = [name for name, entry in entries.items() if 'members' not in entry and name != 'scaler']
+    specs = model_specs_from_members({name: registry.load(name, version) for name in base_names})
+    if not specs:
+        raise ValueError(f"Version {version} has no members that can be refit walk-forward")
+
+    dated_df = load_dated_features() if dated_df is None else dated_df
+    validator = WalkForwardValidator(dated_df[META_COLUMNS + manifest['feature_columns']], oof_store=store)
+    oof = validator.oof_predictions(specs)
+    # Only the run this version was relinked away from is dropped; other cached runs stay
+    replaced = store.link_version(version, validator.run_key(specs))
+    store.drop_unlinked([replaced])
+
+    for name, entry in entries.items():
+        if 'members' in entry and all(ref in oof.columns for ref in entry['members'].values()):
+            oof[name] = ensemble_oof(registry.load(name, version), oof, entry['members'])
+    return oof
+
+
+def calibration_table(oof, model, n_bins=10):
+    """Reliability bins of one model's OOF probabilities: mean predicted vs observed blue win rate"""
+    bins = np.clip((oof[model].to_numpy() * n_bins).astype(int), 0, n_bins - 1)
+    table = (pd.DataFrame({'bin': bins, 'predicted': oof[model], 'observed': oof['blue_win']})
+             .groupby('bin').agg(predicted=('predicted', 'mean'), observed=('observed', 'mean'),
+                                 games=('observed', 'size'))
+             .reset_index())
+    table['bin_start'] = table['bin'] / n_bins
+    return table[['bin_start', 'predicted', 'observed', 'games']]
+
+
+def save_calibration_report(path="reports/calibration.json", version=None, n_bins=10, oof=None):
+    """Write each model's reliability bins for a version, as served by /api/calibration"""
+    from config.settings import Config
+    from phase3_models.model_registry import ModelRegistry
+
+    version = ModelRegistry(Config.MODEL_REGISTRY_PATH).manifest(version)['version']
+    oof = version_oof(version) if oof is None else oof
+    report = {
+        'version': version,
+        'created_at': datetime.now().isoformat(),
+        'n_games': len(oof),
+        'models': {model: calibration_table(oof, model, n_bins).to_dict('records')
+                   for model in oof.columns if model not in OOF_COLUMNS}
+    }
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(report, f, indent=2)
+    os.replace(path + '.tmp', path)
+    print(f"✓ Saved calibration report to {path}")
+    return report
+
+
+if __name__ == "__main__":
+    table = version_oof()
+    print(f"✓ Out-of-fold table: {len(table)} games, models: "
+          f"{', '.join(col for col in table.columns if col not in OOF_COLUMNS)}")
+    save_calibration_report(oof=table)
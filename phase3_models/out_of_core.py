@@ -0,0 +1,234 @@
+# out_of_core.py
+import os
+import json
+import zlib
+import shutil
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+import lightgbm as lgb
+from sklearn.metrics import roc_auc_score
+from phase3_models.data_prep import NON_FEATURE_COLUMNS, file_fingerprint
+from phase3_models.lgb_cache import dataset_params
+
+
+def is_test_game(gameid, test_fraction=0.2):
+    """Deterministic hold-out by gameid hash, so the split needs no shuffle in memory"""
+    return zlib.crc32(str(gameid).encode()) % 1000 < test_fraction * 1000
+
+
+class FeatureChunks:
+    """Feature table stored as fixed-size float32 .npy chunks, split into train/test.
+
+    Chunks are memory-mapped when read, so only one chunk needs to be in RAM.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, 'chunks.json')) as f:
+            self.meta = json.load(f)
+        self.feature_cols = self.meta['feature_cols']
+
+    @classmethod
+    def from_csv(cls, features_path="data/enhanced/advanced_features.csv",
+                 cache_dir="models/cache/chunks", feature_cols=None, chunksize=100000, test_fraction=0.2):
+        """Stream a feature CSV into chunk files (cached by file fingerprint)"""
+        if feature_cols is None:
+            header = pd.read_csv(features_path, nrows=0).columns
+            feature_cols = [col for col in header if col not in NON_FEATURE_COLUMNS]
+        feature_cols = list(feature_cols)
+
+        key = f"{file_fingerprint(features_path)[:12]}_{zlib.crc32(json.dumps(feature_cols).encode()):08x}"
+        directory = os.path.join(cache_dir, key)
+        if os.path.exists(os.path.join(directory, 'chunks.json')):
+            return cls(directory)
+
+        writer = ChunkWriter(directory + '.tmp', feature_cols, chunksize)
+        reader = pd.read_csv(features_path, usecols=feature_cols + NON_FEATURE_COLUMNS,
+                             dtype={'gameid': str}, chunksize=chunksize)
+        for df in reader:
+            test = df['gameid'].map(lambda g: is_test_game(g, test_fraction)).to_numpy()
+            X = df[feature_cols].fillna(0).to_numpy(dtype=np.float32)
+            y = df['blue_win'].to_numpy(dtype=np.float32)
+            writer.append('train', X[~test], y[~test])
+            writer.append('test', X[test], y[test])
+        writer.close()
+
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(directory + '.tmp', directory)
+        return cls(directory)
+
+    def chunk_paths(self, split):
+        return [(os.path.join(self.directory, f"{name}_X.npy"), os.path.join(self.directory, f"{name}_y.npy"))
+                for name in self.meta['chunks'][split]]
+
+    def iter_chunks(self, split):
+        """(X, y) per chunk, memory-mapped"""
+        for X_path, y_path in self.chunk_paths(split):
+            yield np.load(X_path, mmap_mode='r'), np.load(y_path, mmap_mode='r')
+
+    def n_rows(self, split):
+        return self.meta['rows'][split]
+
+
+class ChunkWriter:
+    """Buffer rows per split and flush them as .npy chunks of chunksize rows"""
+
+    def __init__(self, directory, feature_cols, chunksize=100000):
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+        self.directory = directory
+        self.chunksize = chunksize
+        self.meta = {'feature_cols': list(feature_cols), 'chunks': {'train': [], 'test': []},
+                     'rows': {'train': 0, 'test': 0}}
+        self.buffers = {'train': [], 'test': []}
+
+    def append(self, split, X, y):
+        if len(X) == 0:
+            return
+        self.buffers[split].append((X, y))
+        if sum(len(b[0]) for b in self.buffers[split]) >= self.chunksize:
+            self.flush(split)
+
+    def flush(self, split):
+        if not self.buffers[split]:
+            return
+        X = np.concatenate([b[0] for b in self.buffers[split]])
+        y = np.concatenate([b[1] for b in self.buffers[split]])
+        self.buffers[split] = []
+
+        name = f"{split}_{len(self.meta['chunks'][split]):05d}"
+        np.save(os.path.join(self.directory, f"{name}_X.npy"), X)
+        np.save(os.path.join(self.directory, f"{name}_y.npy"), y)
+        self.meta['chunks'][split].append(name)
+        self.meta['rows'][split] += len(X)
+
+    def close(self):
+        for split in self.buffers:
+            self.flush(split)
+        with open(os.path.join(self.directory, 'chunks.json'), 'w') as f:
+            json.dump(self.meta, f, indent=2)
+
+
+class XGBChunkIter(xgb.DataIter):
+    """Feeds one chunk at a time to XGBoost's external-memory DMatrix"""
+
+    def __init__(self, chunks, split='train', cache_prefix="models/cache/xgb_extmem"):
+        self.paths = chunks.chunk_paths(split)
+        self.position = 0
+        os.makedirs(os.path.dirname(cache_prefix) or '.', exist_ok=True)
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self.position == len(self.paths):
+            return False
+        X_path, y_path = self.paths[self.position]
+        input_data(data=np.load(X_path), label=np.load(y_path))
+        self.position += 1
+        return True
+
+    def reset(self):
+        self.position = 0
+
+
+class ChunkSequence(lgb.Sequence):
+    """A chunk file as a LightGBM Sequence, read in batches while binning.
+
+    Rows are read with pread rather than a memory map: LightGBM samples
+    rows from all over the file, and mapped pages would count towards RSS.
+    """
+
+    def __init__(self, X_path, batch_size=10000):
+        with open(X_path, 'rb') as f:
+            version = np.lib.format.read_magic(f)
+            read_header = (np.lib.format.read_array_header_1_0 if version == (1, 0)
+                           else np.lib.format.read_array_header_2_0)
+            self.shape, _, self.dtype = read_header(f)
+            self.offset = f.tell()
+        self.path = X_path
+        self.row_bytes = self.shape[1] * self.dtype.itemsize
+        self.batch_size = batch_size
+
+    def read_rows(self, start, stop):
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            buffer = os.pread(fd, (stop - start) * self.row_bytes, self.offset + start * self.row_bytes)
+        finally:
+            os.close(fd)
+        # LightGBM bins from float64; converted one batch at a time
+        return np.frombuffer(buffer, dtype=self.dtype).reshape(stop - start, self.shape[1]).astype(np.float64)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            start, stop, _ = idx.indices(len(self))
+            return self.read_rows(start, stop)
+        if isinstance(idx, (list, np.ndarray)):
+            return np.vstack([self.read_rows(i, i + 1) for i in idx])
+        return self.read_rows(idx, idx + 1)[0]
+
+    def __len__(self):
+        return self.shape[0]
+
+
+class BoosterClassifier:
+    """predict_proba/predict over a raw XGBoost or LightGBM Booster"""
+
+    def __init__(self, booster):
+        self.booster = booster
+        self.classes_ = np.array([0, 1])
+
+    def predict_proba(self, X):
+        if isinstance(self.booster, xgb.Booster):
+            proba = self.booster.predict(xgb.DMatrix(np.asarray(X, dtype=np.float32)))
+        else:
+            proba = self.booster.predict(np.asarray(X, dtype=np.float32))
+        return np.vstack([1 - proba, proba]).T
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] > 0.5).astype(int)
+
+
+def lightgbm_binary_dataset(chunks, split='train', params=None, reference=None):
+    """LightGBM Dataset for a split, built once from chunk Sequences and cached as .bin
+    per set of binning parameters.
+
+    Construction reads the chunks in batches, so the raw float matrix is
+    never in memory; the binned dataset takes about one byte per value.
+    """
+    binning = zlib.crc32(json.dumps(dataset_params(params), sort_keys=True).encode())
+    path = os.path.join(chunks.directory, f"{split}_{binning:08x}.lgb.bin")
+    if os.path.exists(path):
+        return lgb.Dataset(path, params=params, reference=reference)
+
+    sequences = [ChunkSequence(X_path) for X_path, _ in chunks.chunk_paths(split)]
+    labels = np.concatenate([np.load(y_path) for _, y_path in chunks.chunk_paths(split)])
+    dataset = lgb.Dataset(sequences, label=labels, params=params, reference=reference,
+                          feature_name=chunks.feature_cols, free_raw_data=True)
+    dataset.construct()
+    dataset.save_binary(path)
+    return dataset
+
+
+def evaluate_chunks(model, chunks, split='test'):
+    """Accuracy and AUC streamed over chunks (keeps only float32 scores and labels)"""
+    scores, labels = [], []
+    for X, y in chunks.iter_chunks(split):
+        scores.append(model.predict_proba(X)[:, 1].astype(np.float32))
+        labels.append(np.asarray(y, dtype=np.int8))
+    scores, labels = np.concatenate(scores), np.concatenate(labels)
+    return {'accuracy': float(np.mean((scores > 0.5) == labels)), 'auc': roc_auc_score(labels, scores)}
+
+
+def train_xgboost_external(chunks, params, num_boost_round=500, cache_prefix="models/cache/xgb_extmem"):
+    """XGBoost on an external-memory quantile DMatrix; pages live on disk"""
+    dtrain = xgb.ExtMemQuantileDMatrix(XGBChunkIter(chunks, 'train', cache_prefix),
+                                       max_bin=params.get('max_bin', 256))
+    booster = xgb.train(params, dtrain, num_boost_round=num_boost_round)
+    return BoosterClassifier(booster)
+
+
+def train_lightgbm_external(chunks, params, num_boost_round=500):
+    """LightGBM on the cached binary dataset of the train chunks"""
+    train_data = lightgbm_binary_dataset(chunks, 'train', params)
+    booster = lgb.train(params, train_data, num_boost_round=num_boost_round)
+    return BoosterClassifier(booster)
@@ -1,33 +1,64 @@
 # run_phase3_models_simple.py
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, VotingClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score, roc_auc_score
 import xgboost as xgb
 import lightgbm as lgb
 import joblib
+from phase3_models.data_prep import prepare_training_data
+from phase3_models.ensemble_model import EnsembleVotingSystem
+from phase3_models.walk_forward import WalkForwardValidator, load_dated_features, META_COLUMNS
+from phase3_models.oof_store import model_specs_from_members
+from phase3_models.distillation import distill_ensemble
+from phase3_models.ensemble_selection import EnsembleSelector, ensemble_latency
+from phase3_models.feature_pruning import FeaturePruner
+from phase3_models.model_registry import ModelRegistry
+from config.settings import Config
 
-def run_phase3_simple():
+def run_phase3_simple(refit_ensemble=False, ensemble_mode='soft',
+                      distill=Config.DISTILL_SERVING_MODEL,
+                      fidelity_threshold=Config.DISTILLATION_MAX_MAE,
+                      prune_features=Config.PRUNE_FEATURES,
+                      select_members=Config.SELECT_ENSEMBLE_MEMBERS,
+                      selection_tolerance=Config.ENSEMBLE_SELECTION_TOLERANCE):
+    """Train the model zoo and a soft-voting ensemble
+
+    refit_ensemble: retrain the ensemble members from scratch with
+    VotingClassifier instead of combining the already fitted models
+    ensemble_mode: 'soft' or 'stacking' (meta-learner on cached
+    walk-forward out-of-fold predictions)
+    distill: train a compact student on the ensemble's probabilities and
+    serve it if its probability MAE is within fidelity_threshold (off unless
+    DISTILL_SERVING_MODEL is set)
+    prune_features: drop constant, duplicate and linearly dependent columns
+    (decided on the training split) and save the reduced schema (off unless
+    PRUNE_FEATURES is set)
+    select_members: choose the ensemble members by backward elimination on
+    walk-forward out-of-fold predictions, keeping the fastest set whose log
+    loss is within selection_tolerance of the best; the pruned ensemble is
+    served when no student is (off unless SELECT_ENSEMBLE_MEMBERS is set)
+    """
     print("="*60)
     print("PHASE 3: MODEL IMPROVEMENT (No TensorFlow)")
     print("="*60)
     
-    # Load data
+    # Load data (cached float32 arrays on repeat runs)
     print("\n1. Loading data...")
-    features_df = pd.read_csv("data/enhanced/advanced_features.csv")
+    data = prepare_training_data("data/enhanced/advanced_features.csv")
     
-    # Prepare data
-    feature_cols = [col for col in features_df.columns 
-                   if col not in ['gameid', 'blue_win']]
-    X = features_df[feature_cols].fillna(0)
-    y = features_df['blue_win']
+    feature_schema = None
+    if prune_features:
+        pruner = FeaturePruner().fit(data.X_train, data.feature_cols)
+        print(f"  Pruned {len(pruner.dropped)} of {len(data.feature_cols)} features: {pruner.summary()}")
+        # Same split spec, so the rows are identical; only the columns change
+        data = prepare_training_data("data/enhanced/advanced_features.csv", feature_cols=pruner.features)
+        pruner.save('models/feature_schema.json')
+        feature_schema = pruner.schema()
     
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
+    feature_cols = data.feature_cols
+    X_train, X_test, y_train, y_test = data.X_train, data.X_test, data.y_train, data.y_test
     
     # Train multiple models
     print("\n2. Training models...")
@@ -60,16 +91,45 @@ def run_phase3_simple():
     
     # Create ensemble
     print("\n3. Creating ensemble...")
-    ensemble = VotingClassifier(
-        estimators=[
-            ('xgb', trained_models['xgboost']),
-            ('lgb', trained_models['lightgbm']),
-            ('rf', trained_models['random_forest'])
-        ],
-        voting='soft'
-    )
-    
-    ensemble.fit(X_train, y_train)
+    selection = None
+    validator = None
+    if refit_ensemble:
+        ensemble = VotingClassifier(
+            estimators=[
+                ('xgb', trained_models['xgboost']),
+                ('lgb', trained_models['lightgbm']),
+                ('rf', trained_models['random_forest'])
+            ],
+            voting='soft'
+        )
+        
+        ensemble.fit(X_train, y_train)
+    else:
+        if select_members or ensemble_mode == 'stacking':
+            # Shared OOF table of these exact model configurations and features
+            validator = WalkForwardValidator(load_dated_features()[META_COLUMNS + feature_cols])
+            oof_specs = model_specs_from_members(trained_models)
+            oof = validator.oof_predictions(oof_specs)
+        
+        if select_members:
+            selector = EnsembleSelector(tolerance=selection_tolerance, mode=ensemble_mode)
+            member_names = selector.select(oof, list(trained_models), ensemble_latency(trained_models, X_test))
+            print(selector.report.assign(members=selector.report['members'].map(' + '.join))
+                  .round(4).to_string(index=False))
+            selector.save_report()
+            selection = selector.report.to_dict('records')
+        else:
+            member_names = ['xgboost', 'lightgbm', 'random_forest']
+        
+        # Soft voting over the members fitted above; no retraining
+        ensemble = EnsembleVotingSystem(
+            models={name: trained_models[name] for name in member_names},
+            prefit=True
+        )
+        print(f"  Members: {', '.join(member_names)}")
+        if ensemble_mode == 'stacking':
+            ensemble.fit_stacker(oof, oof['blue_win'])
+            print(f"  Stacking meta-learner trained on {len(oof)} out-of-fold predictions")
     
     # Evaluate ensemble
     ensemble_pred = ensemble.predict(X_test)
@@ -81,6 +141,24 @@ def run_phase3_simple():
     print(f"  Accuracy: {ensemble_accuracy:.4f}")
     print(f"  AUC: {ensemble_auc:.4f}")
     
+    # Distill the ensemble into a cheap serving model
+    serving_model = None
+    distillation = None
+    if distill:
+        print("\n4. Distilling ensemble...")
+        student, distillation = distill_ensemble(ensemble, X_train, X_test, y_test, feature_cols)
+        print(f"  Fidelity MAE: {distillation['fidelity_mae']:.4f} "
+              f"(agreement {distillation['agreement']:.2%}; "
+              f"{distillation['sampled_draft_fidelity_mae']:.4f} on sampled drafts)")
+        print(f"  Student AUC: {distillation['student_auc']:.4f} vs ensemble {distillation['teacher_auc']:.4f}")
+        print(f"  Latency: {distillation['student_latency_ms']:.2f} ms vs "
+              f"{distillation['teacher_latency_ms']:.2f} ms per request")
+        if distillation['fidelity_mae'] <= fidelity_threshold:
+            serving_model = student
+            print(f"  ✓ Student will be served (MAE <= {fidelity_threshold})")
+        else:
+            print(f"  Student not served (MAE > {fidelity_threshold})")
+
     # Save best model
     best_model_name = max(results.items(), key=lambda x: x[1]['auc'])[0]
     print(f"\nBest individual model: {best_model_name}")
@@ -91,17 +169,40 @@ def run_phase3_simple():
         'best_model': trained_models[best_model_name],
         'all_models': trained_models,
         'feature_columns': feature_cols,
-        'results': results
+        'feature_schema': feature_schema,
+        'results': results,
+        'serving_model': serving_model,
+        'distillation': distillation
     }
     
     joblib.dump(final_models, 'models/final_phase3_models.pkl')
     
+    # Versioned copy, one file per member, for lazy loading at serving time
+    members = {**trained_models, 'ensemble': ensemble}
+    if serving_model is not None:
+        members['student'] = serving_model
+    version = ModelRegistry(Config.MODEL_REGISTRY_PATH).register(
+        members,
+        feature_columns=feature_cols,
+        feature_schema=feature_schema,
+        metrics={'models': results,
+                 'ensemble': {'accuracy': ensemble_accuracy, 'auc': ensemble_auc},
+                 'distillation': distillation,
+                 'ensemble_selection': selection},
+        aliases={'best_model': best_model_name,
+                 'serving': 'student' if serving_model is not None
+                 else 'ensemble' if selection is not None else best_model_name}
+    )
+    if validator is not None:
+        validator.oof_store.link_version(version, validator.run_key(oof_specs))
+    
     print("\n" + "="*60)
     print("PHASE 3 COMPLETE!")
     print("="*60)
     print(f"✓ Trained {len(models)} models")
     print(f"✓ Created ensemble with {ensemble_accuracy:.2%} accuracy")
     print("✓ Models saved to: models/final_phase3_models.pkl")
+    print(f"✓ Registered model version {version}")
 
 if __name__ == "__main__":
     run_phase3_simple()
\ No newline at end of file
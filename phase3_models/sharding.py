@@ -0,0 +1,192 @@
+# sharding.py
+import os
+import re
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from threadpoolctl import threadpool_limits
+from sklearn.metrics import roc_auc_score, log_loss
+from config.settings import Config
+from phase1_enhancement.match_store import PartitionedMatchStore
+from phase3_models.walk_forward import DEFAULT_MODEL_SPECS, META_COLUMNS, load_dated_features
+from phase3_models.model_registry import ModelRegistry
+
+GLOBAL_SHARD = 'global'
+
+
+def patch_era(patch):
+    """Era of a patch: its major version ('14.23' -> '14'), or 'unknown'"""
+    match = re.match(r'^\s*(\d+)\.', str(patch))
+    return match.group(1) if match else 'unknown'
+
+
+def shard_key(league, patch=None, by_era=False):
+    """'LCK' or, per era, 'LCK|14'"""
+    return f"{league}|{patch_era(patch)}" if by_era else str(league)
+
+
+def shard_member(key):
+    """Registry member name of a shard"""
+    return 'shard_' + re.sub(r'[^A-Za-z0-9]+', '_', key).strip('_')
+
+
+class ShardRouter:
+    """Maps a match's league (and patch era) to a shard member; None means the global model"""
+
+    def __init__(self, routes, by_era=False):
+        """routes: {shard key: registry member}"""
+        self.routes = dict(routes)
+        self.by_era = by_era
+
+    def member_for(self, league, patch=None):
+        return self.routes.get(shard_key(league, patch, self.by_era))
+
+
+def _fit_shard(key, X_train, y_train, holdouts, model_spec):
+    """Fit one shard in a worker; returns (key, model, fit seconds, {holdout key: probabilities})"""
+    model_class, params = model_spec
+    with threadpool_limits(limits=1):
+        start = time.perf_counter()
+        model = model_class(**params).fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - start
+        probas = {name: model.predict_proba(X)[:, 1] for name, X in holdouts.items()}
+    return key, model, fit_seconds, probas
+
+
+def _metrics(y, proba):
+    return {
+        'auc': roc_auc_score(y, proba) if len(np.unique(y)) > 1 else np.nan,
+        'log_loss': log_loss(y, np.clip(proba, 1e-7, 1 - 1e-7), labels=[0, 1])
+    }
+
+
+class ShardedTrainer:
+    """Independent models per league (optionally per patch era), trained in parallel with a global fallback.
+
+    Every shard's newest test_fraction of games is its holdout; the global
+    model trains on all the other games. Shards with fewer than min_games
+    games are not trained, and a trained shard is only routed to when it
+    beats the global model's log loss on its own holdout.
+    """
+
+    def __init__(self, by_era=Config.SHARD_BY_ERA, min_games=Config.SHARD_MIN_GAMES, model_spec=None,
+                 test_fraction=0.2, cpu_budget=None):
+        self.by_era = by_era
+        self.min_games = min_games
+        self.model_spec = model_spec or DEFAULT_MODEL_SPECS['lightgbm']
+        self.test_fraction = test_fraction
+        self.cpu_budget = cpu_budget or os.cpu_count() or 1
+        self.report = None
+
+    def assign(self, df):
+        """Shard key of each game (df has gameid and patch)"""
+        store = PartitionedMatchStore()
+        leagues = [store.partition_key({'gameid': gameid})[0] for gameid in df['gameid']]
+        return pd.Series([shard_key(league, patch, self.by_era) for league, patch in zip(leagues, df['patch'])],
+                         index=df.index)
+
+    def split(self, keys):
+        """Boolean holdout mask: the newest test_fraction of each shard (df is sorted by date)"""
+        holdout = np.zeros(len(keys), dtype=bool)
+        for key, positions in keys.groupby(keys.values).indices.items():
+            n_holdout = int(round(len(positions) * self.test_fraction))
+            if n_holdout:
+                holdout[positions[-n_holdout:]] = True
+        return holdout
+
+    def run(self, dated_df=None):
+        """Train the global model and every large enough shard; returns ({key: model}, report)"""
+        df = load_dated_features() if dated_df is None else dated_df
+        feature_cols = [col for col in df.columns if col not in META_COLUMNS]
+        X = df[feature_cols].fillna(0).to_numpy(dtype=np.float32)
+        y = df['blue_win'].to_numpy(dtype=np.int32)
+        keys = self.assign(df)
+        holdout = self.split(keys)
+
+        sizes = keys.value_counts()
+        shards = [key for key, n in sizes.items() if n >= self.min_games]
+        holdouts = {key: X[holdout & (keys == key).to_numpy()] for key in sizes.index}
+
+        tasks = [(GLOBAL_SHARD, ~holdout, holdouts)]
+        tasks += [(key, ~holdout & (keys == key).to_numpy(), {key: holdouts[key]}) for key in shards]
+        # Largest first so the long poles start early
+        tasks.sort(key=lambda task: task[1].sum(), reverse=True)
+
+        print(f"Training {len(shards)} shards ({'league and patch era' if self.by_era else 'league'}) "
+              f"and a global model on {self.cpu_budget} workers")
+
+        models, fitted = {}, {}
+        wall_start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=self.cpu_budget) as executor:
+            futures = [executor.submit(_fit_shard, key, X[mask], y[mask], task_holdouts, self.model_spec)
+                       for key, mask, task_holdouts in tasks]
+            for future in as_completed(futures):
+                key, model, fit_seconds, probas = future.result()
+                models[key] = model
+                fitted[key] = (fit_seconds, probas)
+                print(f"  ✓ {key}: {fit_seconds:.1f}s")
+        total = time.perf_counter() - wall_start
+
+        rows = []
+        global_seconds, global_probas = fitted[GLOBAL_SHARD]
+        for key, n_games in sizes.items():
+            y_holdout = y[holdout & (keys == key).to_numpy()]
+            row = {'shard': key, 'n_games': n_games, 'n_holdout': len(y_holdout), 'trained': key in models}
+            if len(y_holdout):
+                row.update({f'global_{k}': v for k, v in _metrics(y_holdout, global_probas[key]).items()})
+            if key in models and len(y_holdout):
+                fit_seconds, probas = fitted[key]
+                row.update({f'shard_{k}': v for k, v in _metrics(y_holdout, probas[key]).items()})
+                row['fit_seconds'] = fit_seconds
+                row['routed'] = row['shard_log_loss'] <= row['global_log_loss']
+            else:
+                row['routed'] = False
+            rows.append(row)
+        self.report = pd.DataFrame(rows)
+        self.feature_cols = feature_cols
+
+        print(f"  Global model {global_seconds:.1f}s; all shards {total:.1f}s wall")
+        return models, self.report
+
+    def register(self, models, registry=None, promote=False):
+        """Register the global model with the routed shards and their router under the 'sharded' alias.
+
+        The version only replaces the served one when promote is set (or
+        later with ModelRegistry.promote).
+        """
+        registry = registry or ModelRegistry(Config.MODEL_REGISTRY_PATH)
+        routed = self.report.loc[self.report['routed'], 'shard'].tolist()
+        members = {GLOBAL_SHARD: models[GLOBAL_SHARD]}
+        members.update({shard_member(key): models[key] for key in routed})
+        members['router'] = ShardRouter({key: shard_member(key) for key in routed}, by_era=self.by_era)
+
+        return registry.register(
+            members,
+            feature_columns=self.feature_cols,
+            metrics={'shards': json.loads(self.report.to_json(orient='records'))},
+            aliases={'sharded': GLOBAL_SHARD, 'serving': GLOBAL_SHARD},
+            promote=promote
+        )
+
+
+def run_sharded_training(by_era=Config.SHARD_BY_ERA, promote=False):
+    print("="*60)
+    print("SHARDED TRAINING")
+    print("="*60)
+
+    trainer = ShardedTrainer(by_era=by_era)
+    models, report = trainer.run()
+    print(report.round(4).to_string(index=False))
+    version = trainer.register(models, promote=promote)
+    print(f"✓ Registered model version {version}")
+    if not promote:
+        print(f"  Not served; promote with ModelRegistry('{Config.MODEL_REGISTRY_PATH}').promote('{version}')")
+    return trainer
+
+
+if __name__ == "__main__":
+    # Import by package path so ShardRouter pickles as phase3_models.sharding.ShardRouter, not __main__
+    from phase3_models.sharding import run_sharded_training as run
+    run()
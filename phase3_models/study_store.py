@@ -0,0 +1,120 @@
+# study_store.py
+import os
+import json
+import sqlite3
+from datetime import datetime
+
+
+class StudyStore:
+    """SQLite record of hyperparameter trials so searches can resume and warm-start"""
+
+    def __init__(self, db_path="models/studies.db"):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.create_tables()
+
+    def create_tables(self):
+        """Create study tables"""
+        self.conn.executescript("""
+        CREATE TABLE IF NOT EXISTS studies (
+            study TEXT PRIMARY KEY,
+            model TEXT,
+            created_at TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS trials (
+            study TEXT,
+            trial_id INTEGER,
+            params TEXT,
+            PRIMARY KEY (study, trial_id),
+            UNIQUE (study, params)
+        );
+
+        CREATE TABLE IF NOT EXISTS trial_results (
+            study TEXT,
+            trial_id INTEGER,
+            rung INTEGER,
+            budget INTEGER,
+            score REAL,
+            created_at TEXT,
+            PRIMARY KEY (study, trial_id, rung)
+        );
+        """)
+        self.conn.commit()
+
+    def create_study(self, study, model):
+        """Create a study if it does not exist; returns True if it is new"""
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO studies VALUES (?, ?, ?)",
+                (study, model, datetime.now().isoformat())
+            )
+        return cursor.rowcount == 1
+
+    def add_trial(self, study, params):
+        """Register a configuration; returns its trial id (existing one if already present)"""
+        params_json = json.dumps(params, sort_keys=True)
+        row = self.conn.execute(
+            "SELECT trial_id FROM trials WHERE study = ? AND params = ?", (study, params_json)
+        ).fetchone()
+        if row:
+            return row['trial_id']
+
+        trial_id = self.conn.execute(
+            "SELECT COALESCE(MAX(trial_id) + 1, 0) FROM trials WHERE study = ?", (study,)
+        ).fetchone()[0]
+        with self.conn:
+            self.conn.execute("INSERT INTO trials VALUES (?, ?, ?)", (study, trial_id, params_json))
+        return trial_id
+
+    def get_trials(self, study):
+        """{trial_id: params} of a study"""
+        rows = self.conn.execute(
+            "SELECT trial_id, params FROM trials WHERE study = ? ORDER BY trial_id", (study,)
+        ).fetchall()
+        return {row['trial_id']: json.loads(row['params']) for row in rows}
+
+    def record_result(self, study, trial_id, rung, budget, score):
+        """Store the score of a trial at one rung (committed immediately)"""
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO trial_results VALUES (?, ?, ?, ?, ?, ?)",
+                (study, trial_id, rung, budget, score, datetime.now().isoformat())
+            )
+
+    def get_result(self, study, trial_id, rung):
+        """Score of a trial at a rung, or None if not evaluated yet"""
+        row = self.conn.execute(
+            "SELECT score FROM trial_results WHERE study = ? AND trial_id = ? AND rung = ?",
+            (study, trial_id, rung)
+        ).fetchone()
+        return row['score'] if row else None
+
+    def best_trials(self, model, limit=5, exclude_study=None):
+        """Best configurations of earlier studies of a model, highest rung first"""
+        rows = self.conn.execute("""
+            SELECT t.params, r.rung, r.budget, r.score
+            FROM trial_results r
+            JOIN trials t ON t.study = r.study AND t.trial_id = r.trial_id
+            JOIN studies s ON s.study = r.study
+            WHERE s.model = ? AND s.study != ?
+            ORDER BY r.rung DESC, r.score DESC
+        """, (model, exclude_study or '')).fetchall()
+
+        best, seen = [], set()
+        for row in rows:
+            if row['params'] in seen:
+                continue
+            seen.add(row['params'])
+            best.append({'params': json.loads(row['params']), 'rung': row['rung'],
+                         'budget': row['budget'], 'score': row['score']})
+            if len(best) >= limit:
+                break
+        return best
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,284 @@
+# training_benchmark.py
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import platform
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+HISTORY_PATH = "reports/benchmarks/training_history.json"
+SYNTHETIC_DIR = "models/cache/benchmark"
+
+TRAINER_MODELS = ['xgboost', 'lightgbm', 'random_forest', 'gradient_boosting', 'logistic_regression']
+
+
+def load_matches():
+    """Real games from the match store"""
+    from phase1_enhancement.match_store import open_store
+
+    return open_store().read()
+
+
+def synthetic_games(matches, n_games=2000, seed=0):
+    """Fixed synthetic games: every column resampled independently from real games"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({col: matches[col].to_numpy()[rng.integers(0, len(matches), n_games)]
+                         for col in matches.columns})
+
+
+def synthetic_features_path(n_samples=5000, n_features=98, seed=0):
+    """Fixed synthetic feature table in the advanced_features.csv layout"""
+    from sklearn.datasets import make_classification
+
+    path = os.path.join(SYNTHETIC_DIR, f"synthetic_{n_samples}x{n_features}_{seed}.csv")
+    if not os.path.exists(path):
+        X, y = make_classification(n_samples=n_samples, n_features=n_features, n_informative=30,
+                                   n_redundant=20, flip_y=0.1, random_state=seed)
+        df = pd.DataFrame(X.astype(np.float32), columns=[f"f{i}" for i in range(n_features)])
+        df['gameid'] = [f"synthetic_{i}" for i in range(n_samples)]
+        df['blue_win'] = y
+        os.makedirs(SYNTHETIC_DIR, exist_ok=True)
+        df.to_csv(path, index=False)
+    return path
+
+
+def _feature_generation(dataset):
+    from phase2_features.advanced_feature_creator import AdvancedFeatureCreator
+
+    matches = load_matches()
+    games = synthetic_games(matches) if dataset == 'synthetic' else matches
+
+    creator = AdvancedFeatureCreator()
+    for _, game in games.iterrows():
+        creator.create_game_features(game)
+    return len(games)
+
+
+def _prepare_trainer(features_path):
+    from phase3_models.advanced_model_trainer import AdvancedModelTrainer
+
+    trainer = AdvancedModelTrainer(features_path)
+    return trainer, trainer.prepare_data()
+
+
+def _train_model(features_path, name):
+    trainer, (X_train, X_test, y_train, y_test, X_train_scaled, X_test_scaled, _) = _prepare_trainer(features_path)
+    if name == 'logistic_regression':
+        trainer.train_logistic_regression(X_train_scaled, y_train, X_test_scaled, y_test)
+    else:
+        getattr(trainer, f'train_{name}')(X_train, y_train, X_test, y_test)
+    return len(X_train)
+
+
+def _train_ensemble(features_path):
+    import xgboost as xgb
+    import lightgbm as lgb
+    from sklearn.ensemble import RandomForestClassifier
+    from phase3_models.data_prep import prepare_training_data
+    from phase3_models.ensemble_model import EnsembleVotingSystem
+
+    data = prepare_training_data(features_path)
+    # Same members as run_phase3_simple
+    ensemble = EnsembleVotingSystem(models={
+        'xgboost': xgb.XGBClassifier(n_estimators=200, max_depth=6, random_state=42),
+        'lightgbm': lgb.LGBMClassifier(n_estimators=200, num_leaves=31, random_state=42, verbosity=-1),
+        'random_forest': RandomForestClassifier(n_estimators=200, max_depth=10, random_state=42)
+    })
+    ensemble.fit(data.X_train, data.y_train)
+    ensemble.predict_proba(data.X_test)
+    return len(data.X_train)
+
+
+def _hyperparameter_search(features_path):
+    from phase3_models.data_prep import prepare_training_data
+    from phase3_models.hyperparameter_tuning import HyperparameterOptimizer
+
+    data = prepare_training_data(features_path)
+    # Fresh study every time, otherwise the search would resume from the last run
+    with tempfile.TemporaryDirectory() as tmp:
+        optimizer = HyperparameterOptimizer(study_db=os.path.join(tmp, "studies.db"))
+        optimizer.successive_halving_search('lightgbm', data.X_train, data.y_train,
+                                            n_configs=9, min_rounds=50, max_rounds=150, cv=3)
+    return len(data.X_train)
+
+
+def use_cache_root(cache_root):
+    """Point this process's prepared-array and binned LightGBM caches under cache_root"""
+    from phase3_models import data_prep, lgb_cache
+
+    data_prep.CACHE_DIR = os.path.join(cache_root, "prepared")
+    lgb_cache.CACHE_DIR = os.path.join(cache_root, "lgb")
+
+
+def _run_stage(stage, dataset, features_path, cache_root):
+    """Run one stage in this (fresh) process and measure it, with its caches under cache_root"""
+    use_cache_root(cache_root)
+    kind, _, name = stage.partition(':')
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+
+    if kind == 'features':
+        rows = _feature_generation(dataset)
+    elif kind == 'model':
+        rows = _train_model(features_path, name)
+    elif kind == 'ensemble':
+        rows = _train_ensemble(features_path)
+    elif kind == 'search':
+        rows = _hyperparameter_search(features_path)
+    else:
+        raise ValueError(f"Unknown benchmark stage: {stage}")
+
+    wall = time.perf_counter() - wall_start
+    return {
+        'rows': rows,
+        'wall_seconds': wall,
+        'cpu_seconds': time.process_time() - cpu_start,
+        # ru_maxrss is KB on Linux; one stage per process
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'rows_per_second': rows / wall if wall > 0 else None
+    }
+
+
+class TrainingBenchmark:
+    """Time phase2/phase3 stages and keep a JSON history to catch regressions.
+
+    Every stage runs twice: cold, on a fresh temporary cache root, and
+    then warm, reading the caches the cold run filled. Both are recorded as
+    <dataset>/<stage>/cold and .../warm, so no stage's timing depends on
+    which stage happened to run before it. The production caches under
+    models/cache are never read or cleared.
+    """
+
+    def __init__(self, history_path=HISTORY_PATH, threshold=0.25, baseline_runs=5,
+                 datasets=('synthetic', 'real'), stages=None):
+        """
+        threshold: fail when wall time, CPU time or peak RSS exceeds the baseline by this fraction
+        baseline_runs: the baseline is the median of this many previous runs
+        """
+        self.history_path = history_path
+        self.threshold = threshold
+        self.baseline_runs = baseline_runs
+        self.datasets = list(datasets)
+        self.stages = stages or (['features'] + [f'model:{name}' for name in TRAINER_MODELS]
+                                 + ['ensemble', 'search'])
+
+    def features_path(self, dataset):
+        if dataset == 'synthetic':
+            return synthetic_features_path()
+        return "data/enhanced/advanced_features.csv"
+
+    def run(self):
+        """Run every stage cold and warm on every dataset; returns the run record"""
+        results = {}
+        for dataset in self.datasets:
+            features_path = self.features_path(dataset)
+            for stage in self.stages:
+                with tempfile.TemporaryDirectory(prefix="benchmark_cache_") as cache_root:
+                    for cache in ['cold', 'warm']:
+                        # One process per stage so peak RSS and CPU time belong to that stage
+                        with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as executor:
+                            metrics = executor.submit(_run_stage, stage, dataset, features_path,
+                                                      cache_root).result()
+                        key = f"{dataset}/{stage}/{cache}"
+                        results[key] = metrics
+                        print(f"  ✓ {key}: {metrics['wall_seconds']:.2f}s wall, "
+                              f"{metrics['cpu_seconds']:.2f}s CPU, {metrics['peak_rss_mb']:.0f} MB, "
+                              f"{metrics['rows_per_second']:.0f} rows/s")
+
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'host': platform.node(),
+            'cpu_count': os.cpu_count(),
+            'python': platform.python_version(),
+            'stages': results
+        }
+
+    def load_history(self):
+        if not os.path.exists(self.history_path):
+            return []
+        with open(self.history_path) as f:
+            return json.load(f)
+
+    def save_run(self, run):
+        history = self.load_history() + [run]
+        os.makedirs(os.path.dirname(self.history_path), exist_ok=True)
+        tmp_path = self.history_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(history, f, indent=2)
+        os.replace(tmp_path, self.history_path)
+
+    def regressions(self, run, history):
+        """Stages slower or bigger than the median of comparable earlier runs.
+
+        Only runs on the same number of cores and the same row counts count
+        as comparable.
+        """
+        found = []
+        for key, metrics in run['stages'].items():
+            previous = [r['stages'][key] for r in history
+                        if r.get('cpu_count') == run['cpu_count'] and key in r['stages']
+                        and r['stages'][key]['rows'] == metrics['rows']][-self.baseline_runs:]
+            if not previous:
+                continue
+            for metric in ['wall_seconds', 'cpu_seconds', 'peak_rss_mb']:
+                baseline = float(np.median([p[metric] for p in previous]))
+                if baseline > 0 and metrics[metric] > baseline * (1 + self.threshold):
+                    found.append({'stage': key, 'metric': metric, 'baseline': baseline,
+                                  'value': metrics[metric], 'change': metrics[metric] / baseline - 1})
+        return found
+
+    def report(self, run, regressions):
+        df = pd.DataFrame(run['stages']).T[['rows', 'wall_seconds', 'cpu_seconds', 'peak_rss_mb',
+                                            'rows_per_second']]
+        print(df.astype(float).round(2).to_string())
+        if regressions:
+            print(f"\n✗ {len(regressions)} regression(s) beyond {self.threshold:.0%}:")
+            for r in regressions:
+                print(f"  {r['stage']} {r['metric']}: {r['value']:.2f} vs baseline "
+                      f"{r['baseline']:.2f} ({r['change']:+.0%})")
+        else:
+            print(f"\n✓ No regressions beyond {self.threshold:.0%}")
+
+
+def run_training_benchmark(threshold=0.25, datasets=('synthetic', 'real'), stages=None,
+                           history_path=HISTORY_PATH):
+    """Benchmark, compare with history, record; returns True if nothing regressed"""
+    print("="*60)
+    print("TRAINING BENCHMARK")
+    print("="*60)
+
+    benchmark = TrainingBenchmark(history_path, threshold=threshold, datasets=datasets, stages=stages)
+    history = benchmark.load_history()
+    run = benchmark.run()
+    regressions = benchmark.regressions(run, history)
+
+    run['regressions'] = regressions
+    benchmark.save_run(run)
+    benchmark.report(run, regressions)
+    print(f"✓ Appended run to {history_path}")
+    return not regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark phase2/phase3 training stages')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Allowed slowdown / memory growth vs baseline (0.25 = 25%%)')
+    parser.add_argument('--datasets', nargs='+', choices=['synthetic', 'real'], default=['synthetic', 'real'])
+    parser.add_argument('--stages', nargs='+', default=None,
+                        help="Subset of stages, e.g. features model:xgboost ensemble search")
+    parser.add_argument('--history', default=HISTORY_PATH)
+    args = parser.parse_args()
+
+    ok = run_training_benchmark(args.threshold, args.datasets, args.stages, args.history)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
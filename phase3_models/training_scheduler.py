@@ -0,0 +1,103 @@
+# training_scheduler.py
+import os
+import time
+import resource
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from threadpoolctl import threadpool_limits
+
+# Models whose libraries can use more than one thread
+MULTITHREADED_MODELS = ['xgboost', 'lightgbm', 'random_forest']
+
+# Rough relative cost, used to start the long poles first
+MODEL_COST = {
+    'gradient_boosting': 5,
+    'xgboost': 4,
+    'random_forest': 3,
+    'lightgbm': 2,
+    'logistic_regression': 1
+}
+
+
+def allocate_threads(model_names, cpu_budget):
+    """Split cpu_budget cores across models; returns ({model: threads}, workers).
+
+    Single-threaded models get one core each, spare cores go to the
+    multithreaded ones. With fewer cores than models, models run one core
+    each on cpu_budget workers.
+    """
+    if cpu_budget <= len(model_names):
+        return {name: 1 for name in model_names}, cpu_budget
+
+    threads = {name: 1 for name in model_names}
+    parallel = [name for name in model_names if name in MULTITHREADED_MODELS]
+    spare = cpu_budget - len(model_names)
+
+    for i in range(spare if parallel else 0):
+        threads[parallel[i % len(parallel)]] += 1
+
+    return threads, len(model_names)
+
+
+def _train_in_worker(features_path, name, n_threads):
+    """Train one AdvancedModelTrainer model in a fresh process"""
+    from phase3_models.advanced_model_trainer import AdvancedModelTrainer
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+
+    with threadpool_limits(limits=n_threads):
+        trainer = AdvancedModelTrainer(features_path)
+        trainer.n_jobs = n_threads
+        X_train, X_test, y_train, y_test, X_train_scaled, X_test_scaled, _ = trainer.prepare_data()
+
+        if name == 'logistic_regression':
+            model = trainer.train_logistic_regression(X_train_scaled, y_train, X_test_scaled, y_test)
+        else:
+            model = getattr(trainer, f'train_{name}')(X_train, y_train, X_test, y_test)
+
+    stats = {
+        'threads': n_threads,
+        'wall_seconds': time.perf_counter() - wall_start,
+        'cpu_seconds': time.process_time() - cpu_start,
+        # ru_maxrss is KB on Linux; each worker runs a single model
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }
+    return name, model, trainer.results[name], stats
+
+
+class ModelTrainingScheduler:
+    def __init__(self, features_path="data/enhanced/advanced_features.csv", cpu_budget=None,
+                 model_names=None):
+        self.features_path = features_path
+        self.cpu_budget = cpu_budget or os.cpu_count() or 1
+        self.model_names = model_names or list(MODEL_COST)
+
+    def run(self):
+        """Train all models concurrently; returns (models, results, report)"""
+        threads, workers = allocate_threads(self.model_names, self.cpu_budget)
+        order = sorted(self.model_names, key=lambda name: MODEL_COST.get(name, 0), reverse=True)
+
+        print(f"Training {len(order)} models on {workers} workers ({self.cpu_budget} cores)")
+
+        models, results, report = {}, {}, []
+        wall_start = time.perf_counter()
+
+        # One process per model so peak RSS is attributable to that model
+        with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=1) as executor:
+            futures = [executor.submit(_train_in_worker, self.features_path, name, threads[name])
+                       for name in order]
+            for future in as_completed(futures):
+                name, model, metrics, stats = future.result()
+                models[name] = model
+                results[name] = metrics
+                report.append({'model': name, **stats})
+                print(f"  ✓ {name}: {stats['wall_seconds']:.1f}s wall, "
+                      f"{stats['peak_rss_mb']:.0f} MB peak, {stats['threads']} threads")
+
+        total = time.perf_counter() - wall_start
+        report_df = pd.DataFrame(report).set_index('model').loc[order]
+        print(f"  Total wall time: {total:.1f}s "
+              f"(slowest model {report_df['wall_seconds'].max():.1f}s)")
+
+        return models, results, report_df
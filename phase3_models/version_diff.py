@@ -0,0 +1,171 @@
+# version_diff.py
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+from config.settings import Config
+from phase1_enhancement.match_store import open_store
+from phase3_models.data_prep import file_fingerprint
+from phase3_models.model_registry import ModelRegistry, model_inputs
+from phase3_models.walk_forward import load_matches
+
+EVAL_CACHE_DIR = "models/cache/eval"
+META_COLUMNS = ['gameid', 'date', 'patch', 'blue_team', 'red_team', 'blue_win']
+
+
+def evaluation_matrix(features_path="data/enhanced/advanced_features.csv", cache_dir=EVAL_CACHE_DIR):
+    """(X, feature columns, meta) of every game with features, cached as one float32 .npz.
+
+    The cache is keyed by the feature file, the match store's index
+    (append-only, so it changes whenever games are added) and the meta
+    columns, so every version is scored on exactly the same rows.
+    """
+    store = open_store()
+    key = hashlib.sha256(json.dumps({
+        'features': file_fingerprint(features_path),
+        'matches': file_fingerprint(store.index_path) if len(store) > 0 else None,
+        'meta': META_COLUMNS
+    }, sort_keys=True).encode()).hexdigest()
+    path = os.path.join(cache_dir, f"{key[:16]}.npz")
+    if os.path.exists(path):
+        data = np.load(path)
+        meta = pd.DataFrame({col: data[f'meta_{col}'] for col in META_COLUMNS})
+        return data['X'], list(data['columns']), meta
+
+    features_df = pd.read_csv(features_path, dtype={'gameid': str})
+    matches = load_matches(store)[['gameid', 'date', 'patch', 'blue_team', 'red_team']]
+    df = features_df.merge(matches.astype({'gameid': str}), on='gameid', how='inner')
+    df = df.sort_values('date', kind='stable').reset_index(drop=True)
+
+    columns = [col for col in features_df.columns if col not in META_COLUMNS]
+    X = df[columns].fillna(0).to_numpy(dtype=np.float32)
+    meta = df[META_COLUMNS].astype({'date': str, 'patch': str, 'blue_win': int})
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = path[:-len('.npz')] + f'.{os.getpid()}.tmp.npz'
+    np.savez(tmp_path, X=X, columns=np.array(columns),
+             **{f'meta_{col}': meta[col].to_numpy(dtype=int if col == 'blue_win' else str)
+                for col in META_COLUMNS})
+    os.replace(tmp_path, path)
+    return X, columns, meta
+
+
+def version_probabilities(registry, version, X, columns):
+    """Serving-model probabilities of a version on the evaluation matrix, in one batch"""
+    manifest = registry.manifest(version)
+    index = {col: i for i, col in enumerate(columns)}
+    missing = [col for col in manifest['feature_columns'] if col not in index]
+    if missing:
+        raise ValueError(f"Version {manifest['version']} needs features missing from the evaluation set: "
+                         f"{missing[:5]}")
+
+    model = registry.load('serving', manifest['version'])
+    scaler = registry.load('scaler', manifest['version']) if 'scaler' in manifest['members'] else None
+    X_version = X[:, [index[col] for col in manifest['feature_columns']]]
+    return model.predict_proba(model_inputs(model, X_version, scaler))[:, 1]
+
+
+def diff_games(meta, p_incumbent, p_candidate):
+    """Per-game table of both versions' probabilities, the shift, flips and per-game losses"""
+    y = meta['blue_win'].to_numpy()
+    games = meta.copy()
+    games['p_incumbent'] = p_incumbent
+    games['p_candidate'] = p_candidate
+    games['shift'] = p_candidate - p_incumbent
+    games['flipped'] = (p_incumbent > 0.5) != (p_candidate > 0.5)
+    for name, p in [('incumbent', p_incumbent), ('candidate', p_candidate)]:
+        p = np.clip(p, 1e-7, 1 - 1e-7)
+        games[f'correct_{name}'] = (p > 0.5) == (y == 1)
+        games[f'log_loss_{name}'] = -(y * np.log(p) + (1 - y) * np.log(1 - p))
+    return games
+
+
+def grouped_deltas(games, by):
+    """Metric deltas per patch, or per team ('team': each game counts for both sides)"""
+    if by == 'team':
+        games = pd.concat([games.assign(team=games['blue_team']), games.assign(team=games['red_team'])],
+                          ignore_index=True)
+    games = games.assign(abs_shift=games['shift'].abs())
+    table = games.groupby(by).agg(
+        games=('gameid', 'size'),
+        accuracy_incumbent=('correct_incumbent', 'mean'),
+        accuracy_candidate=('correct_candidate', 'mean'),
+        log_loss_incumbent=('log_loss_incumbent', 'mean'),
+        log_loss_candidate=('log_loss_candidate', 'mean'),
+        mean_abs_shift=('abs_shift', 'mean'),
+        flipped=('flipped', 'sum')
+    )
+    table['accuracy_delta'] = table['accuracy_candidate'] - table['accuracy_incumbent']
+    table['log_loss_delta'] = table['log_loss_candidate'] - table['log_loss_incumbent']
+    return table.sort_values('log_loss_delta', ascending=False).reset_index()
+
+
+def summarize(games, incumbent, candidate):
+    y = games['blue_win'].to_numpy()
+    abs_shift = games['shift'].abs()
+    flipped = games['flipped']
+    summary = {'incumbent': incumbent, 'candidate': candidate, 'n_games': len(games),
+               'mean_abs_shift': float(abs_shift.mean()),
+               'p95_abs_shift': float(abs_shift.quantile(0.95)),
+               'max_abs_shift': float(abs_shift.max()),
+               'n_flipped': int(flipped.sum()),
+               'flipped_now_correct': int((flipped & games['correct_candidate']).sum()),
+               'flipped_now_wrong': int((flipped & games['correct_incumbent']).sum())}
+    for name in ['incumbent', 'candidate']:
+        summary[f'accuracy_{name}'] = float(games[f'correct_{name}'].mean())
+        summary[f'log_loss_{name}'] = float(games[f'log_loss_{name}'].mean())
+        summary[f'auc_{name}'] = float(roc_auc_score(y, games[f'p_{name}'])) if len(np.unique(y)) > 1 else None
+    for metric in ['accuracy', 'log_loss', 'auc']:
+        if summary[f'{metric}_candidate'] is not None:
+            summary[f'{metric}_delta'] = summary[f'{metric}_candidate'] - summary[f'{metric}_incumbent']
+    return summary
+
+
+def diff_versions(candidate=None, incumbent=None, registry=None, since=None,
+                  output_dir="reports/version_diff", top_shifts=100):
+    """Compare a candidate version against the incumbent on the cached evaluation matrix.
+
+    Defaults: the latest version against the one registered before it.
+    since: only games on or after this date, e.g. after both training
+    cutoffs so neither version is scored on its own training games.
+    Writes summary.json, by_team.csv, by_patch.csv and the largest shifts
+    to <output_dir>/<incumbent>_vs_<candidate>/; returns the summary.
+    """
+    registry = registry or ModelRegistry(Config.MODEL_REGISTRY_PATH)
+    candidate = candidate or registry.latest_version()
+    if candidate is None:
+        raise ValueError(f"No served version in {registry.root}; pass candidate explicitly")
+    if incumbent is None:
+        earlier = [v for v in registry.list_versions() if v < candidate]
+        if not earlier:
+            raise ValueError(f"No version registered before {candidate} to compare against")
+        incumbent = earlier[-1]
+
+    X, columns, meta = evaluation_matrix()
+    if since is not None:
+        mask = (pd.to_datetime(meta['date']) >= pd.Timestamp(since)).to_numpy()
+        X, meta = X[mask], meta[mask].reset_index(drop=True)
+    games = diff_games(meta, version_probabilities(registry, incumbent, X, columns),
+                       version_probabilities(registry, candidate, X, columns))
+    summary = summarize(games, incumbent, candidate)
+
+    report_dir = os.path.join(output_dir, f"{incumbent}_vs_{candidate}")
+    os.makedirs(report_dir, exist_ok=True)
+    with open(os.path.join(report_dir, 'summary.json'), 'w') as f:
+        json.dump(summary, f, indent=2)
+    grouped_deltas(games, 'team').to_csv(os.path.join(report_dir, 'by_team.csv'), index=False)
+    grouped_deltas(games, 'patch').to_csv(os.path.join(report_dir, 'by_patch.csv'), index=False)
+    largest = games.loc[games['shift'].abs().nlargest(top_shifts).index,
+                        META_COLUMNS + ['p_incumbent', 'p_candidate', 'shift', 'flipped']]
+    largest.to_csv(os.path.join(report_dir, 'top_shifts.csv'), index=False)
+
+    print(f"✓ Saved version diff to {report_dir}")
+    return summary
+
+
+if __name__ == "__main__":
+    import sys
+    result = diff_versions(*sys.argv[1:3])
+    print(json.dumps(result, indent=2))
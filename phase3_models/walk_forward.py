@@ -0,0 +1,261 @@
+# walk_forward.py
+import os
+import time
+import hashlib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.metrics import accuracy_score, roc_auc_score, log_loss
+import xgboost as xgb
+import lightgbm as lgb
+from phase1_enhancement.match_store import open_store
+from phase3_models.lgb_cache import fit_cached
+from phase3_models.oof_store import OOFPredictionStore
+
+# Columns of load_dated_features that are not model features
+META_COLUMNS = ['gameid', 'blue_win', 'date', 'patch', 'split']
+
+
+def scaled_logistic(**params):
+    """Logistic regression on standardized features, as in AdvancedModelTrainer"""
+    return make_pipeline(StandardScaler(), LogisticRegression(**params))
+
+
+# Same model zoo as run_phase3_simple; single-threaded because folds run in parallel
+DEFAULT_MODEL_SPECS = {
+    'xgboost': (xgb.XGBClassifier, {'n_estimators': 200, 'max_depth': 6, 'random_state': 42, 'n_jobs': 1}),
+    'lightgbm': (lgb.LGBMClassifier, {'n_estimators': 200, 'num_leaves': 31, 'random_state': 42,
+                                      'n_jobs': 1, 'verbosity': -1}),
+    'random_forest': (RandomForestClassifier, {'n_estimators': 200, 'max_depth': 10, 'random_state': 42,
+                                               'n_jobs': 1}),
+    'gradient_boost': (GradientBoostingClassifier, {'n_estimators': 100, 'max_depth': 6, 'random_state': 42}),
+    'logistic': (scaled_logistic, {'max_iter': 1000, 'random_state': 42})
+}
+
+
+def specs_key(model_specs):
+    """Short hash of model names, classes and parameters"""
+    return hashlib.sha256(repr(sorted(
+        (name, getattr(cls, '__name__', str(cls)), sorted(params.items()))
+        for name, (cls, params) in model_specs.items()
+    )).encode()).hexdigest()[:8]
+
+
+def load_matches(store=None):
+    """Games from the match store (the legacy CSV is imported into an empty store first)"""
+    return (store if store is not None else open_store()).read()
+
+
+def load_dated_features(features_path="data/enhanced/advanced_features.csv"):
+    """Join features with date/patch/partition info and sort chronologically"""
+    features_df = pd.read_csv(features_path)
+    store = open_store()
+    matches = load_matches(store)
+
+    meta = matches[['gameid', 'date', 'patch']].copy()
+    keys = [store.partition_key({'gameid': g}) for g in meta['gameid']]
+    # Regular season and playoffs of the same split are one period
+    meta['split'] = [f"{season} {tournament.split()[0]}" for _, season, tournament in keys]
+
+    df = features_df.merge(meta, on='gameid', how='inner')
+    return df.sort_values('date', kind='stable').reset_index(drop=True)
+
+
+def _evaluate_fold(fold, matrix_path, model_specs):
+    """Fit every model on one fold and score it on the following period.
+
+    Returns the metric rows and {model: out-of-fold probabilities}.
+    """
+    data = np.load(matrix_path)
+    X_train, y_train = data['X_train'], data['y_train']
+    X_test, y_test = data['X_test'], data['y_test']
+
+    rows = []
+    oof = {}
+    for name, (model_class, params) in model_specs.items():
+        start = time.perf_counter()
+        model = model_class(**params)
+        if isinstance(model, lgb.LGBMClassifier):
+            # Binned once per fold matrix file; reruns load the cached dataset
+            model = fit_cached(model, X_train, y_train,
+                               fingerprint=os.path.basename(matrix_path) + ':train')
+        else:
+            model.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - start
+
+        y_proba = model.predict_proba(X_test)[:, 1]
+        y_pred = (y_proba > 0.5).astype(int)
+        oof[name] = y_proba
+
+        rows.append({
+            **fold,
+            'model': name,
+            'accuracy': accuracy_score(y_test, y_pred),
+            'auc': roc_auc_score(y_test, y_proba) if len(np.unique(y_test)) > 1 else np.nan,
+            'log_loss': log_loss(y_test, y_proba, labels=[0, 1]),
+            'fit_seconds': fit_seconds
+        })
+
+    return rows, oof
+
+
+class WalkForwardValidator:
+    def __init__(self, dated_df, group_by='split', window='expanding', min_train_groups=2,
+                 max_train_groups=None, cache_dir="models/cache/walk_forward", n_jobs=-1,
+                 oof_store=None):
+        """
+        dated_df: output of load_dated_features (sorted by date)
+        group_by: 'split' (e.g. "2023 Spring") or 'patch'
+        window: 'expanding' (all earlier groups) or 'sliding' (last max_train_groups)
+        oof_store: OOFPredictionStore the out-of-fold table is shared through
+        """
+        self.df = dated_df
+        self.group_by = group_by
+        self.window = window
+        self.min_train_groups = min_train_groups
+        self.max_train_groups = max_train_groups
+        self.cache_dir = cache_dir
+        self.n_jobs = n_jobs
+        self.oof_store = oof_store or OOFPredictionStore()
+        self.feature_cols = [col for col in dated_df.columns if col not in META_COLUMNS]
+        self.results = None
+        self.oof = None
+        self._matrix = None
+
+    def ordered_groups(self):
+        """Groups in order of their first game"""
+        first_seen = self.df.groupby(self.group_by, sort=False)['date'].min()
+        return first_seen.sort_values(kind='stable').index.tolist()
+
+    def make_folds(self):
+        """Train on earlier groups, test on the next one"""
+        groups = self.ordered_groups()
+        group_values = self.df[self.group_by].values
+        folds = []
+
+        for i in range(self.min_train_groups, len(groups)):
+            if self.window == 'sliding' and self.max_train_groups:
+                train_groups = groups[max(0, i - self.max_train_groups):i]
+            else:
+                train_groups = groups[:i]
+            test_group = groups[i]
+
+            train_idx = np.flatnonzero(np.isin(group_values, train_groups))
+            test_idx = np.flatnonzero(group_values == test_group)
+            folds.append({
+                'fold': len(folds),
+                'train_start': str(train_groups[0]),
+                'train_end': str(train_groups[-1]),
+                'test_group': str(test_group),
+                'n_train': len(train_idx),
+                'n_test': len(test_idx),
+                'train_idx': train_idx,
+                'test_idx': test_idx
+            })
+
+        return folds
+
+    def fingerprint(self):
+        """Hash of the feature values and fold specification"""
+        h = hashlib.sha256()
+        h.update(pd.util.hash_pandas_object(self.df[self.feature_cols + ['blue_win']], index=False).values.tobytes())
+        h.update(repr((self.feature_cols, self.group_by, self.window,
+                       self.min_train_groups, self.max_train_groups)).encode())
+        return h.hexdigest()[:16]
+
+    def full_matrix(self):
+        """float32 feature matrix and labels for the whole (sorted) dataset"""
+        if self._matrix is None:
+            X = self.df[self.feature_cols].fillna(0).to_numpy(dtype=np.float32)
+            y = self.df['blue_win'].to_numpy(dtype=np.int32)
+            self._matrix = (X, y)
+        return self._matrix
+
+    def fold_matrix_path(self, fold, fingerprint):
+        """Write (once) and return the cached float32 matrices of a fold"""
+        path = os.path.join(self.cache_dir, f"{fingerprint}_fold{fold['fold']}.npz")
+        if not os.path.exists(path):
+            X, y = self.full_matrix()
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = path[:-len('.npz')] + '.tmp.npz'
+            np.savez(tmp_path,
+                     X_train=X[fold['train_idx']], y_train=y[fold['train_idx']],
+                     X_test=X[fold['test_idx']], y_test=y[fold['test_idx']])
+            os.replace(tmp_path, path)
+        return path
+
+    def run(self, model_specs=None):
+        """Evaluate all folds in parallel and return the per-fold metrics table"""
+        model_specs = model_specs or DEFAULT_MODEL_SPECS
+        folds = self.make_folds()
+        fingerprint = self.fingerprint()
+
+        print(f"Walk-forward: {len(folds)} folds by {self.group_by} ({self.window} window)")
+
+        jobs = []
+        for fold in folds:
+            path = self.fold_matrix_path(fold, fingerprint)
+            info = {k: v for k, v in fold.items() if k not in ['train_idx', 'test_idx']}
+            jobs.append(delayed(_evaluate_fold)(info, path, model_specs))
+
+        outputs = Parallel(n_jobs=self.n_jobs)(jobs)
+        self.results = pd.DataFrame([row for rows, _ in outputs for row in rows])
+
+        # Out-of-fold probabilities, one row per test game
+        oof_frames = []
+        for fold, (_, oof) in zip(folds, outputs):
+            frame = self.df.iloc[fold['test_idx']][['gameid', 'blue_win']].copy()
+            frame['fold'] = fold['fold']
+            for name, proba in oof.items():
+                frame[name] = proba
+            oof_frames.append(frame)
+        self.oof = pd.concat(oof_frames, ignore_index=True)
+        self.oof_store.save_run(self.run_key(model_specs), self.oof, fingerprint)
+
+        return self.results
+
+    def run_key(self, model_specs):
+        """Key of the out-of-fold table for this fold spec, feature set and model set"""
+        return f"{self.fingerprint()}_{specs_key(model_specs)}"
+
+    def oof_predictions(self, model_specs=None):
+        """Out-of-fold probabilities per game, from the shared store when available"""
+        model_specs = model_specs or DEFAULT_MODEL_SPECS
+        run_key = self.run_key(model_specs)
+        if self.oof_store.has_run(run_key):
+            self.oof = self.oof_store.run_table(run_key)
+        else:
+            self.run(model_specs)
+        return self.oof
+
+    def summary(self):
+        """Mean metrics per model across folds"""
+        return (self.results.groupby('model')[['accuracy', 'auc', 'log_loss']]
+                .mean().sort_values('auc', ascending=False))
+
+    def save_report(self, path="reports/walk_forward/fold_metrics.csv"):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.results.to_csv(path, index=False)
+        print(f"✓ Saved per-fold metrics to {path}")
+
+
+def run_walk_forward(group_by='split', window='expanding'):
+    print("="*60)
+    print("WALK-FORWARD VALIDATION")
+    print("="*60)
+
+    df = load_dated_features()
+    validator = WalkForwardValidator(df, group_by=group_by, window=window)
+    validator.run()
+
+    print(validator.summary().round(4))
+    validator.save_report()
+    return validator
+
+
+if __name__ == "__main__":
+    run_walk_forward()
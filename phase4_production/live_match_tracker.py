@@ -1,12 +1,17 @@
 # live_match_tracker.py
 import websocket
 import json
+import logging
 import threading
 from datetime import datetime
 import redis
+from config.settings import Config
+from phase3_models.model_registry import ModelRegistry
+from phase2_features.draft_state import DraftFeatureTables, DraftState
+from phase2_features.partial_draft import PartialDraftEstimator
 
 class LiveMatchTracker:
-    def __init__(self):
+    def __init__(self, backend=Config.LIVE_INFERENCE_BACKEND):
         # Redis for real-time data
         self.redis_client = redis.Redis(host='localhost', port=6379, decode_responses=True)
         
@@ -15,6 +20,64 @@ class LiveMatchTracker:
         
         self.active_matches = {}
         
+        # In-process scoring: one incrementally updated DraftState per match
+        self.backend = backend
+        self.model = None
+        self.batch_model = None
+        self.scaler = None
+        self.feature_columns = []
+        self.model_version = None
+        self.draft_tables = None
+        self.partial_draft = None
+        self.drafts = {}
+        self.load_model()
+        self.load_draft_scoring()
+    
+    def load_model(self):
+        """Served model of the latest registered version"""
+        try:
+            registry = ModelRegistry(Config.MODEL_REGISTRY_PATH)
+            manifest = registry.manifest()
+            if self.backend == 'compact':
+                from phase3_models.compact_model import load_compact_model
+                self.model = load_compact_model(registry, 'serving', manifest['version'])
+                # Compact trees are fastest on one row; sampled drafts go to the native model in one batch
+                if Config.PARTIAL_DRAFT_SAMPLES > 0:
+                    self.batch_model = registry.load('serving', manifest['version'])
+            elif self.backend == 'onnx':
+                from phase3_models.onnx_export import load_onnx_model
+                self.model = load_onnx_model(registry, 'serving', manifest['version'])
+            else:
+                self.model = registry.load('serving', manifest['version'])
+            if self.backend != 'compact':
+                self.batch_model = self.model
+            self.feature_columns = manifest['feature_columns']
+            self.scaler = registry.input_scaler('serving', manifest['version'])
+            self.model_version = manifest['version']
+            logging.info(f"Model {self.model_version} loaded ({self.backend})")
+        except Exception as e:
+            self.model = self.batch_model = None
+            logging.error(f"Model loading failed: {e}")
+    
+    def load_draft_scoring(self):
+        """Draft feature tables and, when enabled, the partial-draft estimator"""
+        if self.model is None:
+            return
+        try:
+            self.draft_tables = DraftFeatureTables()
+        except Exception as e:
+            logging.error(f"Draft feature tables unavailable: {e}")
+            return
+        
+        if Config.PARTIAL_DRAFT_SAMPLES > 0:
+            # Unfinished drafts: mean over sampled completions, scored in one batch
+            try:
+                self.partial_draft = PartialDraftEstimator(
+                    self.draft_tables, self.batch_model, self.feature_columns,
+                    n_samples=Config.PARTIAL_DRAFT_SAMPLES, scaler=self.scaler)
+            except Exception as e:
+                logging.error(f"Partial draft estimator unavailable, scoring open slots as unknown: {e}")
+        
     def start_tracking(self):
         """Start tracking live matches"""
         def on_message(ws, message):
@@ -77,6 +140,15 @@ class LiveMatchTracker:
             'status': 'drafting'
         }
         
+        if self.draft_tables is not None:
+            self.drafts[match_id] = DraftState(self.draft_tables, self.feature_columns, {
+                'blue_team': data.get('blue_team'),
+                'red_team': data.get('red_team'),
+                'patch': data.get('patch'),
+                **{f'{side}_{pos}': data.get(f'{side}_{pos}')
+                   for side in ['blue', 'red'] for pos in ['top', 'jng', 'mid', 'bot', 'sup']}
+            })
+        
         # Store in Redis for API access
         self.redis_client.hset(
             f"live_match:{match_id}",
@@ -102,12 +174,24 @@ class LiveMatchTracker:
                     'position': position
                 })
             
+            if match_id in self.drafts:
+                self.drafts[match_id].pick('blue' if team == 'blue' else 'red', champion, position)
+            
             # Update Redis
             self.update_redis_match(match_id)
             
             # Trigger prediction if enough picks
             self.check_prediction_ready(match_id)
     
+    def handle_champion_ban(self, match_id, data):
+        """Handle champion ban event"""
+        if match_id in self.active_matches:
+            team = 'blue' if data.get('team') == 'blue' else 'red'
+            self.active_matches[match_id][f'{team}_bans'].append(data.get('champion'))
+            if match_id in self.drafts:
+                self.drafts[match_id].ban(team, data.get('champion'))
+            self.update_redis_match(match_id)
+    
     def check_prediction_ready(self, match_id):
         """Check if we have enough picks to make prediction"""
         match = self.active_matches[match_id]
@@ -118,33 +202,35 @@ class LiveMatchTracker:
     
     def generate_live_prediction(self, match_id):
         """Generate prediction for ongoing draft"""
-        match = self.active_matches[match_id]
+        # Features are already up to date; score in-process
+        draft = self.drafts.get(match_id)
+        if self.model is None or draft is None:
+            return
         
-        # Prepare data for prediction
-        draft_data = {
-            'blue_champions': [p['champion'] for p in match['blue_picks']],
-            'red_champions': [p['champion'] for p in match['red_picks']],
-            'partial_draft': True
-        }
+        if draft.is_complete() or self.partial_draft is None:
+            # Without the estimator, open slots are scored as unknown champions
+            blue_prob = draft.probability(self.model, self.scaler)
+            open_slots = sum(c is None for side in draft.picks.values() for c in side)
+            estimate = {'low': blue_prob, 'high': blue_prob, 'std': 0.0, 'n_samples': 1, 'open_slots': open_slots}
+        else:
+            estimate = self.partial_draft.estimate(draft)
+            blue_prob = estimate['blue_win_probability']
         
-        # Call prediction API
-        response = requests.post(
-            'http://localhost:8000/predict_live',
-            json=draft_data
+        # Store prediction in Redis
+        self.redis_client.hset(
+            f"live_prediction:{match_id}",
+            mapping={
+                'blue_win_probability': blue_prob,
+                'red_win_probability': 1 - blue_prob,
+                'blue_win_probability_low': estimate['low'],
+                'blue_win_probability_high': estimate['high'],
+                'blue_win_probability_std': estimate['std'],
+                'completion_samples': estimate['n_samples'],
+                'open_slots': estimate['open_slots'],
+                'model_version': self.model_version,
+                'timestamp': datetime.now().isoformat()
+            }
         )
-        
-        if response.status_code == 200:
-            prediction = response.json()
-            
-            # Store prediction in Redis
-            self.redis_client.hset(
-                f"live_prediction:{match_id}",
-                mapping={
-                    'blue_win_probability': prediction['blue_win_probability'],
-                    'red_win_probability': prediction['red_win_probability'],
-                    'timestamp': datetime.now().isoformat()
-                }
-            )
     
     def handle_draft_complete(self, match_id, data):
         """Handle completed draft"""
@@ -169,6 +255,7 @@ class LiveMatchTracker:
             
             # Clean up
             del self.active_matches[match_id]
+            self.drafts.pop(match_id, None)
     
     def update_redis_match(self, match_id):
         """Update match data in Redis"""
@@ -177,6 +264,8 @@ class LiveMatchTracker:
             match_data = self.active_matches[match_id].copy()
             match_data['blue_picks'] = json.dumps(match_data['blue_picks'])
             match_data['red_picks'] = json.dumps(match_data['red_picks'])
+            match_data['blue_bans'] = json.dumps(match_data['blue_bans'])
+            match_data['red_bans'] = json.dumps(match_data['red_bans'])
             
             self.redis_client.hset(
                 f"live_match:{match_id}",
@@ -1,10 +1,13 @@
 # performance_monitor.py
+import os
 import pandas as pd
 from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
 import seaborn as sns
 from flask import Flask, render_template, jsonify
 import json
+from config.settings import Config
+from phase3_models.model_registry import ModelRegistry
 
 class PerformanceMonitor:
     def __init__(self):
@@ -38,6 +41,10 @@ class PerformanceMonitor:
         def feature_importance():
             importance_data = self.get_feature_importance()
             return jsonify(importance_data)
+        
+        @self.app.route('/api/calibration')
+        def calibration():
+            return jsonify(self.get_calibration())
     
     def calculate_current_metrics(self):
         """Calculate current performance metrics"""
@@ -123,15 +130,15 @@ class PerformanceMonitor:
     
     def get_feature_importance(self):
         """Get current model feature importance"""
-        # Load current model
-        import joblib
-        model_data = joblib.load('models/final_phase3_models.pkl')
+        # Load current model (only the best member, not the whole bundle)
+        registry = ModelRegistry(Config.MODEL_REGISTRY_PATH)
+        manifest = registry.manifest()
         
-        if 'ensemble' in model_data:
+        if 'best_model' in manifest['aliases']:
             # Get feature importance from best individual model
-            best_model = model_data['ensemble'].fitted_models.get('xgboost_optimized')
+            best_model = registry.load('best_model')
             if hasattr(best_model, 'feature_importances_'):
-                feature_cols = model_data['feature_columns']
+                feature_cols = manifest['feature_columns']
                 importance = best_model.feature_importances_
                 
                 # Top 20 features
@@ -144,6 +151,21 @@ class PerformanceMonitor:
         
         return []
     
+    def get_calibration(self, path="reports/calibration.json"):
+        """Reliability curve of each model of the current version on out-of-fold games.
+        
+        Precomputed offline (python -m phase3_models.oof_store) because it
+        needs a walk-forward refit; never computed inside a request.
+        """
+        if not os.path.exists(path):
+            return {'error': 'No calibration report; run python -m phase3_models.oof_store'}
+        
+        with open(path, 'r') as f:
+            report = json.load(f)
+        
+        report['stale'] = report.get('version') != ModelRegistry(Config.MODEL_REGISTRY_PATH).latest_version()
+        return report
+    
     def get_recent_predictions(self, df, limit=10):
         """Get recent prediction details"""
         recent = df.nlargest(limit, 'timestamp')[
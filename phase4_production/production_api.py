@@ -6,6 +6,8 @@ from typing import List, Optional
 import redis
 import asyncio
 from datetime import datetime
+from config.settings import Config
+from phase3_models.model_registry import ModelRegistry
 
 app = FastAPI(title="LCK Draft Predictor Pro", version="2.0.0")
 
@@ -16,6 +18,7 @@ redis_client = redis.Redis(host='localhost', port=6379, decode_responses=True)
 # Initialize systems
 feedback_system = FeedbackSystem(db_engine)
 performance_monitor = PerformanceMonitor()
+model_registry = ModelRegistry(Config.MODEL_REGISTRY_PATH)
 
 class PredictionRequest(BaseModel):
     blue_champions: List[str]
@@ -60,19 +63,19 @@ async def predict_match(
     # Generate prediction ID
     prediction_id = str(uuid.uuid4())
     
-    # Load latest model
-    model_data = load_latest_model()
+    # Served model of the latest version (loaded once per version, then memoized)
+    model, manifest = model_registry.load_serving()
     
     # Create features
     features = create_advanced_features(draft)
     
     # Make prediction
-    prediction = model_data['ensemble'].predict_proba(features)
+    prediction = model.predict_proba(features)
     blue_win_prob = prediction[0][1]
     
     # Calculate confidence and factors
     confidence = abs(blue_win_prob - 0.5) * 2
-    key_factors = extract_key_factors(features, model_data)
+    key_factors = extract_key_factors(features, manifest)
     
     # Check if live updates available
     live_updates = False
@@ -89,7 +92,7 @@ async def predict_match(
             'blue_win_probability': blue_win_prob,
             'predicted_winner': 'blue' if blue_win_prob > 0.5 else 'red',
             'confidence': confidence,
-            'model_version': model_data['version'],
+            'model_version': manifest['version'],
             'timestamp': datetime.now(),
             'api_key': api_key[:8] + '...'  # Log partial key
         }
@@ -101,7 +104,7 @@ async def predict_match(
         red_win_probability=1 - blue_win_prob,
         confidence=confidence,
         key_factors=key_factors[:5],
-        model_version=model_data['version'],
+        model_version=manifest['version'],
         timestamp=datetime.now(),
         live_updates_available=live_updates
     )
@@ -192,9 +195,8 @@ async def health_check():
     
     # Check model status
     try:
-        model_data = load_latest_model()
+        model_version = model_registry.manifest()['version']
         model_status = "healthy"
-        model_version = model_data['version']
     except:
         model_status = "error"
         model_version = "unknown"
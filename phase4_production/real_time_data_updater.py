@@ -6,7 +6,12 @@ import pandas as pd
 from datetime import datetime, timedelta
 import logging
 import os
-from sqlalchemy import create_engine
+import sys
+import subprocess
+from sqlalchemy import create_engine, text, bindparam
+from config.settings import Config
+from phase1_enhancement.enhanced_data_collector import EnhancedDataCollector
+from phase3_models.incremental_update import IncrementalUpdater
 
 class RealTimeDataUpdater:
     def __init__(self):
@@ -24,6 +29,12 @@ class RealTimeDataUpdater:
         # Database connection
         self.db_engine = create_engine('sqlite:///data/lck_matches.db')
         
+        # Same Leaguepedia parsing as phase 1; new games also go to its match store for full retrains
+        self.collector = EnhancedDataCollector()
+        
+        # Warm-starts the registered models in this process
+        self.incremental_updater = IncrementalUpdater()
+        
     def check_for_new_matches(self):
         """Check for new LCK matches every hour"""
         self.logger.info("Checking for new matches...")
@@ -65,7 +76,11 @@ class RealTimeDataUpdater:
             'tables': 'ScoreboardGames=SG',
             'fields': 'SG.GameId, SG.DateTime_UTC, SG.Team1, SG.Team2, '
                      'SG.Winner, SG.Team1Picks, SG.Team2Picks, '
-                     'SG.Team1Bans, SG.Team2Bans, SG.Patch',
+                     'SG.Team1Bans, SG.Team2Bans, SG.Patch, '
+                     'SG.Team1Players, SG.Team2Players, '
+                     'SG.Team1Dragons, SG.Team2Dragons, SG.Team1Barons, SG.Team2Barons, '
+                     'SG.Team1Towers, SG.Team2Towers, SG.Team1Gold, SG.Team2Gold, '
+                     'SG.Team1Kills, SG.Team2Kills, SG.Gamelength_Number',
             'where': f'SG.Tournament LIKE "%LCK%" AND SG.DateTime_UTC > "{since_date}"',
             'order_by': 'SG.DateTime_UTC DESC',
             'limit': '100'
@@ -75,37 +90,25 @@ class RealTimeDataUpdater:
         
         if response.status_code == 200:
             data = response.json()
-            matches = []
-            
-            for item in data.get('cargoquery', []):
-                match_data = item.get('title', {})
-                if self.validate_match_data(match_data):
-                    matches.append(self.parse_match_data(match_data))
-            
-            return matches
+            return self.parse_match_data(data.get('cargoquery', []))
         
         return []
     
-    def validate_match_data(self, match_data):
-        """Validate that match has complete data"""
-        required_fields = ['Team1Picks', 'Team2Picks', 'Winner']
-        return all(match_data.get(field) for field in required_fields)
-    
-    def parse_match_data(self, match_data):
-        """Parse match data into standard format"""
-        # Similar to Phase 1 parsing logic
-        return {
-            'gameid': match_data.get('GameId'),
-            'date': match_data.get('DateTime UTC'),
-            'blue_team': match_data.get('Team1'),
-            'red_team': match_data.get('Team2'),
-            'blue_win': 1 if match_data.get('Winner') == '1' else 0,
-            # ... parse champions, bans, etc.
-        }
+    def parse_match_data(self, results):
+        """Games with picks, bans, players, teams and patch, parsed and validated as in phase 1"""
+        return list(self.collector.validate_games(self.collector.parse_leaguepedia_rows(results)))
     
     def process_new_matches(self, matches):
         """Process and store new matches"""
+        matches = [game for game in matches if game['gameid'] not in self.collector.store]
+        if not matches:
+            return
+        
+        # Match store first: full retrains rebuild features from it
+        self.collector.store.append(matches)
+        
         df = pd.DataFrame(matches)
+        df['processed'] = 0
         
         # Store in database
         df.to_sql('matches', self.db_engine, if_exists='append', index=False)
@@ -117,30 +120,70 @@ class RealTimeDataUpdater:
     
     def update_features(self, new_matches_df):
         """Update feature calculations with new data"""
-        # Update player stats
-        self.update_player_stats(new_matches_df)
-        
-        # Update champion synergies
-        self.update_champion_synergies(new_matches_df)
-        
-        # Update team matchup history
-        self.update_team_matchups(new_matches_df)
+        # Player stats, synergies and matchups are rebuilt from the match store
+        # by the weekly full retrain; incremental updates featurize new games
+        # against the current tables
+        self.logger.info(f"{len(new_matches_df)} games queued for the next feature rebuild")
     
     def trigger_model_update(self):
-        """Trigger model retraining if needed"""
-        # Check if enough new matches
+        """Incrementally update the models once enough new games are in.
+
+        The registered models are warm-started in-process on the unprocessed
+        games; the new version is promoted only if the holdout agrees. A
+        rejected or failed batch stays unprocessed and is retried with more games.
+        """
         query = "SELECT COUNT(*) as new_matches FROM matches WHERE processed = 0"
         result = pd.read_sql(query, self.db_engine)
         
-        if result['new_matches'].iloc[0] >= 50:
-            self.logger.info("Triggering model retraining...")
-            os.system("python retrain_model.py")
+        if result['new_matches'].iloc[0] < Config.INCREMENTAL_UPDATE_MIN_GAMES:
+            return
+        
+        self.logger.info("Running incremental model update...")
+        games = pd.read_sql("SELECT * FROM matches WHERE processed = 0", self.db_engine)
+        try:
+            report = self.incremental_updater.run(games)
+        except Exception as e:
+            self.logger.error(f"Incremental update failed, games left unprocessed: {e}")
+            return
+        
+        if report['promoted']:
+            self.logger.info(f"Promoted model version {report['version']} "
+                             f"(holdout AUC {report['holdout_before']['auc']:.4f} -> "
+                             f"{report['holdout_after']['auc']:.4f})")
+            self.mark_processed(games['gameid'].tolist())
+        else:
+            self.logger.info(f"Kept model version {report['version']}: {report['reason']}")
+    
+    def mark_processed(self, gameids=None):
+        """Mark the given games (all games if None) as used for training"""
+        with self.db_engine.begin() as conn:
+            if gameids is None:
+                conn.execute(text("UPDATE matches SET processed = 1"))
+            else:
+                statement = text("UPDATE matches SET processed = 1 WHERE gameid IN :gameids")
+                conn.execute(statement.bindparams(bindparam('gameids', expanding=True)),
+                             {'gameids': gameids})
+    
+    def full_retrain(self):
+        """Scheduled full retrain from scratch: features, then the phase3 models"""
+        self.logger.info("Running full model retrain...")
+        
+        # Separate processes, so training memory is returned when each step ends
+        for module in ["phase2_features.run_phase2_features", "phase3_models.run_phase3_models"]:
+            result = subprocess.run([sys.executable, "-m", module])
+            if result.returncode != 0:
+                self.logger.error(f"Full retrain failed in {module} (exit code {result.returncode})")
+                return
+        
+        self.mark_processed()
+        self.logger.info("Full retrain complete")
     
     def run_scheduler(self):
         """Run the update scheduler"""
         # Schedule updates
         schedule.every(1).hours.do(self.check_for_new_matches)
         schedule.every(24).hours.do(self.full_data_refresh)
+        schedule.every().sunday.at("04:00").do(self.full_retrain)
         schedule.every(7).days.do(self.cleanup_old_logs)
         
         self.logger.info("Real-time updater started")
@@ -26,7 +26,7 @@ def check_requirements():
     
     # Check for model file
     model_file = 'models/final_phase3_models.pkl'
-    if not os.path.exists(model_file):
+    if not os.path.exists(model_file) and not os.path.exists('models/registry/LATEST'):
         print(f"❌ Model file not found: {model_file}")
         return False
     
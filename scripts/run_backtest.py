@@ -17,6 +17,27 @@ from backtesting.performance_metrics import PerformanceAnalyzer
 from backtesting.visualization import BacktestVisualizer
 from data_collection.data_validator import DataValidator
 
+def load_model_predictions(engine, config: dict):
+    """Out-of-fold probabilities of config['model'], or None (demo predictions) when unavailable"""
+    from phase1_enhancement.match_store import open_store
+    from phase3_models.oof_store import version_oof
+    
+    model = config.get('model', 'ensemble')
+    try:
+        oof = version_oof(config.get('model_version'))
+        matches = open_store().read()
+    except (FileNotFoundError, ValueError) as e:
+        print(f"⚠️ No out-of-fold predictions ({e}); using demo predictions")
+        return None
+    
+    if model not in oof.columns:
+        print(f"⚠️ Model '{model}' has no out-of-fold column; using demo predictions")
+        return None
+    
+    predictions = engine.predictions_from_oof(oof, matches, model)
+    print(f"🤖 Using out-of-fold '{model}' probabilities for {len(predictions) // 2:,} games")
+    return predictions
+
 def run_single_backtest(config: dict) -> dict:
     """Run a single backtest with given configuration"""
     
@@ -44,11 +65,17 @@ def run_single_backtest(config: dict) -> dict:
         print("❌ No historical data loaded. Check your data files.")
         return {}
     
+    # Out-of-fold model probabilities instead of demo predictions, when asked for
+    predictions = None
+    if config.get('use_model_predictions', False):
+        predictions = load_model_predictions(engine, config)
+    
     # Run backtest
     results = engine.run_backtest(
         historical_data,
         start_date=config.get('start_date'),
-        end_date=config.get('end_date')
+        end_date=config.get('end_date'),
+        predictions=predictions
     )
     
     # Analyze results
@@ -0,0 +1,47 @@
+import csv
+import os
+
+from phase1_enhancement.match_store import PartitionedMatchStore, MATCH_COLUMNS
+
+
+def game(gameid, date='2024-06-01 08:00:00', patch='14.11'):
+    return {'gameid': gameid, 'date': date, 'patch': patch, 'blue_team': 'T1', 'red_team': 'Gen.G',
+            'blue_win': 1}
+
+
+def test_append_skips_stored_and_repeated_gameids(tmp_path):
+    store = PartitionedMatchStore(str(tmp_path))
+    first = ["LCK/2024 Season/Summer Season_Week 1_1_1", "LCK/2024 Season/Summer Season_Week 1_1_2"]
+
+    assert store.append([game(first[0]), game(first[1]), game(first[0])]) == 2
+    assert store.append([game(first[1]), game("2024 LoL KeSPA Cup_Finals_1_1")]) == 1
+
+    reopened = PartitionedMatchStore(str(tmp_path))
+    assert len(reopened) == 3
+    assert sorted(reopened.read()['gameid']) == sorted(first + ["2024 LoL KeSPA Cup_Finals_1_1"])
+    assert reopened.list_partitions() == [
+        os.path.join("league=KeSPA_Cup", "season=2024", "tournament=KeSPA_Cup"),
+        os.path.join("league=LCK", "season=2024", "tournament=Summer_Season"),
+    ]
+
+
+def test_index_is_rebuilt_after_a_crash_before_the_index_write(tmp_path):
+    store = PartitionedMatchStore(str(tmp_path))
+    store.append([game("LCK/2024 Season/Summer Season_Week 1_1_1")])
+
+    # Partition rows written, index write lost
+    lost = game("LCK/2024 Season/Summer Season_Week 1_1_2", date='2024-06-02 08:00:00')
+    partition = store.partition_name(store.partition_key(lost))
+    store._append_rows(os.path.join(str(tmp_path), partition, store.PARTITION_FILE), MATCH_COLUMNS, [lost])
+
+    reopened = PartitionedMatchStore(str(tmp_path))
+    assert lost['gameid'] in reopened
+    assert reopened.summary()['games'] == 2
+
+    # The same game appended again after the crash is not duplicated
+    reopened._append_rows(os.path.join(str(tmp_path), partition, reopened.PARTITION_FILE), MATCH_COLUMNS, [lost])
+    recovered = PartitionedMatchStore(str(tmp_path))
+    assert len(recovered) == 2
+    assert len(recovered.read()) == 2
+    with open(recovered.index_path, newline='') as f:
+        assert len(list(csv.DictReader(f))) == 2
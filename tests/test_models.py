@@ -0,0 +1,421 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from phase3_models.numpy_network import NumpyNetwork
+
+
+def random_network(input_dim=12, hidden=(16, 8), seed=0):
+    """Scaler stats + Dense/BatchNormalization/Dropout stack like NeuralNetworkPredictor"""
+    rng = np.random.default_rng(seed)
+    layers = []
+    previous = input_dim
+    for units in hidden:
+        layers.append({'type': 'dense', 'kernel': rng.normal(size=(previous, units)),
+                       'bias': rng.normal(size=units), 'activation': 'relu'})
+        layers.append({'type': 'batchnorm', 'gamma': rng.uniform(0.5, 1.5, units),
+                       'beta': rng.normal(size=units), 'mean': rng.normal(size=units),
+                       'variance': rng.uniform(0.5, 2.0, units), 'epsilon': 1e-3})
+        previous = units
+    layers.append({'type': 'dense', 'kernel': rng.normal(size=(previous, 1)),
+                   'bias': rng.normal(size=1), 'activation': 'sigmoid'})
+    mean = rng.normal(size=input_dim)
+    scale = rng.uniform(0.5, 3.0, input_dim)
+    return layers, mean, scale
+
+
+def layerwise_forward(layers, mean, scale, X):
+    """Unfolded reference: scale, then each layer as written"""
+    h = (X - mean) / scale
+    for layer in layers:
+        if layer['type'] == 'dense':
+            h = h @ layer['kernel'] + layer['bias']
+            if layer['activation'] == 'relu':
+                h = np.maximum(h, 0)
+            elif layer['activation'] == 'sigmoid':
+                h = 1 / (1 + np.exp(-h))
+        else:
+            h = (layer['gamma'] * (h - layer['mean']) / np.sqrt(layer['variance'] + layer['epsilon'])
+                 + layer['beta'])
+    return h[:, 0]
+
+
+def test_numpy_network_matches_unfolded_layers(tmp_path):
+    layers, mean, scale = random_network()
+    X = np.random.default_rng(1).normal(size=(200, 12))
+
+    network = NumpyNetwork.from_layers(layers, mean, scale)
+    path = tmp_path / "network.npz"
+    network.save(str(path))
+    loaded = NumpyNetwork.load(str(path))
+
+    expected = layerwise_forward(layers, mean, scale, X)
+    np.testing.assert_allclose(loaded.predict_proba(X)[:, 1], expected, atol=1e-5)
+    assert len(loaded.weights) == 3  # batch norm folded away
+
+
+def test_numpy_export_matches_keras(tmp_path):
+    pytest.importorskip("tensorflow")
+    from sklearn.preprocessing import StandardScaler
+    from phase3_models.neural_network_model import NeuralNetworkPredictor
+
+    rng = np.random.default_rng(2)
+    X = rng.normal(loc=3.0, scale=2.0, size=(300, 20)).astype(np.float32)
+
+    predictor = NeuralNetworkPredictor()
+    predictor.scaler = StandardScaler().fit(X)
+    predictor.model = predictor.build_model(X.shape[1])
+    # Non-trivial moving statistics so the batch norm folding is exercised
+    for layer in predictor.model.layers:
+        if type(layer).__name__ == 'BatchNormalization':
+            units = layer.gamma.shape[0]
+            layer.set_weights([rng.uniform(0.5, 1.5, units), rng.normal(size=units),
+                               rng.normal(size=units), rng.uniform(0.5, 2.0, units)])
+
+    network = predictor.export_numpy(str(tmp_path / "network.npz"))
+
+    expected = predictor.predict(X)[:, 0]
+    np.testing.assert_allclose(network.predict_proba(X)[:, 1], expected, atol=1e-4)
+
+
+def test_neural_network_module_does_not_import_tensorflow():
+    code = ("import sys, phase3_models.neural_network_model; "
+            "sys.exit('tensorflow' in sys.modules)")
+    repo_root = Path(__file__).resolve().parents[1]
+    assert subprocess.run([sys.executable, "-c", code], cwd=repo_root).returncode == 0
+
+
+OUT_OF_CORE_SCRIPT = """
+import resource, sys
+import numpy as np
+from phase3_models.out_of_core import (ChunkWriter, FeatureChunks, train_xgboost_external,
+                                       train_lightgbm_external)
+
+directory, stage = sys.argv[1], sys.argv[2]
+if stage == 'generate':
+    n_rows, n_features, chunk = 5_000_000, 40, 250_000
+    rng = np.random.default_rng(0)
+    weights = np.linspace(-1, 1, n_features)
+    writer = ChunkWriter(directory, [f'f{i}' for i in range(n_features)], chunk)
+    for _ in range(n_rows // chunk):
+        X = rng.normal(size=(chunk, n_features)).astype(np.float32)
+        y = (X @ weights + rng.normal(size=chunk) > 0).astype(np.float32)
+        writer.append('train', X, y)
+    writer.close()
+elif stage == 'xgboost':
+    train_xgboost_external(FeatureChunks(directory), {'objective': 'binary:logistic', 'tree_method': 'hist',
+                                                      'max_depth': 6, 'nthread': 1},
+                           num_boost_round=5, cache_prefix=directory + '_xgb/cache')
+else:
+    train_lightgbm_external(FeatureChunks(directory), {'objective': 'binary', 'verbose': -1, 'num_threads': 1},
+                            num_boost_round=5)
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024)
+"""
+
+
+@pytest.mark.skipif(not os.environ.get('LCK_RUN_MEMORY_TESTS'),
+                    reason="5M-row out-of-core test; set LCK_RUN_MEMORY_TESTS=1")
+def test_out_of_core_training_memory_is_bounded(tmp_path):
+    # 5M x 40 features is ~1.5 GB as a float64 matrix; training must stay well below that
+    cap_mb = 1024
+    repo_root = Path(__file__).resolve().parents[1]
+    directory = str(tmp_path / "chunks")
+
+    for stage in ['generate', 'xgboost', 'lightgbm']:
+        result = subprocess.run([sys.executable, "-c", OUT_OF_CORE_SCRIPT, directory, stage],
+                                cwd=repo_root, capture_output=True, text=True, check=True)
+        peak_mb = int(result.stdout.strip().splitlines()[-1])
+        assert peak_mb < cap_mb, f"{stage} peaked at {peak_mb} MB"
+
+
+def synthetic_games(n, seed=0):
+    """Match-store shaped games plus the feature rows a creator would give them"""
+    from phase3_models.incremental_update import REQUIRED_GAME_COLUMNS
+
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 4)).astype(np.float32)
+    games = pd.DataFrame({col: 'Ahri' for col in REQUIRED_GAME_COLUMNS}, index=range(n))
+    games['blue_win'] = (X[:, 0] + 0.3 * rng.normal(size=n) > 0).astype(int)
+    games['date'] = pd.date_range('2024-01-01', periods=n, freq='h')
+    return games, X
+
+
+def test_validate_games_checks_required_columns():
+    from phase3_models.incremental_update import IncrementalUpdater, OPTIONAL_GAME_COLUMNS
+
+    updater = IncrementalUpdater(registry=object())
+    games, _ = synthetic_games(5)
+    games.loc[2, 'red_champ3'] = None
+
+    valid = updater.validate_games(games)
+    assert list(valid.index) == [0, 1, 3, 4]
+    assert all(valid[col].eq('').all() for col in OPTIONAL_GAME_COLUMNS)
+
+    with pytest.raises(ValueError, match="blue_champ1"):
+        updater.validate_games(games.drop(columns='blue_champ1'))
+
+
+def test_incremental_update_rejects_worse_holdout(tmp_path):
+    import lightgbm as lgb
+    from phase3_models.model_registry import ModelRegistry
+    from phase3_models.incremental_update import IncrementalUpdater
+
+    games, X = synthetic_games(600)
+    model = lgb.LGBMClassifier(n_estimators=30, verbose=-1).fit(X[:300], games['blue_win'][:300])
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    version = registry.register({'lightgbm': model}, ['f0', 'f1', 'f2', 'f3'], aliases={'serving': 'lightgbm'})
+
+    updater = IncrementalUpdater(registry=registry, n_trees=50, max_auc_drop=0.0, max_log_loss_rise=0.0)
+    updater.game_features = lambda g, columns: (X[g.index], g['blue_win'].to_numpy())
+    # Flipped labels on the update games; the holdout keeps the true ones
+    new_games = games.iloc[300:].copy()
+    new_games.loc[new_games.index[:210], 'blue_win'] ^= 1
+
+    report = updater.run(new_games)
+    assert not report['promoted']
+    assert report['reason'] == "holdout metrics got worse"
+    assert report['holdout_after']['log_loss'] > report['holdout_before']['log_loss']
+    assert registry.latest_version() == version
+    assert registry.list_versions() == [version]
+
+
+def synthetic_oof(n=2000, seed=0):
+    """OOF frame with an informative member, a near copy of it and pure noise"""
+    rng = np.random.default_rng(seed)
+    signal = rng.normal(size=n)
+    y = (signal + rng.normal(scale=0.5, size=n) > 0).astype(int)
+    good = 1 / (1 + np.exp(-2 * signal))
+    return pd.DataFrame({
+        'good': good,
+        'copy': np.clip(good + rng.normal(scale=0.01, size=n), 0.01, 0.99),
+        'noise': rng.uniform(0.05, 0.95, size=n),
+        'blue_win': y,
+        'fold': np.arange(n) % 5
+    })
+
+
+def test_ensemble_selector_backward_search_drops_noise_first():
+    from phase3_models.ensemble_selection import EnsembleSelector
+
+    oof = synthetic_oof()
+    path = EnsembleSelector(method='backward').search(oof, ['good', 'copy', 'noise'])
+
+    assert [sorted(members) for members, _ in path] == [['copy', 'good', 'noise'], ['copy', 'good'],
+                                                         [path[2][0][0]]]
+    assert path[2][0][0] in ('good', 'copy')
+    assert path[1][1]['log_loss'] < path[0][1]['log_loss']
+    assert path[1][1]['auc'] > 0.8
+
+
+def test_ensemble_selector_ignores_latency_noise():
+    from phase3_models.ensemble_selection import EnsembleSelector
+
+    oof = synthetic_oof()
+    # 2 members timed 3% faster than 1 member: within the noise margin, so fewer members wins
+    latencies = {3: 10.0, 2: 9.5, 1: 9.8}
+    selector = EnsembleSelector(tolerance=1.0, latency_margin=0.15)
+    selected = selector.select(oof, ['good', 'copy', 'noise'],
+                               lambda subsets: [latencies[len(members)] for members in subsets])
+
+    assert len(selected) == 1
+    assert selector.report['selected'].sum() == 1
+    assert selector.report.loc[selector.report['selected'], 'latency_ms'].item() == 9.8
+
+
+def test_onnx_export_matches_native_predict_proba(tmp_path):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("skl2onnx")
+    pytest.importorskip("onnxmltools")
+    import lightgbm as lgb
+    import xgboost as xgb
+    from sklearn.ensemble import RandomForestClassifier
+    from phase3_models.ensemble_model import EnsembleVotingSystem
+    from phase3_models.model_registry import ModelRegistry
+    from phase3_models.onnx_export import load_onnx_model
+
+    games, X = synthetic_games(400)
+    y = games['blue_win']
+    members = {
+        'xgboost': xgb.XGBClassifier(n_estimators=20, max_depth=3).fit(X, y),
+        'lightgbm': lgb.LGBMClassifier(n_estimators=20, verbose=-1).fit(X, y),
+        'random_forest': RandomForestClassifier(n_estimators=20, max_depth=5, random_state=0).fit(X, y),
+    }
+    ensemble = EnsembleVotingSystem(models=members, prefit=True)
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    registry.register({**members, 'ensemble': ensemble}, ['f0', 'f1', 'f2', 'f3'],
+                      aliases={'serving': 'ensemble'})
+
+    for name in ['xgboost', 'lightgbm', 'random_forest', 'serving']:
+        native = registry.load(name).predict_proba(X)
+        onnx = load_onnx_model(registry, name).predict_proba(X)
+        np.testing.assert_allclose(onnx, native, atol=1e-5, err_msg=name)
+
+    onnx_dir = os.path.join(registry.version_dir(registry.latest_version()), 'onnx')
+    assert not [f for f in os.listdir(onnx_dir) if f.endswith('.tmp')]
+
+
+def test_model_registry_register_promote_alias_and_lazy_load(tmp_path, monkeypatch):
+    from sklearn.linear_model import LogisticRegression
+    from phase3_models import model_registry
+    from phase3_models.ensemble_model import EnsembleVotingSystem
+    from phase3_models.model_registry import ModelRegistry
+
+    games, X = synthetic_games(200)
+    y = games['blue_win']
+    a = LogisticRegression().fit(X, y)
+    b = LogisticRegression(C=0.1).fit(X, y)
+    registry = ModelRegistry(str(tmp_path / "registry"))
+
+    # Unpromoted, even as the first version: nothing is served yet
+    first = registry.register({'a': a}, ['f0', 'f1', 'f2', 'f3'], aliases={'serving': 'a'}, promote=False)
+    assert registry.latest_version() is None
+    with pytest.raises(FileNotFoundError, match="promote"):
+        registry.load_serving()
+    assert registry.promote(first) == first
+    assert registry.latest_version() == first
+
+    # Same content again reuses the version
+    assert registry.register({'a': a}, ['f0', 'f1', 'f2', 'f3'], promote=False) == first
+
+    ensemble = EnsembleVotingSystem(models={'a': a, 'b': b}, prefit=True)
+    second = registry.register({'ensemble': ensemble}, ['f0', 'f1', 'f2', 'f3'],
+                               aliases={'serving': 'ensemble', 'best_model': 'ensemble.a'})
+    assert registry.latest_version() == second
+    assert registry.list_versions() == sorted([first, second])
+    assert set(registry.manifest()['members']) == {'ensemble', 'ensemble.a', 'ensemble.b'}
+
+    # Loading one member reads only its file; the ensemble shell pulls in its members
+    calls = []
+    real_load = model_registry.joblib.load
+    monkeypatch.setattr(model_registry.joblib, 'load',
+                        lambda path: calls.append(os.path.basename(path)) or real_load(path))
+    best = registry.load('best_model')
+    assert calls == ['ensemble.a.joblib']
+    served, manifest = registry.load_serving()
+    assert sorted(calls) == ['ensemble.a.joblib', 'ensemble.b.joblib', 'ensemble.joblib']
+    assert served.fitted_models['a'] is best
+    assert registry.load('serving') is served
+    assert len(calls) == 3
+    monkeypatch.undo()
+
+    assert manifest['version'] == second
+    np.testing.assert_allclose(served.predict_proba(X), ensemble.predict_proba(X))
+    np.testing.assert_allclose(registry.load('a', first).predict_proba(X), a.predict_proba(X))
+
+
+def test_feature_pruner_drops_constant_duplicate_and_dependent_columns(tmp_path):
+    from phase3_models.feature_pruning import FeaturePruner
+
+    rng = np.random.default_rng(0)
+    n = 300
+    blue_gold, red_gold, blue_kills = rng.normal(size=(3, n))
+    rare = np.zeros(n)
+    rare[0] = 1.0
+    frame = pd.DataFrame({
+        'blue_gold': blue_gold,
+        'red_gold': red_gold,
+        'gold_diff': blue_gold - red_gold,
+        'blue_kills': blue_kills,
+        'blue_kills_copy': blue_kills,
+        'is_playoffs': np.ones(n),
+        'rare_flag': rare,
+    })
+
+    pruner = FeaturePruner().fit(frame.to_numpy(), frame.columns)
+
+    assert pruner.features == ['blue_gold', 'gold_diff', 'blue_kills']
+    assert pruner.dropped == {
+        'is_playoffs': {'reason': 'constant'},
+        'rare_flag': {'reason': 'near_constant'},
+        'blue_kills_copy': {'reason': 'duplicate', 'of': ['blue_kills']},
+        'red_gold': {'reason': 'linear_combination', 'of': ['gold_diff', 'blue_gold']},
+    }
+    assert pruner.summary() == {'constant': 1, 'near_constant': 1, 'duplicate': 1, 'linear_combination': 1}
+    np.testing.assert_array_equal(pruner.transform(frame.to_numpy(), list(frame.columns)),
+                                  frame[pruner.features].to_numpy())
+
+    path = str(tmp_path / "feature_schema.json")
+    pruner.save(path)
+    loaded = FeaturePruner.load(path)
+    assert loaded.features == pruner.features and loaded.dropped == pruner.dropped
+
+
+def test_draft_state_matches_create_game_features(monkeypatch):
+    # AdvancedFeatureCreator reads the tracked data/enhanced tables by relative path
+    monkeypatch.chdir(Path(__file__).resolve().parents[1])
+    from phase2_features.draft_state import DraftFeatureTables, DraftState, POSITIONS
+
+    tables = DraftFeatureTables()
+    # Patches as strings, as the match store keeps them ("14.10" is not 14.1)
+    games = pd.read_csv("data/enhanced/lck_full_dataset.csv", nrows=50, dtype={'patch': str})
+    columns = list(tables.creator.create_game_features(games.iloc[0]))
+
+    expected = np.array([[row[col] for col in columns]
+                         for row in map(tables.creator.create_game_features, (g for _, g in games.iterrows()))])
+    picks = {side: np.array([[tables.champion_index(c) for c in games[f'{side}_champ{i}']]
+                             for i in range(1, 6)]).T for side in ['blue', 'red']}
+
+    actual = []
+    for _, game in games.iterrows():
+        state = DraftState(tables, columns, game.to_dict())
+        # Blue 1, red 1-2, blue 2-3, ... in the order of a real draft, positions out of slot order
+        for side, slot in [('blue', 2), ('red', 0), ('red', 4), ('blue', 0), ('blue', 1),
+                           ('red', 2), ('red', 1), ('blue', 3), ('blue', 4), ('red', 3)]:
+            assert state.pick(side, game[f'{side}_champ{slot + 1}'], POSITIONS[slot]) == slot
+        assert state.is_complete()
+        actual.append(state.x[0])
+    np.testing.assert_allclose(np.array(actual), expected, rtol=1e-5, atol=1e-5)
+
+    # The same drafts in one batch on top of the static features
+    X = np.array([[static.get(col, 0) for col in columns]
+                  for static in (tables.static_features(g.to_dict()) for _, g in games.iterrows())])
+    X = tables.draft_features(X, columns, picks)
+    np.testing.assert_allclose(X, expected, rtol=1e-5, atol=1e-5)
+
+
+def test_sharded_trainer_split_and_routing(tmp_path):
+    from sklearn.linear_model import LogisticRegression
+    from phase3_models.model_registry import ModelRegistry
+    from phase3_models.sharding import GLOBAL_SHARD, ShardedTrainer, patch_era, shard_key
+
+    assert patch_era('14.23') == '14' and patch_era(None) == 'unknown'
+    assert shard_key('LCK', '13.1', by_era=True) == 'LCK|13'
+
+    # Sorted by date; the LCK and KeSPA Cup games interleave
+    games = pd.DataFrame({
+        'gameid': ['LCK/2024 Season/Spring Season_Week 1_1_1', '2024 LoL KeSPA Cup_Finals_1_1',
+                   'LCK/2024 Season/Spring Season_Week 1_1_2', 'LCK/2024 Season/Summer Season_Week 1_1_1',
+                   '2024 LoL KeSPA Cup_Finals_1_2', 'LCK/2024 Season/Summer Season_Week 1_1_2'],
+        'patch': ['13.24', '14.23', '14.1', '14.1', '14.23', '14.2'],
+    })
+    trainer = ShardedTrainer(by_era=True, test_fraction=0.34)
+    keys = trainer.assign(games)
+    assert keys.tolist() == ['LCK|13', 'KeSPA Cup|14', 'LCK|14', 'LCK|14', 'KeSPA Cup|14', 'LCK|14']
+
+    # Newest third of each shard, rounded: 1 of the 3 LCK|14 games, 1 of 2 KeSPA Cup|14, none of LCK|13
+    assert trainer.split(keys).tolist() == [False, False, False, False, True, True]
+    # A fifth rounds to 1 of 3 games but to none of 2
+    assert ShardedTrainer(test_fraction=0.2).split(keys).tolist() == [False] * 5 + [True]
+
+    # Only routed shards get a member; everything else falls back to the global model
+    games_x, X = synthetic_games(100)
+    model = LogisticRegression().fit(X, games_x['blue_win'])
+    trainer.feature_cols = ['f0', 'f1', 'f2', 'f3']
+    trainer.report = pd.DataFrame({'shard': ['LCK|14', 'KeSPA Cup|14', 'LCK|13'],
+                                   'routed': [True, False, False]})
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    version = trainer.register({GLOBAL_SHARD: model, 'LCK|14': model, 'KeSPA Cup|14': model, 'LCK|13': model},
+                               registry=registry)
+    assert registry.latest_version() is None
+    manifest = registry.manifest(version)
+    assert set(manifest['members']) == {GLOBAL_SHARD, 'shard_LCK_14', 'router'}
+
+    router = registry.load('router', version)
+    assert router.member_for('LCK', '14.5') == 'shard_LCK_14'
+    assert router.member_for('LCK', '13.24') is None
+    assert router.member_for('KeSPA Cup', '14.23') is None